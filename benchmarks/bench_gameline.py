@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measures GameLine parsing throughput in lines per second.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_gameline
+"""
+
+import time
+
+import issgame
+
+TEST_GAMES = 'issgame/tests/data/test_games.sgf'
+
+
+def bench_gameline(repeat: int = 20000) -> float:
+    """
+    Parses the lines of the test games file 'repeat' times and returns the
+    achieved throughput.
+
+    Args:
+        repeat (int, optional): Number of passes over the test lines.
+
+    Returns:
+        float: Parsed lines per second.
+    """
+    with open(TEST_GAMES) as games:
+        lines = [line.rstrip('\n') for line in games]
+
+    start = time.perf_counter()
+    for __i in range(repeat):
+        for line in lines:
+            game = issgame.GameLine(line)
+            for position in range(1, 4):
+                game.get_id()
+                game.get_session()
+                game.get_player(position)
+                game.get_hand(position)
+    elapsed = time.perf_counter() - start
+    return repeat*len(lines)/elapsed
+
+
+if __name__ == "__main__":
+    print('GameLine: {:,.0f} lines/sec'.format(bench_gameline()))
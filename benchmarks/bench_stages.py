@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measures the throughput and peak memory of each stage of the analysis on a
+synthetic ISS game file, and compares them with a stored baseline.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_stages
+    python -m benchmarks.bench_stages --save-baseline
+
+Throughput is measured in games per second without memory tracing, the
+peak memory in a second run traced by tracemalloc. Absolute speeds differ
+between machines, so each timed run of a stage is paired with a run of a
+fixed reference workload that does not use issgame, and a stage is
+compared by its throughput relative to the reference ('relative', the
+median over REPEATS pairs). Stages slower than the baseline relative to the
+reference by more than the tolerance are reported as regressions and make
+the command exit with status 1. The games per second stored in the
+baseline are informational only.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict
+
+import issgame
+from issgame.synthetic import write_synthetic_games
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+GAMES = 20000
+REFERENCE_ITEMS = 200000
+REPEATS = 5
+TOLERANCE = 0.2
+
+
+def _timed(function: Callable) -> float:
+    '''Returns the seconds a call of 'function' takes'''
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def _reference() -> Callable:
+    '''
+    Returns a fixed workload of pure Python string, dictionary, and sorting
+    operations on REFERENCE_ITEMS items, a function of no arguments.
+    '''
+    words = [str(number*7919 % REFERENCE_ITEMS)
+             for number in range(REFERENCE_ITEMS)]
+
+    def workload():
+        counts = {}
+        for word in words:
+            counts[word[-2:]] = counts.get(word[-2:], 0) + 1
+        sorted(words)
+
+    return workload
+
+
+def _stages(directory: str) -> Dict[str, Callable]:
+    '''Returns the benchmarked stages, each a function of no arguments'''
+    raw_file = os.path.join(directory, 'games.sgf')
+    converted_file = os.path.join(directory, 'games.tsv')
+    sessions_file = os.path.join(directory, 'games_sessions.csv')
+    with open(raw_file) as games:
+        lines = games.read().splitlines()
+    hands = [issgame.GameLine(line).get_hand1() for line in lines]
+
+    def parse():
+        for line in lines:
+            issgame.GameLine(line)
+
+    def score():
+        for hand in hands:
+            issgame.hand_score(hand)
+
+    return {
+        'GameLine': parse,
+        'hand_score': score,
+        'hand_scores': lambda: issgame.hand_scores(hands),
+        'extract_svg_hands': lambda: issgame.extract_svg_hands(
+            [raw_file], converted_file),
+        'extract_sessions': lambda: issgame.extract_sessions(
+            converted_file, 'player0'),
+        'extract_all_sessions': lambda: issgame.extract_all_sessions(
+            converted_file),
+        'load_hands': lambda: issgame.load_hands(converted_file, 1),
+        'load_sessions': lambda: issgame.load_sessions(sessions_file,
+                                                       'player0'),
+    }
+
+
+def run(games: int = GAMES, seed: int = 0) -> Dict[str, Dict[str, float]]:
+    '''
+    Benchmarks every stage on a synthetic file of 'games' games.
+
+    Args:
+        games (int, optional): Number of games. Defaults to GAMES.
+        seed (int, optional): Seed of the synthetic games.
+
+    Returns:
+        Dict[str, Dict[str, float]]: 'games_per_sec', 'relative' (games per
+        second over reference items per second in adjacent runs), and
+        'peak_mb' of each stage.
+    '''
+    results = {}
+    reference = _reference()
+    with tempfile.TemporaryDirectory() as directory:
+        write_synthetic_games(os.path.join(directory, 'games.sgf'), games,
+                              seed=seed)
+        # the stages run in order, each reading the output of the last
+        for name, stage in _stages(directory).items():
+            elapsed = []
+            relative = []
+            for __run in range(REPEATS):
+                # adjacent runs see the same load of the machine
+                elapsed.append(_timed(stage))
+                relative.append(games/elapsed[-1]
+                                / (REFERENCE_ITEMS/_timed(reference)))
+
+            tracemalloc.start()
+            stage()
+            __current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results[name] = {'games_per_sec': games/min(elapsed),
+                             'relative': statistics.median(relative),
+                             'peak_mb': peak/2**20}
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]],
+            baseline: Dict[str, Dict[str, float]],
+            tolerance: float = TOLERANCE) -> Dict[str, float]:
+    '''
+    Returns the relative throughput of each stage over that of the
+    baseline, for the stages slower than the baseline by more than
+    'tolerance'.
+    '''
+    regressions = {}
+    for name, result in results.items():
+        if 'relative' not in baseline.get(name, {}):
+            continue
+        ratio = result['relative']/baseline[name]['relative']
+        if ratio < 1 - tolerance:
+            regressions[name] = ratio
+    return regressions
+
+
+def main(arguments=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--games', type=int, default=GAMES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    parser.add_argument('--save-baseline', action='store_true')
+    arguments = parser.parse_args(arguments)
+
+    results = run(arguments.games, arguments.seed)
+    baseline = {}
+    if os.path.exists(arguments.baseline):
+        with open(arguments.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    print('{:<22}{:>14}{:>10}{:>10}'.format('stage', 'games/sec', 'peak MB',
+                                            'baseline'))
+    for name, result in results.items():
+        ratio = ''
+        if 'relative' in baseline.get(name, {}):
+            ratio = '{:.2f}x'.format(result['relative']
+                                     / baseline[name]['relative'])
+        print('{:<22}{:>14,.0f}{:>10.1f}{:>10}'.format(
+            name, result['games_per_sec'], result['peak_mb'], ratio))
+
+    if arguments.save_baseline:
+        with open(arguments.baseline, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+        return 0
+
+    regressions = compare(results, baseline, arguments.tolerance)
+    for name, ratio in regressions.items():
+        print('Regression: {} at {:.2f}x of the baseline'.format(name, ratio))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
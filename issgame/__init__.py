@@ -1,5 +1,21 @@
-from issgame.gameline import GameLine, hand_score
+from issgame.gameline import GameLine, GameBatch, hand_score, GameDetails, validate_line
 from issgame.extract_svg_hands import extract_svg_hands
-from issgame.extract_sessions import extract_sessions
-from issgame.load_sessions import load_sessions
-from issgame.load_hands import load_hands
+from issgame.extract_sessions import extract_sessions, extract_all_sessions
+from issgame.load_sessions import load_sessions, load_session_store, SessionStore
+from issgame.load_hands import load_hands, load_hand_scores
+from issgame.cards import encode_hand, encode_hands, decode_hand, hand_score_array, hand_scores, suit_score_array
+from issgame.hand_distribution import ScoreDistribution, hand_score_distribution, load_hand_score_distribution
+from issgame.score_cache import ScoreCache
+from issgame.columnar import load_columnar
+from issgame.hand_index import HandIndex, query_hands
+from issgame.stats import distribution_moments, population_moments, session_tests
+from issgame.resample import NullDistributions
+from issgame.online_stats import OnlineStats, summarise
+from issgame.fairness import DealCounts, count_deals
+from issgame.duplicates import BloomFilter, DealIndex, find_duplicates
+from issgame.pipeline import Pipeline
+from issgame.synthetic import synthetic_lines, write_synthetic_games
+from issgame.quarantine import Quarantine
+from issgame.scorers import SCORERS, register_scorer, score_batch
+from issgame.streaks import streak_statistics, streak_tests
+from issgame.sessionize import sessionize
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compact encoding of sets of cards as 32-bit masks, one bit per card of the
+32-card skat deck, and vectorized scoring of encoded hands.
+
+Bit 8*suit + rank is set if the card is part of the hand, where suit counts
+D, H, S, C from 0 to 3 and rank counts 7, 8, 9, T, J, Q, K, A from 0 to 7.
+"""
+
+from typing import Iterable, Sequence
+
+import numpy
+
+SUITS = 'DHSC'
+RANKS = '789TJQKA'
+CARDS = tuple(suit + rank for suit in SUITS for rank in RANKS)
+CARD_BITS = {card: 1 << bit for bit, card in enumerate(CARDS)}
+
+SUIT_MASKS = {suit: 0xFF << (8*index) for index, suit in enumerate(SUITS)}
+JACKS = sum(CARD_BITS[suit + 'J'] for suit in SUITS)
+ACES = sum(CARD_BITS[suit + 'A'] for suit in SUITS)
+TENS = sum(CARD_BITS[suit + 'T'] for suit in SUITS)
+
+# problems found by deal_errors(), by error code
+DEAL_ERRORS = (None, 'deal_layout', 'unknown_card', 'repeated_card')
+
+# lookup tables from character code to suit or rank index, -1 if invalid
+_SUIT_INDEX = numpy.full(256, -1, dtype=numpy.int8)
+_SUIT_INDEX[numpy.frombuffer(SUITS.encode(), dtype=numpy.uint8)] =\
+    numpy.arange(len(SUITS))
+_RANK_INDEX = numpy.full(256, -1, dtype=numpy.int8)
+_RANK_INDEX[numpy.frombuffer(RANKS.encode(), dtype=numpy.uint8)] =\
+    numpy.arange(len(RANKS))
+
+_POPCOUNT_8 = numpy.array([bin(byte).count('1') for byte in range(256)],
+                          dtype=numpy.uint8)
+
+
+def _jack_bonus(jacks: int) -> float:
+    '''Stegen bonus for the jacks given as a 4-bit D, H, S, C pattern'''
+    diamonds, hearts, spades, clubs = [bool(jacks & 1 << i) for i in range(4)]
+    if clubs and spades:
+        if hearts:
+            if diamonds:
+                return 2
+            return 1.5
+        return 0.5
+    if spades and hearts and diamonds:
+        return 0.5
+    return 0.0
+
+
+_JACK_BONUS = numpy.array([_jack_bonus(jacks) for jacks in range(16)])
+
+# rounded grand scores for 0 to 12 jacks, aces, and tens, rounded in the same
+# way as hand_score() to keep both implementations identical
+_GRAND_SCORES = numpy.array([round((5/3)*count, 3) for count in range(13)])
+
+
+def encode_hand(hand: str) -> int:
+    '''
+    Encodes a hand as returned by GameLine.get_hand() as a card mask.
+
+    Args:
+        hand (str): Cards as two characters separated by underscores (or by
+        dots, as in the .svg files), e.g. 'HQ_HA_H7_CT_ST_SK_SA_HJ_CJ_CK'
+
+    Raises:
+        ValueError: If the hand contains an unknown card.
+
+    Returns:
+        int: The card mask of the hand.
+    '''
+    mask = 0
+    for card in hand.replace('.', '_').split('_'):
+        try:
+            mask |= CARD_BITS[card]
+        except KeyError:
+            raise ValueError('Unknown card: ' + repr(card)) from None
+    return mask
+
+
+def encode_hands(hands: Iterable[str]) -> numpy.ndarray:
+    '''
+    Encodes many hands of equal length at once as card masks.
+
+    Args:
+        hands (Iterable[str]): Hands as accepted by encode_hand().
+
+    Raises:
+        ValueError: If a hand contains an unknown card or the hands are not
+        all of the same length.
+
+    Returns:
+        numpy.ndarray: A uint32 card mask per hand.
+    '''
+    hands = numpy.asarray(list(hands), dtype=bytes)
+    if hands.size == 0:
+        return numpy.zeros(0, dtype=numpy.uint32)
+    width = hands.dtype.itemsize
+    if (numpy.char.str_len(hands) != width).any() or width % 3 != 2:
+        raise ValueError('Hands must have the same number of cards')
+
+    chars = hands.view(numpy.uint8).reshape(len(hands), width)
+    suits = _SUIT_INDEX[chars[:, 0::3]]
+    ranks = _RANK_INDEX[chars[:, 1::3]]
+    if (suits < 0).any() or (ranks < 0).any():
+        raise ValueError('Hands contain unknown cards')
+
+    bits = numpy.left_shift(numpy.uint32(1),
+                            (8*suits + ranks).astype(numpy.uint32))
+    return numpy.bitwise_or.reduce(bits, axis=1).astype(numpy.uint32)
+
+
+def card_indices(hands: Iterable[str]) -> numpy.ndarray:
+    '''
+    Converts hands of equal length, e.g. the deals of GameLine.get_deal(),
+    into the index 8*suit + rank of each card in order.
+
+    Args:
+        hands (Iterable[str]): Hands as accepted by encode_hand().
+
+    Raises:
+        ValueError: If the hands are not all of the same length.
+
+    Returns:
+        numpy.ndarray: An int8 array of one row per hand and one column per
+        card, -1 for unknown cards.
+    '''
+    hands = numpy.asarray(list(hands), dtype=bytes)
+    if hands.size == 0:
+        return numpy.zeros((0, 0), dtype=numpy.int8)
+    width = hands.dtype.itemsize
+    if (numpy.char.str_len(hands) != width).any() or width % 3 != 2:
+        raise ValueError('Hands must have the same number of cards')
+
+    chars = hands.view(numpy.uint8).reshape(len(hands), width)
+    suits = _SUIT_INDEX[chars[:, 0::3]]
+    ranks = _RANK_INDEX[chars[:, 1::3]]
+    return numpy.where((suits < 0) | (ranks < 0), -1, 8*suits + ranks)\
+        .astype(numpy.int8)
+
+
+def deal_errors(deals: Sequence[str]) -> numpy.ndarray:
+    '''
+    Checks many deals as in the MV tag, 32 cards separated by dots, at once.
+
+    Args:
+        deals (Sequence[str]): The 95 characters of each deal.
+
+    Returns:
+        numpy.ndarray: An int8 code per deal indexing DEAL_ERRORS: 0 if the
+        deal is valid, 1 if it is not 32 cards separated by dots, 2 if it
+        contains an unknown card, and 3 if a card is dealt twice.
+    '''
+    try:
+        deals = numpy.array(deals, dtype='S95').reshape(-1)
+    except UnicodeEncodeError:
+        deals = numpy.array([deal.encode('ascii', 'replace') for deal in deals],
+                            dtype='S95').reshape(-1)
+    errors = numpy.zeros(len(deals), dtype=numpy.int8)
+    chars = deals.view(numpy.uint8).reshape(len(deals), 95)
+    layout = (numpy.char.str_len(deals) != 95)\
+        | (chars[:, 2::3] != ord('.')).any(axis=1)
+    suits = _SUIT_INDEX[chars[:, 0::3]]
+    ranks = _RANK_INDEX[chars[:, 1::3]]
+    unknown = (suits < 0).any(axis=1) | (ranks < 0).any(axis=1)
+    # 32 distinct cards set 32 bits of the card mask
+    bits = numpy.left_shift(numpy.uint32(1),
+                            numpy.where(unknown[:, numpy.newaxis], 0,
+                                        8*suits + ranks).astype(numpy.uint32))
+    repeated = popcount(numpy.bitwise_or.reduce(bits, axis=1)) != len(CARDS)
+    errors[repeated] = 3
+    errors[unknown] = 2
+    errors[layout] = 1
+    return errors
+
+
+def decode_hand(mask: int) -> str:
+    '''
+    Decodes a card mask into a hand string ordered by suit and rank.
+
+    Args:
+        mask (int): A card mask as returned by encode_hand()
+
+    Returns:
+        str: Cards as two characters separated by underscores.
+    '''
+    mask = int(mask)
+    return '_'.join(card for bit, card in enumerate(CARDS) if mask >> bit & 1)
+
+
+def popcount(masks: numpy.ndarray) -> numpy.ndarray:
+    '''Returns the number of cards in each of the uint32 card masks'''
+    masks = numpy.ascontiguousarray(masks, dtype=numpy.uint32)
+    counts = _POPCOUNT_8[masks.view(numpy.uint8)]
+    return counts.reshape(masks.shape + (4,)).sum(axis=-1, dtype=numpy.int64)
+
+
+def _jack_patterns(masks: numpy.ndarray) -> numpy.ndarray:
+    '''Returns the jacks of each card mask as a 4-bit D, H, S, C pattern'''
+    jack_pattern = numpy.zeros(masks.shape, dtype=numpy.intp)
+    for index, suit in enumerate(SUITS):
+        jack_bit = CARD_BITS[suit + 'J'].bit_length() - 1
+        jack_pattern |= ((masks >> jack_bit) & 1).astype(numpy.intp) << index
+    return jack_pattern
+
+
+def hand_score_array(masks: numpy.ndarray) -> numpy.ndarray:
+    '''
+    Calculates the score of hand_score() for many card masks at once.
+
+    Args:
+        masks (numpy.ndarray): uint32 card masks as returned by encode_hands()
+
+    Returns:
+        numpy.ndarray: A float64 score for each hand, identical to the result
+        of hand_score() for the same hand.
+    '''
+    masks = numpy.asarray(masks, dtype=numpy.uint32)
+
+    jacks = popcount(masks & JACKS)
+    aces_tens = popcount(masks & (ACES | TENS))
+
+    suit_counts = numpy.stack([popcount(masks & (SUIT_MASKS[suit] & ~JACKS))
+                               for suit in SUITS])
+    suit_score = suit_counts.max(axis=0) + 2*jacks + aces_tens
+    suits_not_found = (suit_counts == 0).sum(axis=0)
+
+    score = suit_score + _JACK_BONUS[_jack_patterns(masks)]\
+        + suits_not_found/2
+    return numpy.maximum(score, _GRAND_SCORES[jacks + aces_tens])
+
+
+def suit_score_array(masks: numpy.ndarray) -> numpy.ndarray:
+    '''
+    Calculates the Stegen score of many card masks for each game type, the
+    four suit games in the order of SUITS followed by the grand.
+
+    Args:
+        masks (numpy.ndarray): uint32 card masks as returned by encode_hands()
+
+    Returns:
+        numpy.ndarray: A float64 array of one row per hand and five columns,
+        whose maximum is the score of hand_score_array().
+    '''
+    masks = numpy.asarray(masks, dtype=numpy.uint32)
+
+    jacks = popcount(masks & JACKS)
+    aces_tens = popcount(masks & (ACES | TENS))
+
+    suit_counts = numpy.stack([popcount(masks & (SUIT_MASKS[suit] & ~JACKS))
+                               for suit in SUITS], axis=-1)
+    suits_not_found = (suit_counts == 0).sum(axis=-1)
+
+    common = 2*jacks + aces_tens + _JACK_BONUS[_jack_patterns(masks)]\
+        + suits_not_found/2
+    return numpy.concatenate([suit_counts + common[..., numpy.newaxis],
+                              _GRAND_SCORES[jacks + aces_tens, numpy.newaxis]],
+                             axis=-1)
+
+
+def hand_scores(hands: Iterable[str]) -> numpy.ndarray:
+    '''
+    Convenience function that encodes 'hands' and scores them with
+    hand_score_array().
+
+    Args:
+        hands (Iterable[str]): Hands as accepted by encode_hand().
+
+    Returns:
+        numpy.ndarray: A float64 score for each hand.
+    '''
+    return hand_score_array(encode_hands(hands))
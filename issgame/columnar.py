@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Columnar storage of extracted hands as a directory of .npy arrays, one row
+per player and game as in the .tsv output of extract_svg_hands:
+
+    hand.npy        uint32 card mask (see issgame.cards)
+    position.npy    int8 player position 1 to 3
+    player.npy      int32 index into player.txt
+    session.npy     int32 index into session.txt
+    game.npy        int32 index into id.txt, one id per game
+
+Score columns of issgame.scorers are stored as float64 <column>.npy arrays
+and listed in scores.txt.
+
+The arrays are loaded with memory mapping, so a full dataset is available
+without parsing text. Hands are stored as card masks, so the order of the
+cards within a hand is not kept.
+"""
+
+import os
+import shutil
+from typing import List
+
+import numpy
+import pandas
+
+from issgame.cards import decode_hand, encode_hands
+from issgame.gameline import GameBatch
+
+DTYPES = {
+    'hand': numpy.uint32,
+    'position': numpy.int8,
+    'player': numpy.int32,
+    'session': numpy.int32,
+    'game': numpy.int32,
+}
+DICTIONARIES = {'player': 'player.txt', 'session': 'session.txt',
+                'game': 'id.txt'}
+SCORE_DTYPE = numpy.float64
+SCORES = 'scores.txt'
+
+
+def is_columnar(path: str) -> bool:
+    '''Returns True if 'path' is a columnar hands directory'''
+    return os.path.isfile(os.path.join(path, 'hand.npy'))
+
+
+class ColumnarWriter():
+    """
+    Writes GameBatch objects to a columnar hands directory. Column data is
+    appended to raw files while writing and only turned into .npy files by
+    close(), so memory use does not grow with the number of games beyond
+    the player and session dictionaries.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Initiates a ColumnarWriter, replacing the contents of 'directory' if
+        it is a columnar hands directory, also one left by an interrupted
+        run.
+
+        Args:
+            directory (str): Output directory.
+
+        Raises:
+            FileExistsError: If 'directory' exists, is not empty, and is not
+            a columnar hands directory.
+        """
+        self.directory = directory
+        if os.path.isdir(directory) and os.listdir(directory):
+            if not is_columnar(directory) and not os.path.isfile(
+                    self._path('hand.raw')):
+                raise FileExistsError(
+                    'Not a columnar hands directory: ' + repr(directory))
+            shutil.rmtree(directory)
+        os.makedirs(directory, exist_ok=True)
+        self.rows = 0
+        self._games = 0
+        self._codes = {'player': {}, 'session': {}}
+        self._raw = {column: open(self._path(column) + '.raw', 'wb')
+                     for column in DTYPES}
+        self._scores: List[str] = []
+        self._ids = open(self._path('id.txt'), 'w')
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _encode(self, column: str, values: List[str]) -> numpy.ndarray:
+        '''Dictionary encodes 'values', adding unknown values to the column'''
+        codes = self._codes[column]
+        return numpy.fromiter(
+            (codes.setdefault(value, len(codes)) for value in values),
+            dtype=DTYPES[column], count=len(values))
+
+    def write(self, batch: GameBatch) -> None:
+        '''Appends the rows of 'batch' to the columns'''
+        columns = batch.columns()
+        rows = len(batch)
+        if rows == 0:
+            return
+
+        # rows of one game are consecutive, a new game starts at each new id
+        ids = columns['id']
+        starts = [row for row in range(rows)
+                  if row == 0 or ids[row] != ids[row - 1]]
+        game = numpy.zeros(rows, dtype=DTYPES['game'])
+        game[starts] = 1
+        game = numpy.cumsum(game, dtype=DTYPES['game']) + (self._games - 1)
+        self._ids.writelines(ids[row] + '\n' for row in starts)
+        self._games += len(starts)
+
+        arrays = {
+            'hand': encode_hands(columns['hand']),
+            'position': numpy.asarray(columns['position'],
+                                      dtype=DTYPES['position']),
+            'player': self._encode('player', columns['player']),
+            'session': self._encode('session', columns['session']),
+            'game': game,
+        }
+        for column, array in arrays.items():
+            self._raw[column].write(array.astype(DTYPES[column]).tobytes())
+        if list(batch.scores) != self._scores:
+            if self.rows:
+                raise ValueError('Every batch must have the same scores')
+            self._scores = list(batch.scores)
+            for column in self._scores:
+                self._raw[column] = open(self._path(column) + '.raw', 'wb')
+        for column in self._scores:
+            self._raw[column].write(numpy.asarray(
+                batch.scores[column], dtype=SCORE_DTYPE).tobytes())
+        self.rows += rows
+
+    def close(self) -> None:
+        '''Writes the .npy files and the player and session dictionaries'''
+        self._ids.close()
+        for column, raw in self._raw.items():
+            raw.close()
+            with open(self._path(column + '.npy'), 'wb') as npy_file:
+                numpy.lib.format.write_array_header_1_0(npy_file, {
+                    'descr': numpy.lib.format.dtype_to_descr(
+                        numpy.dtype(DTYPES.get(column, SCORE_DTYPE))),
+                    'fortran_order': False,
+                    'shape': (self.rows,),
+                })
+                with open(raw.name, 'rb') as raw_file:
+                    shutil.copyfileobj(raw_file, npy_file)
+            os.remove(raw.name)
+        for column in ('player', 'session'):
+            with open(self._path(DICTIONARIES[column]), 'w') as values:
+                values.writelines(value + '\n' for value in self._codes[column])
+        if self._scores:
+            with open(self._path(SCORES), 'w') as scores:
+                scores.writelines(column + '\n' for column in self._scores)
+
+    def __enter__(self) -> 'ColumnarWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class ColumnarHands():
+    """
+    The columns of a columnar hands directory. The code arrays are memory
+    mapped; the dictionaries map codes back to players, sessions, and ids.
+    Score columns are in 'scores'.
+    """
+
+    def __init__(self, directory: str, mmap: bool = True):
+        """
+        Initiates ColumnarHands by loading the arrays in 'directory'.
+
+        Args:
+            directory (str): A directory written by ColumnarWriter.
+            mmap (bool, optional): Memory map the arrays. Defaults to True.
+        """
+        mmap_mode = 'r' if mmap else None
+        for column in DTYPES:
+            setattr(self, column, numpy.load(
+                os.path.join(directory, column + '.npy'), mmap_mode=mmap_mode))
+        self.dictionaries = {}
+        for column, filename in DICTIONARIES.items():
+            with open(os.path.join(directory, filename)) as values:
+                self.dictionaries[column] = values.read().splitlines()
+        self.scores = {}
+        if os.path.isfile(os.path.join(directory, SCORES)):
+            with open(os.path.join(directory, SCORES)) as scores:
+                for column in scores.read().splitlines():
+                    self.scores[column] = numpy.load(
+                        os.path.join(directory, column + '.npy'),
+                        mmap_mode=mmap_mode)
+
+    def __len__(self) -> int:
+        return len(self.hand)
+
+    @property
+    def players(self) -> List[str]:
+        return self.dictionaries['player']
+
+    @property
+    def sessions(self) -> List[str]:
+        return self.dictionaries['session']
+
+    @property
+    def ids(self) -> List[str]:
+        return self.dictionaries['game']
+
+    def code(self, column: str, value: str) -> int:
+        '''Returns the code of 'value' in 'column', -1 if it does not occur'''
+        try:
+            return self.dictionaries[column].index(value)
+        except ValueError:
+            return -1
+
+    def decoded(self, column: str, rows=slice(None)) -> numpy.ndarray:
+        '''Returns the values of a dictionary encoded column'''
+        values = numpy.asarray(self.dictionaries[column], dtype=object)
+        return values[getattr(self, column)[rows]]
+
+    def to_frame(self) -> pandas.DataFrame:
+        '''
+        Provides the columns as a DataFrame like the .tsv output. Hands are
+        listed in suit and rank order.
+        '''
+        frame = pandas.DataFrame({
+            'id': self.decoded('game'),
+            'session': self.decoded('session'),
+            'player': self.decoded('player'),
+            'position': numpy.asarray(self.position, dtype=numpy.int64),
+            'hand': [decode_hand(mask) for mask in self.hand.tolist()],
+        })
+        for column, values in self.scores.items():
+            frame[column] = numpy.asarray(values)
+        return frame
+
+
+def load_columnar(directory: str, mmap: bool = True) -> ColumnarHands:
+    '''
+    Loads a columnar hands directory written by extract_svg_hands.
+
+    Args:
+        directory (str): The directory.
+        mmap (bool, optional): Memory map the arrays. Defaults to True.
+
+    Returns:
+        ColumnarHands: The columns and dictionaries.
+    '''
+    return ColumnarHands(directory, mmap)
+
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Detection of repeated deals and hands in a single pass over the games.
+
+A deal is encoded canonically as the card masks of the three players (the
+skat holds the remaining cards), so the order in which the cards of a hand
+are listed does not matter. Deals are looked up in a hash index keyed on the
+masks instead of being compared with each other:
+
+- 'exact': the same deal as an earlier game
+- 'same_game': the same deal and game id, e.g. from overlapping dumps
+- 'seat_permuted': the same three hands and skat dealt to other players
+
+The index holds one entry per deal and 4 bytes per hand. With a BloomFilter
+only deals that may have been seen before are kept, which needs a fraction
+of the memory but cannot name the first game of a repeated deal and reports
+false positives at the rate the filter was built for.
+"""
+
+import array
+import itertools
+import math
+from typing import Iterable, List, Optional, Tuple, Union
+
+import numpy
+import pandas
+
+from issgame.cards import CARDS, card_indices
+from issgame.shards import CHUNKSIZE, Shard, read_lines
+from issgame.gameline import GameLine
+
+# number of different hands of 10 cards and of different deals
+HANDS = math.comb(32, 10)
+DEALS = math.factorial(32)//(math.factorial(10)**3*math.factorial(2))
+
+_MIX_1 = numpy.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = numpy.uint64(0x94D049BB133111EB)
+_SALT = numpy.uint64(0x9E3779B97F4A7C15)
+
+
+def _mix(values: numpy.ndarray) -> numpy.ndarray:
+    '''splitmix64 finaliser, a fast well distributed 64-bit hash'''
+    values = values ^ (values >> numpy.uint64(30))
+    values = values*_MIX_1
+    values = values ^ (values >> numpy.uint64(27))
+    values = values*_MIX_2
+    return values ^ (values >> numpy.uint64(31))
+
+
+def expected_repeats(items: int, outcomes: int) -> float:
+    '''
+    Returns the expected number of items equal to an earlier item among
+    'items' drawn from 'outcomes' equally likely outcomes, e.g. HANDS or
+    DEALS.
+    '''
+    # items less the expected number of different outcomes drawn
+    return items + outcomes*math.expm1(items*math.log1p(-1/outcomes))
+
+
+class BloomFilter():
+    """
+    Set membership of 96-bit keys in a fixed size bit array. A key that was
+    added is always found; a key that was not is found with a small false
+    positive rate.
+    """
+
+    def __init__(self, bits: int, hashes: int = 7):
+        """
+        Initiates an empty BloomFilter.
+
+        Args:
+            bits (int): Size of the bit array.
+            hashes (int, optional): Number of bits set per key.
+        """
+        self.bits = bits
+        self.hashes = hashes
+        self._array = numpy.zeros(-(-bits//8), dtype=numpy.uint8)
+
+    @classmethod
+    def for_capacity(cls, items: int, error_rate: float = 0.001
+                     ) -> 'BloomFilter':
+        '''Returns a filter sized for 'items' keys at 'error_rate' '''
+        bits = math.ceil(-items*math.log(error_rate)/math.log(2)**2)
+        hashes = max(1, round(bits/items*math.log(2)))
+        return cls(bits, hashes)
+
+    def _positions(self, keys: numpy.ndarray) -> numpy.ndarray:
+        '''Returns the bit positions of the (n, 2) uint64 'keys' '''
+        first = _mix(keys[:, 0] ^ _mix(keys[:, 1]))
+        second = _mix(first ^ keys[:, 1]) | numpy.uint64(1)
+        steps = numpy.arange(self.hashes, dtype=numpy.uint64)
+        with numpy.errstate(over='ignore'):
+            hashes = first[:, None] + steps*second[:, None]
+        return hashes % numpy.uint64(self.bits)
+
+    def add(self, keys: numpy.ndarray) -> numpy.ndarray:
+        '''
+        Adds keys in order.
+
+        Args:
+            keys (numpy.ndarray): (n, 2) uint64 keys.
+
+        Returns:
+            numpy.ndarray: For each key whether it may have been added
+            before, including by an earlier key of 'keys'.
+        '''
+        keys = numpy.ascontiguousarray(keys, dtype=numpy.uint64)
+        __unique, first = numpy.unique(keys, axis=0, return_index=True)
+        seen = numpy.ones(len(keys), dtype=bool)
+        positions = self._positions(keys[first]).astype(numpy.int64)
+        bits = (self._array[positions >> 3] >> (positions & 7)) & 1
+        seen[first] = bits.all(axis=1)
+        numpy.bitwise_or.at(self._array, positions.ravel() >> 3,
+                            (1 << (positions.ravel() & 7)).astype(numpy.uint8))
+        return seen
+
+
+class DealIndex():
+    """
+    Hash index of the deals and hands of all added games, reporting repeated
+    deals as they are added.
+    """
+
+    def __init__(self, bloom: Optional[BloomFilter] = None):
+        """
+        Initiates an empty DealIndex.
+
+        Args:
+            bloom (BloomFilter, optional): Only index deals this filter has
+                possibly seen before. Defaults to None, indexing every deal.
+        """
+        self.bloom = bloom
+        self.games = 0
+        self.same_games = 0
+        self.invalid = 0
+        self._deals = {}
+        self._permuted = {}
+        self._hands = array.array('I')
+        self._duplicates: List[Tuple[str, str, Optional[str]]] = []
+
+    @staticmethod
+    def deal_masks(games: Iterable[Union[str, GameLine]]
+                   ) -> Tuple[List[str], numpy.ndarray]:
+        '''
+        Returns the ids and an (n, 3) uint32 array of the card masks of
+        players 1 to 3 of the games of 'games' that are valid deals of 32
+        distinct cards.
+        '''
+        ids = []
+        deals = []
+        for game in games:
+            if not isinstance(game, GameLine):
+                try:
+                    game = GameLine(game)
+                except ValueError:
+                    continue
+            if len(game.get_deal()) == 3*len(CARDS) - 1:
+                ids.append(game.get_id())
+                deals.append(game.get_deal())
+        if not ids:
+            return ids, numpy.zeros((0, 3), dtype=numpy.uint32)
+
+        cards = card_indices(deals)
+        ordered = numpy.sort(cards, axis=1)
+        valid = (ordered[:, 0] >= 0)\
+            & (numpy.diff(ordered, axis=1) > 0).all(axis=1)
+        bits = numpy.left_shift(numpy.uint32(1),
+                                cards[valid, :30].astype(numpy.uint32))
+        masks = numpy.bitwise_or.reduce(bits.reshape(-1, 3, 10), axis=2)
+        return list(itertools.compress(ids, valid)), masks
+
+    @staticmethod
+    def _keys(masks: numpy.ndarray) -> numpy.ndarray:
+        '''Packs the masks of the players into (n, 2) uint64 keys'''
+        masks = masks.astype(numpy.uint64)
+        return numpy.column_stack([
+            masks[:, 0] | masks[:, 1] << numpy.uint64(32), masks[:, 2]])
+
+    def add_games(self, games: Iterable[Union[str, GameLine]]
+                  ) -> numpy.ndarray:
+        '''
+        Adds the deals of .svg lines or GameLine objects and records the
+        repeated ones. Lines that are not valid games or deals are counted
+        in 'invalid', games added before with the same id in 'same_games'.
+
+        Returns:
+            numpy.ndarray: For each valid game whether its deal is new, e.g.
+            to drop games repeated in overlapping dumps.
+        '''
+        games = list(games)
+        ids, masks = self.deal_masks(games)
+        self.invalid += len(games) - len(ids)
+        self.games += len(ids)
+
+        new = numpy.ones(len(ids), dtype=bool)
+        same_game = numpy.zeros(len(ids), dtype=bool)
+        exact = self._keys(masks)
+        permuted = self._keys(numpy.sort(masks, axis=1))
+        if self.bloom is None:
+            exact_seen = permuted_seen = numpy.ones(len(ids), dtype=bool)
+        else:
+            # permuted keys are salted to keep them apart from exact keys
+            seen = self.bloom.add(numpy.concatenate([exact,
+                                                     permuted ^ _SALT]))
+            exact_seen, permuted_seen = seen[:len(ids)], seen[len(ids):]
+
+        for row in numpy.flatnonzero(exact_seen | permuted_seen).tolist():
+            game_id = ids[row]
+            # single ints take less memory than tuples as dict keys
+            low, high = exact[row].tolist()
+            exact_key = low | high << 64
+            low, high = permuted[row].tolist()
+            permuted_key = low | high << 64
+            if exact_key in self._deals:
+                first = self._deals[exact_key]
+                kind = 'same_game' if first == game_id else 'exact'
+            elif self.bloom is not None and exact_seen[row]:
+                first, kind = None, 'exact'
+            elif permuted_key in self._permuted:
+                first, kind = self._permuted[permuted_key], 'seat_permuted'
+            elif self.bloom is not None and permuted_seen[row]:
+                first, kind = None, 'seat_permuted'
+            else:
+                first, kind = None, None
+            if kind is not None:
+                self._duplicates.append((kind, game_id, first))
+                new[row] = kind == 'seat_permuted'
+                same_game[row] = kind == 'same_game'
+            self._deals.setdefault(exact_key, game_id)
+            self._permuted.setdefault(permuted_key, game_id)
+
+        # the hands of a game added again were not dealt again
+        self.same_games += int(same_game.sum())
+        self._hands.extend(masks[~same_game].ravel().tolist())
+        return new
+
+    def duplicates(self) -> pandas.DataFrame:
+        '''
+        Returns the repeated deals found so far with their 'kind', game 'id',
+        and the id of the game first dealt the same cards ('first_id'),
+        which is missing where a BloomFilter does not know that game.
+        '''
+        return pandas.DataFrame(self._duplicates,
+                                columns=['kind', 'id', 'first_id'])
+
+    def summary(self) -> pandas.DataFrame:
+        '''
+        Compares the number of repeated hands and deals with the number
+        expected if every hand and deal is equally likely.
+
+        Games added again with the same id, e.g. from overlapping dumps,
+        were dealt once and are left out of the hands and deals. They are
+        counted in their own 'same_game' row, which no random dealing
+        explains.
+
+        Returns:
+            pandas.DataFrame: For 'hand', 'deal', and 'same_game' the number
+            of 'items', 'repeats' (items equal to an earlier item), and
+            'expected_repeats'.
+        '''
+        hands = numpy.frombuffer(self._hands, dtype=numpy.uint32)
+        hand_repeats = len(hands) - len(numpy.unique(hands))
+        deals = self.games - self.same_games
+        deal_repeats = int((self.duplicates()['kind'] == 'exact').sum())
+        return pandas.DataFrame({
+            'items': [len(hands), deals, self.games],
+            'repeats': [hand_repeats, deal_repeats, self.same_games],
+            'expected_repeats': [expected_repeats(len(hands), HANDS),
+                                 expected_repeats(deals, DEALS), 0.0],
+        }, index=pandas.Index(['hand', 'deal', 'same_game']))
+
+
+def find_duplicates(raw_files: List[str],
+                    chunksize: int = CHUNKSIZE,
+                    bloom: Optional[BloomFilter] = None
+                    ) -> DealIndex:
+    '''
+    Reads raw game files once and indexes the deals of all games in order.
+
+    Args:
+        raw_files (List[str]): Input filename strings (.sgv ISS game files).
+        chunksize (int, optional): Number of games added at once.
+        bloom (BloomFilter, optional): See DealIndex.
+
+    Returns:
+        DealIndex: The index, see DealIndex.duplicates() and summary().
+    '''
+    index = DealIndex(bloom)
+    for raw_file in raw_files:
+        lines = read_lines(Shard(raw_file, 0, None))
+        while True:
+            chunk = list(itertools.islice(lines, chunksize))
+            if not chunk:
+                break
+            index.add_games(chunk)
+    return index
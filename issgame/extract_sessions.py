@@ -1,35 +1,143 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import os
+
+import numpy
 import pandas
-import issgame
+from issgame.cards import encode_hands, hand_score_array
+from issgame.columnar import is_columnar, load_columnar
+from issgame.sessionize import sessionize
 
 
-def extract_sessions(filename, player_name):
-    player_hands = {}
+def _score_hands(hands, cache):
+    '''Scores .tsv hands through 'cache', or in bulk if it is None'''
+    if cache is not None:
+        return cache.score_many(hands)
+    return hand_score_array(encode_hands(hands))
+
+
+def _player_scores(filename, player_name, cache):
+    '''Returns the sessions and scores of the hands of player_name in order'''
+    if is_columnar(filename):
+        columns = load_columnar(filename)
+        rows = numpy.flatnonzero(
+            columns.player == columns.code('player', player_name))
+        return (columns.decoded('session', rows),
+                hand_score_array(columns.hand[rows]))
 
     games = pandas.read_csv(filename, sep='\t')
-    # TODO: should not be calculated here and in load_hands
-    games.loc[:, 'score'] =\
-        [issgame.hand_score(hand) for hand in games.loc[:, 'hand']]
+    games.loc[:, 'score'] = _score_hands(games.loc[:, 'hand'], cache)
 
+    sessions = []
+    scores = []
     for __i, line in games.iterrows():
         if player_name == line.loc['player']:
-            session = line.loc['session']
-            player = line.loc['player']
-            score = line.loc['score']
+            sessions.append(line.loc['session'])
+            scores.append(line.loc['score'])
+    return sessions, scores
+
+
+def _out_filename(filename, suffix):
+    '''Returns the name of a session file derived from 'filename' '''
+    if is_columnar(filename):
+        return filename.rstrip(os.sep) + '_' + suffix + '.csv'
+    return filename[:-4] + '_' + suffix + '.csv'
 
-            if session not in player_hands.keys():
-                player_hands[session] = []
-            player_hands[session].append(score)
+
+def _all_scores(filename, cache):
+    '''
+    Returns the player, session, score, and id columns of all hands. Hands
+    are only scored if the file has no 'stegen' column, see the 'scorers'
+    argument of extract_svg_hands.
+    '''
+    if is_columnar(filename):
+        columns = load_columnar(filename)
+        scores = columns.scores.get('stegen')
+        if scores is None:
+            scores = hand_score_array(columns.hand)
+        return (columns.decoded('player'), columns.decoded('session'),
+                numpy.asarray(scores, dtype=numpy.float64),
+                columns.decoded('game'))
+
+    games = pandas.read_csv(filename, sep='\t')
+    if 'stegen' in games.columns:
+        scores = games['stegen'].to_numpy(dtype=numpy.float64)
+    else:
+        scores = _score_hands(games['hand'], cache)
+    return (games['player'].to_numpy(), games['session'].to_numpy(), scores,
+            games['id'].to_numpy())
+
+
+def extract_sessions(filename, player_name, cache=None):
+    player_hands = {}
+
+    for session, score in zip(*_player_scores(filename, player_name, cache)):
+        if session not in player_hands.keys():
+            player_hands[session] = []
+        player_hands[session].append(score)
 
     out_lines = []
     for session in player_hands.keys():
-        out_string = player + ',' + session
+        out_string = player_name + ',' + session
         for score in player_hands[session]:
             out_string += ',' + str(score)
         out_string += '\n'
         out_lines.append(out_string)
 
-    with open(filename[:-4] + '_' + player_name + '.csv', 'w') as out_file:
+    with open(_out_filename(filename, player_name), 'w') as out_file:
+        out_file.writelines(out_lines)
+
+
+def extract_all_sessions(filename, cache=None, gap=None):
+    '''
+    Writes the scores of all players and sessions in one pass to a single
+    file <filename>_sessions.csv that load_sessions() can read. Each line
+    holds a player, a session, and the scores of the player's hands in that
+    session, in the format of extract_sessions(). The sessions of a player
+    are on consecutive lines.
+
+    Args:
+        filename (str): A .tsv file or columnar directory written by
+            extract_svg_hands. A 'stegen' score column written with the
+            'stegen' scorer is used instead of scoring the hands again.
+        cache (ScoreCache, optional): Score .tsv hands through this cache.
+            Defaults to None, scoring with hand_score_array().
+        gap (float, optional): Split sessions at idle gaps of more than
+            'gap' seconds with sessionize() instead of by date. Sessions are
+            then written as integer ids, and the mapping table of
+            sessionize() to <filename>_session_keys.csv. Defaults to None.
+    '''
+    players, sessions, scores, ids = _all_scores(filename, cache)
+    if gap is not None:
+        sessions, mapping = sessionize(
+            pandas.DataFrame({'id': ids, 'session': sessions}), gap)
+        mapping.to_csv(_out_filename(filename, 'session_keys'), index=False)
+
+    # one group per player and session, numbered in order of appearance
+    player_codes, __players = pandas.factorize(players)
+    session_codes, __sessions = pandas.factorize(sessions)
+    group_codes, groups = pandas.factorize(
+        player_codes.astype(numpy.int64)*(session_codes.max(initial=0) + 1)
+        + session_codes)
+
+    # keep players, their sessions, and the hands in order of appearance
+    first_rows = numpy.full(len(groups), len(group_codes))
+    numpy.minimum.at(first_rows, group_codes, numpy.arange(len(group_codes)))
+    group_order = numpy.lexsort((first_rows, player_codes[first_rows]))
+    group_rank = numpy.empty_like(group_order)
+    group_rank[group_order] = numpy.arange(len(group_order))
+    rows = numpy.argsort(group_rank[group_codes], kind='stable')
+
+    starts = numpy.flatnonzero(numpy.diff(group_rank[group_codes][rows],
+                                          prepend=-1))
+    score_strings = numpy.split(scores[rows].astype(str), starts[1:])
+
+    out_lines = []
+    for start, group_scores in zip(starts, score_strings):
+        row = rows[start]
+        out_lines.append(','.join([players[row], str(sessions[row])]
+                                  + group_scores.tolist()) + '\n')
+
+    with open(_out_filename(filename, 'sessions'), 'w') as out_file:
         out_file.writelines(out_lines)
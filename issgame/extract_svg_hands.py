@@ -1,15 +1,171 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import pandas as pd
+import contextlib
+import functools
+import itertools
 import os
+from typing import Iterable, List, Optional, Sequence, TextIO
+
+import numpy
+
 import issgame
-from typing import List
+from issgame.cards import encode_hands, hand_score_array
+from issgame.columnar import ColumnarWriter
+from issgame.hand_index import HandIndexBuilder
+from issgame.manifest import Manifest
+from issgame.pipeline import Pipeline, Stage
+from issgame.quarantine import Quarantine
+from issgame.scorers import score_columns
+from issgame.shards import CHUNKSIZE, SHARDSIZE, Shard, file_shards, \
+    parse_chunk, parsed_shards, read_blocks, split_block
+
+class _TsvOutput():
+    """
+    Writes batches to a .tsv output file. With a manifest, games it has seen
+    are left out and a checkpoint is recorded after each shard.
+    """
+
+    def __init__(self, out_file: TextIO, manifest: Optional[Manifest],
+                 index_builder: Optional[HandIndexBuilder],
+                 stats: Optional['issgame.OnlineStats'],
+                 quarantine: Optional[Quarantine],
+                 columns: Sequence[str] = ()):
+        self.out_file = out_file
+        self.columns = columns
+        self.manifest = manifest
+        self.index_builder = index_builder
+        self.stats = stats
+        self.quarantine = quarantine
+        self.written = 0 if manifest is None else manifest.output_size
+        self.include_header_line = self.written == 0
+        self.game_ids = []
+
+    def write(self, batch: issgame.GameBatch,
+              scores: Optional[numpy.ndarray] = None) -> None:
+        '''Writes the games of 'batch' not written before'''
+        if self.quarantine is not None:
+            self.quarantine.add(batch.rejected)
+        if len(batch) == 0:
+            return
+        if self.manifest is not None:
+            batch_ids = batch.game_ids()
+            new_games = ~self.manifest.seen(batch_ids)
+            if not new_games.all():
+                batch = batch.select_games(new_games)
+                batch_ids = list(itertools.compress(batch_ids, new_games))
+                if scores is not None:
+                    scores = scores[numpy.repeat(new_games, 3)]
+            self.game_ids.extend(batch_ids)
+        text = batch.to_frame().to_csv(
+            index=False,
+            header=self.include_header_line,
+            sep="\t",
+        )
+        self.out_file.write(text)
+        self.include_header_line = False
+        if self.stats is not None:
+            self.stats.add_batch(batch, scores)
+        if self.index_builder is not None:
+            self.index_builder.add_batch(batch, text, self.written)
+            self.written += len(text.encode())
+
+    def end_shard(self, shard: Shard) -> None:
+        '''Records that all lines of 'shard' are written'''
+        if self.manifest is None:
+            return
+        self.out_file.flush()
+        complete = shard.end is None\
+            or shard.end >= os.path.getsize(shard.filename)
+        self.manifest.checkpoint(shard.filename, shard.end or 0, complete,
+                                 self.game_ids)
+        self.game_ids = []
+
+    def close(self) -> None:
+        if self.include_header_line:
+            # no games, write the header only
+            batch = issgame.GameBatch()
+            batch.scores = {column: numpy.zeros(0) for column in self.columns}
+            batch.to_frame().to_csv(self.out_file, index=False, sep="\t")
+
+
+class _ColumnarOutput():
+    """Writes batches to a ColumnarWriter"""
+
+    def __init__(self, writer: ColumnarWriter,
+                 index_builder: Optional[HandIndexBuilder],
+                 stats: Optional['issgame.OnlineStats'],
+                 quarantine: Optional[Quarantine]):
+        self.writer = writer
+        self.index_builder = index_builder
+        self.stats = stats
+        self.quarantine = quarantine
+
+    def write(self, batch: issgame.GameBatch,
+              scores: Optional[numpy.ndarray] = None) -> None:
+        if self.quarantine is not None:
+            self.quarantine.add(batch.rejected)
+        if len(batch) == 0:
+            return
+        self.writer.write(batch)
+        if self.stats is not None:
+            self.stats.add_batch(batch, scores)
+        if self.index_builder is not None:
+            self.index_builder.add_batch(batch)
+
+    def end_shard(self, shard: Shard) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def _write_pipelined(shards: Iterable[Shard], output, pipeline: Pipeline,
+                     score: bool, scorers: Sequence[str] = (), **options
+                     ) -> None:
+    '''Writes 'shards' to 'output' with the stages of 'pipeline' '''
+    def parse(item):
+        shard, lines, last = item
+        return shard, parse_chunk(lines, scorers), last, None
+
+    def score_hands(item):
+        shard, batch, last, __scores = item
+        scores = batch.scores.get('stegen')
+        if scores is None:
+            scores = hand_score_array(encode_hands(batch.columns()['hand']))
+        return shard, batch, last, scores
+
+    def write(item):
+        shard, batch, last, scores = item
+        output.write(batch, scores)
+        if last:
+            output.end_shard(shard)
+
+    stages = [Stage('decompress', read_blocks, expand=True),
+              Stage('split', functools.partial(split_block, **options),
+                    expand=True),
+              Stage('parse', parse)]
+    if score:
+        stages.append(Stage('score', score_hands))
+    stages.append(Stage('write', write))
+    pipeline.run(shards, stages)
 
 
 def extract_svg_hands(raw_files: List[str],
                       converted_file: str,
-                      testing: bool = False
+                      testing: bool = False,
+                      chunksize: int = CHUNKSIZE,
+                      jobs: int = 1,
+                      shardsize: int = SHARDSIZE,
+                      date_from: Optional[str] = None,
+                      date_to: Optional[str] = None,
+                      output_format: str = 'tsv',
+                      resume: bool = False,
+                      index: bool = False,
+                      stats: Optional['issgame.OnlineStats'] = None,
+                      pipeline: Optional[Pipeline] = None,
+                      quarantine: Optional[Quarantine] = None,
+                      scorers: Sequence[str] = ()
                       ) -> None:
     """
     Converts a list of .svg (ISS games) files into a a single csv-formatted
@@ -18,30 +174,103 @@ def extract_svg_hands(raw_files: List[str],
 
     Args:
         raw_files (List[str]): Input filename strings (.sgv ISS game files).
-        converted_file (str): Output filename
+            Files ending in .bz2, .gz, or .xz are decompressed while reading.
+        converted_file (str): Output filename, a directory for the 'npy'
+            output format.
         testing (bool, optional): Read a small part of files. Defaults to False.
+        chunksize (int, optional): Number of games parsed and written at once.
+            Defaults to CHUNKSIZE.
+        jobs (int, optional): Number of processes parsing the input files.
+            Input files are split into shards of about 'shardsize' bytes at
+            line boundaries, and the output keeps the input order regardless
+            of the number of processes. Defaults to 1.
+        shardsize (int, optional): Bytes of input per shard. Defaults to
+            SHARDSIZE.
+        date_from (str, optional): Only include games dated on or after this
+            date, e.g. '2019' or '2019-06-01'. Defaults to None.
+        date_to (str, optional): Only include games dated on or before this
+            date, e.g. '2021' or '2021-04-30'. Defaults to None.
+        output_format (str, optional): 'tsv' for a tab separated file, 'npy'
+            for a directory of .npy arrays as read by load_columnar().
+            Defaults to 'tsv'.
+        resume (bool, optional): Checkpoint the extraction to a 'tsv'
+            output file in a manifest next to it (see issgame.manifest), and
+            continue the extraction recorded there by an earlier run with
+            resume: input files that were processed completely are skipped,
+            partly processed files continue at their last checkpoint, and
+            games written by earlier runs are not written again. If False,
+            the output is extracted from scratch without a manifest.
+            Defaults to False.
+        index (bool, optional): Also write a player and day index of the
+            output to <converted_file>.index.npz, as used by query_hands().
+            Defaults to False.
+        stats (OnlineStats, optional): Statistics updated with every hand
+            written, so a summary is available without reading the output
+            again. Defaults to None.
+        pipeline (Pipeline, optional): Run reading and decompressing
+            blocks of the input, splitting them into lines, parsing,
+            scoring (with 'stats' only), and writing as concurrent stages of
+            this pipeline, whose report() afterwards shows the utilisation
+            of each stage. Cannot be combined with jobs > 1.
+            Defaults to None, running the stages in sequence.
+        quarantine (Quarantine, optional): Receives the lines rejected by
+            validate_line() with their reason, so they can be written to a
+            quarantine file and counted. Defaults to None.
+        scorers (Sequence[str], optional): Names of models of
+            issgame.scorers, e.g. ['stegen', 'null'], whose columns are
+            computed while parsing and written after the hand column. A
+            resumed extraction must use the same scorers. Defaults to none,
+            writing the five columns id, session, player, position, hand.
     """
-    CHUNKSIZE = 128
-
-    include_header_line = True
-    if os.path.isfile(converted_file):
-        os.remove(converted_file)
-    for raw_file in raw_files:
-        reader = pd.read_csv(raw_file, chunksize=CHUNKSIZE, header=None)
-
-        for chunk in reader:
-            chunk.columns = ['imported_line']
-            hand_frames = []
-
-            for line in chunk.loc[:, 'imported_line']:
-                hand_frames.append(issgame.GameLine(line).get_hands())
-
-            all_hands = pd.concat(hand_frames)
-            all_hands.to_csv(
-                converted_file,
-                index=False,
-                header=include_header_line,
-                sep="\t",
-                mode='a'
-            )
-            include_header_line = False
+    if output_format not in ('tsv', 'npy'):
+        raise ValueError('Unknown output format: ' + repr(output_format))
+    if resume and output_format != 'tsv':
+        raise ValueError('Only tsv output can be resumed')
+    if pipeline is not None and jobs > 1:
+        raise ValueError('A pipeline runs in a single process, use jobs=1')
+    scorers = tuple(scorers)
+    columns = score_columns(scorers)
+    options = {'chunksize': chunksize,
+               'date_from': date_from,
+               'date_to': date_to}
+
+    index_builder = HandIndexBuilder() if index else None
+
+    with contextlib.ExitStack() as stack:
+        if quarantine is not None:
+            stack.enter_context(quarantine)
+        if output_format == 'npy':
+            shards = list(file_shards(raw_files, shardsize))
+            writer = stack.enter_context(ColumnarWriter(converted_file))
+            output = _ColumnarOutput(writer, index_builder, stats,
+                                     quarantine)
+        else:
+            if resume:
+                manifest = Manifest.load(converted_file)
+            else:
+                # a manifest of an earlier run no longer matches the output
+                Manifest.remove(converted_file)
+                manifest = None
+            shards = list(file_shards(raw_files, shardsize, manifest))
+            if manifest is not None and index_builder is not None\
+                    and manifest.output_size:
+                index_builder.scan(converted_file, manifest.output_size)
+            out_file = stack.enter_context(
+                open(converted_file, 'a' if resume else 'w'))
+            output = _TsvOutput(out_file, manifest, index_builder, stats,
+                                quarantine, columns)
+
+        if pipeline is not None:
+            _write_pipelined(shards, output, pipeline, stats is not None,
+                             scorers, **options)
+        else:
+            parsed = parsed_shards(shards, jobs, scorers=scorers,
+                                           **options)
+            for shard, batches in parsed:
+                for batch in batches:
+                    output.write(batch)
+                output.end_shard(shard)
+        output.close()
+
+    if index_builder is not None:
+        index_builder.save(converted_file)
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests of the dealing of the cards over all deals of the raw games.
+
+A fair deal puts every card in every one of the 32 slots of the deal equally
+often, deals every card to each player 10 times in 32 and to the skat 2
+times in 32, and makes every pair of cards equally likely in the skat. The
+counts needed for these tests are accumulated deal by deal in fixed size
+tables, so any number of deals is processed in constant memory, and tables
+counted by separate workers are merged by adding them.
+"""
+
+import concurrent.futures
+import functools
+import itertools
+from typing import Iterable, List, Optional, Union
+
+import numpy
+import pandas
+import scipy.stats
+
+from issgame.cards import CARDS, card_indices
+from issgame.gameline import GameLine
+from issgame.shards import CHUNKSIZE, SHARDSIZE, Shard, file_shards, \
+    in_date_range, map_ordered, read_lines
+
+SLOTS = 32
+# slots 0-9, 10-19, and 20-29 are dealt to players 1-3, slots 30-31 are skat
+SEATS = numpy.minimum(numpy.arange(SLOTS)//10, 3)
+SEAT_NAMES = ('player1', 'player2', 'player3', 'skat')
+
+
+class DealCounts():
+    """
+    Counts of the dealt cards: 'slots' counts each card (rows, in the order
+    of cards.CARDS) in each slot of the deal, 'seats' each card per player
+    and skat, and 'skat' each pair of cards in the skat as an upper
+    triangular card by card table.
+    """
+
+    ARRAYS = ('slots', 'seats', 'skat')
+
+    def __init__(self):
+        self.slots = numpy.zeros((len(CARDS), SLOTS), dtype=numpy.int64)
+        self.seats = numpy.zeros((len(CARDS), len(SEAT_NAMES)),
+                                 dtype=numpy.int64)
+        self.skat = numpy.zeros((len(CARDS), len(CARDS)), dtype=numpy.int64)
+        self.deals = 0
+        self.invalid = 0
+
+    def add_deals(self, deals: Iterable[str]) -> None:
+        '''
+        Counts deals as returned by GameLine.get_deal(). Deals that are not
+        32 distinct known cards are counted in 'invalid' only.
+        '''
+        deals = list(deals)
+        complete = [deal for deal in deals if len(deal) == 3*SLOTS - 1]
+        cards = card_indices(complete).astype(numpy.int64)
+        if len(cards):
+            ordered = numpy.sort(cards, axis=1)
+            valid = (ordered[:, 0] >= 0)\
+                & (numpy.diff(ordered, axis=1) > 0).all(axis=1)
+            cards = cards[valid]
+        self.invalid += len(deals) - len(cards)
+        self.deals += len(cards)
+        if not len(cards):
+            return
+
+        slots = numpy.broadcast_to(numpy.arange(SLOTS), cards.shape)
+        self.slots += numpy.bincount(
+            (cards*SLOTS + slots).ravel(),
+            minlength=self.slots.size).reshape(self.slots.shape)
+        self.seats += numpy.bincount(
+            (cards*len(SEAT_NAMES) + SEATS[slots]).ravel(),
+            minlength=self.seats.size).reshape(self.seats.shape)
+        low = cards[:, 30:].min(axis=1)
+        high = cards[:, 30:].max(axis=1)
+        self.skat += numpy.bincount(
+            low*len(CARDS) + high,
+            minlength=self.skat.size).reshape(self.skat.shape)
+
+    def add_games(self, games: Iterable[Union[str, GameLine]],
+                  chunksize: int = CHUNKSIZE) -> None:
+        '''
+        Counts the deals of .svg lines or GameLine objects, taking
+        'chunksize' games at a time from 'games'.
+        '''
+        games = iter(games)
+        while True:
+            block = list(itertools.islice(games, chunksize))
+            if not block:
+                return
+            deals = []
+            for game in block:
+                if not isinstance(game, GameLine):
+                    try:
+                        game = GameLine(game)
+                    except ValueError:
+                        self.invalid += 1
+                        continue
+                deals.append(game.get_deal())
+            self.add_deals(deals)
+
+    def merge(self, other: 'DealCounts') -> None:
+        '''Adds the counts of 'other', e.g. from another worker'''
+        for name in self.ARRAYS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.deals += other.deals
+        self.invalid += other.invalid
+
+    def save(self, filename: str) -> None:
+        '''Writes the counts to an .npz file'''
+        numpy.savez(filename, deals=self.deals, invalid=self.invalid,
+                    **{name: getattr(self, name) for name in self.ARRAYS})
+
+    @classmethod
+    def load(cls, filename: str) -> 'DealCounts':
+        '''Reads counts written by save()'''
+        counts = cls()
+        with numpy.load(filename) as stored:
+            for name in cls.ARRAYS:
+                setattr(counts, name, stored[name])
+            counts.deals = int(stored['deals'])
+            counts.invalid = int(stored['invalid'])
+        return counts
+
+    def tests(self) -> pandas.DataFrame:
+        '''
+        Tests the counts against a fair deal with Pearson's chi-square test
+        and the G-test (log-likelihood ratio):
+
+        - 'slot': independence of card and slot of the deal
+        - 'seat': independence of card and player or skat
+        - 'skat': uniform distribution of the pairs of cards in the skat
+
+        Returns:
+            pandas.DataFrame: For each test the statistic, degrees of freedom,
+            and p-value of both tests.
+        '''
+        rows = []
+        for name, table in [('slot', self.slots), ('seat', self.seats)]:
+            row = {'test': name}
+            for method, lambda_ in [('chi2', 'pearson'),
+                                    ('g', 'log-likelihood')]:
+                if self.deals:
+                    statistic, p, df, __expected = \
+                        scipy.stats.chi2_contingency(table, correction=False,
+                                                     lambda_=lambda_)
+                else:
+                    statistic, p, df = numpy.nan, numpy.nan, numpy.nan
+                row.update({method: statistic, method + '_p': p, 'df': df})
+            rows.append(row)
+
+        pairs = self.skat[numpy.triu_indices(len(CARDS), 1)]
+        row = {'test': 'skat', 'df': len(pairs) - 1}
+        for method, lambda_ in [('chi2', 'pearson'), ('g', 'log-likelihood')]:
+            if self.deals:
+                statistic, p = scipy.stats.power_divergence(pairs,
+                                                            lambda_=lambda_)
+            else:
+                statistic, p = numpy.nan, numpy.nan
+            row.update({method: statistic, method + '_p': p})
+        rows.append(row)
+        return pandas.DataFrame(rows, columns=['test', 'chi2', 'g', 'df',
+                                               'chi2_p', 'g_p'])
+
+
+def _count_shard(shard: Shard,
+                 date_from: Optional[str] = None,
+                 date_to: Optional[str] = None
+                 ) -> DealCounts:
+    '''Counts the deals of the lines of 'shard' '''
+    lines = read_lines(shard)
+    if date_from is not None or date_to is not None:
+        lines = (line for line in lines
+                 if in_date_range(line, date_from, date_to))
+    counts = DealCounts()
+    counts.add_games(lines)
+    return counts
+
+
+def count_deals(raw_files: List[str],
+                jobs: int = 1,
+                shardsize: int = SHARDSIZE,
+                date_from: Optional[str] = None,
+                date_to: Optional[str] = None
+                ) -> DealCounts:
+    '''
+    Counts the deals of all games in raw game files. Each shard is counted
+    separately, in 'jobs' processes, and the counts are merged.
+
+    Args:
+        raw_files (List[str]): Input filename strings (.sgv ISS game files).
+        jobs (int, optional): Number of processes. Defaults to 1.
+        shardsize (int, optional): Bytes of input per shard.
+        date_from (str, optional): Only include games dated on or after this
+            date.
+        date_to (str, optional): Only include games dated on or before this
+            date.
+
+    Returns:
+        DealCounts: The counts of all deals.
+    '''
+    count_shard = functools.partial(_count_shard, date_from=date_from,
+                                    date_to=date_to)
+    shards = file_shards(raw_files, shardsize)
+    counts = DealCounts()
+    if jobs <= 1:
+        for shard_counts in map(count_shard, shards):
+            counts.merge(shard_counts)
+        return counts
+    with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+        for shard_counts in map_ordered(count_shard, shards, executor,
+                                         2*jobs):
+            counts.merge(shard_counts)
+    return counts
@@ -1,9 +1,68 @@
 #!/usr/bin/env python3
 
-from typing import Dict, List
+import itertools
+import re
+import sys
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, \
+    Tuple, Union
 
+import numpy
 import pandas
 
+from issgame.cards import CARDS, DEAL_ERRORS, deal_errors
+
+CARD_NAMES = frozenset(CARDS)
+# game types of a declaration followed by optional modifiers
+GAME_TYPES = {'G': 'grand', 'C': 'clubs', 'S': 'spades', 'H': 'hearts',
+              'D': 'diamonds', 'N': 'null'}
+MODIFIERS = {'H': 'hand', 'O': 'ouvert', 'S': 'schneider', 'Z': 'schwarz'}
+DETAIL_COLUMNS = ('id', 'declarer', 'game_type', 'hand_game', 'ouvert', 'bid',
+                  'skat_pickup', 'won', 'value', 'points', 'tricks')
+
+# reasons of validate_line() for rejecting a line
+REJECT_REASONS = ('missing_id', 'missing_date', 'missing_players',
+                  'missing_deal', 'deal_layout', 'unknown_card',
+                  'repeated_card', 'unparsable')
+_DEAL_SEPARATORS = '.'*31
+
+
+def validate_line(line: str) -> Optional[str]:
+    '''
+    Checks the structure of an ISS game line with string searches only, so
+    corrupt lines are rejected without raising and catching exceptions: the
+    ID, DT, P0-P2, and MV tags must appear in this order, and the deal must
+    be 32 distinct known cards separated by dots.
+
+    Args:
+        line (str): A .svg file line.
+
+    Returns:
+        Optional[str]: None if the line is valid, otherwise the reason for
+        rejecting it, one of REJECT_REASONS.
+    '''
+    position = line.find(']ID[')
+    if position == -1:
+        return 'missing_id'
+    position = line.find(']DT[', position)
+    if position == -1:
+        return 'missing_date'
+    for tag in (']P0[', ']P1[', ']P2['):
+        position = line.find(tag, position)
+        if position == -1:
+            return 'missing_players'
+    position = line.find(']MV[', position)
+    if position == -1:
+        return 'missing_deal'
+
+    deal = line[position + 6:position + 101]
+    if len(deal) != 95 or deal[2::3] != _DEAL_SEPARATORS:
+        return 'deal_layout'
+    if deal[0::3].strip('DHSC') or deal[1::3].strip('789TJQKA'):
+        return 'unknown_card'
+    if len(set(deal.split('.'))) != 32:
+        return 'repeated_card'
+    return None
+
 
 def hand_score(hand: str) -> float:
     '''
@@ -14,18 +73,25 @@ def hand_score(hand: str) -> float:
         hand (str): Represents a hand of 10 cards represented as two characters
         as returned by GameLine._read_hand()
 
+    Raises:
+        AssertionError: If the hand is not 10 cards in this format.
+
     Returns:
         float: A score according to Stegen Model for bidding in skat games:
         https://www.skatfuchs.eu/SB-Kapitel3.pdf
     '''
 
-    assert type(hand) is str, 'Hand should be a string'
-    assert len(hand) == 29, 'Lenght of hand should be 10 cards'
+    # explicit checks rather than assert statements, which python -O removes
+    if type(hand) is not str:
+        raise AssertionError('Hand should be a string')
+    if len(hand) != 29:
+        raise AssertionError('Lenght of hand should be 10 cards')
 
     for suit in range(0, 27, 3):
-        assert hand[suit] in 'HCSD', 'Incorrect hand format'
-        assert hand[suit+1] in 'AKQJT987', 'Incorrect hand format'
-        assert hand[suit+2] == '_', 'Incorrect hand format'
+        if hand[suit] not in 'HCSD'\
+                or hand[suit+1] not in 'AKQJT987'\
+                or hand[suit+2] != '_':
+            raise AssertionError('Incorrect hand format')
 
     score = 0.0
     suitscores = {}
@@ -81,12 +147,116 @@ def hand_score(hand: str) -> float:
     return round(max([score, grand_score]), 3)
 
 
+class GameDetails(NamedTuple):
+    """
+    The course of a game after the deal, as parsed from the moves of the MV
+    tag and the result of the R tag:
+
+    moves: (actor, action) of every move, actor 'w' being the server and
+        '0' to '2' the players
+    bidding: (seat, action) of the bids, holds ('y') and passes ('p')
+    declarer: Seat of the declarer, None if all players passed
+    skat_pickup: Whether the declarer picked up the skat
+    declaration: The declaration as in the MV tag, e.g. 'G.H7.HQ' or 'GH'
+    tricks: (seat, card) of the cards played, three per trick
+    result: Values of the R tag, e.g. {'d': 0, 'win': True, 'v': 48, ...}
+    """
+    moves: List[Tuple[str, str]]
+    bidding: List[Tuple[int, str]]
+    declarer: Optional[int]
+    skat_pickup: bool
+    declaration: Optional[str]
+    tricks: List[Tuple[Tuple[int, str], ...]]
+    result: Dict[str, Union[int, str, bool]]
+
+
+def _parse_result(tag: str) -> Dict[str, Union[int, str, bool]]:
+    '''Parses an R tag such as 'd:0 win v:48 ...' into a dict'''
+    result = {}
+    for item in tag.split():
+        key, separator, value = item.partition(':')
+        if not separator:
+            result[key] = True
+            continue
+        try:
+            result[key] = int(value)
+        except ValueError:
+            result[key] = value
+    return result
+
+
+def _parse_details(line: str) -> GameDetails:
+    '''Parses the moves and the result of a .svg line'''
+    start = line.index(']MV[') + 4
+    end = line.find(']', start)
+    if end == -1:
+        end = len(line)
+    tokens = line[start:end].split()
+    # the first move is the deal by the server
+    moves = list(zip(tokens[2::2], tokens[3::2]))
+
+    position = 0
+    bidding = []
+    for actor, action in moves:
+        if actor == 'w' or not (action.isdigit() or action in ('y', 'p')):
+            break
+        bidding.append((int(actor), action))
+        position += 1
+
+    declarer = None
+    skat_pickup = False
+    declaration = None
+    for actor, action in moves[position:position + 3]:
+        position += 1
+        if action == 's':
+            skat_pickup = True
+        elif actor != 'w' and action[0] in GAME_TYPES:
+            declarer = int(actor)
+            declaration = action
+            break
+
+    plays = [(int(actor), action) for actor, action in moves[position:]
+             if action in CARD_NAMES]
+    tricks = [tuple(plays[trick:trick + 3])
+              for trick in range(0, len(plays), 3)]
+
+    result = {}
+    result_start = line.find(']R[', end - 1)
+    if result_start != -1:
+        result_end = line.find(']', result_start + 3)
+        result = _parse_result(line[result_start + 3:result_end])
+    return GameDetails(moves, bidding, declarer, skat_pickup, declaration,
+                       tricks, result)
+
+
 class GameLine():
     """
     A data processing class that makes the elements of a .svg line available
     through function calls.
+
+    The line is scanned once by a compiled pattern (_LINE_PATTERN) on
+    initialisation. Only the tag values and the 95 characters of the deal are
+    kept; the hands are cut out of the deal when they are requested.
+
+    The rest of the game (bidding, declaration, tricks, and result) is
+    parsed from the line only when one of these properties is first used,
+    and then kept in _details.
     """
 
+    __slots__ = ('_date', '_id', '_player1', '_player2', '_player3', '_deal',
+                 '_line', '_details')
+
+    # ISS lines always carry the tags in this order:
+    # ...ID[..]DT[date/time/UTC]P0[..]P1[..]P2[..]R0[..]R1[..]R2[..]MV[w deal ...
+    _LINE_PATTERN = re.compile(
+        r'\]ID\[([^\]]*)'
+        r'\]DT\[(([^\]/]*)[^\]]*)'
+        r'\]P0\[([^\]]*)'
+        r'\]P1\[([^\]]*)'
+        r'\]P2\[([^\]]*)'
+        r'\].*?\]MV\[..'
+    )
+
     def __init__(self, line: str):
         """
         Initiates a GameLine class by extracting the following from the
@@ -96,30 +266,52 @@ class GameLine():
         _player1: str Name of player 1
         _player2: str Name of player 2
         _player3: str Name of player 3
-        _hands: Dict[int, str] Maps players to hands
+        _deal: str The 32 dealt cards as found in the MV tag
 
         Args:
             line (str): A .svg file line.
-        """
-        self._date = line.split(']DT[')[1].split('/')[0]
-        self._id = line.split(']ID[')[1].split(']')[0] + '_' + \
-            line.split(']DT[')[1].split(']')[0]
 
-        self._player1 = self._read_player(line, 1)
-        self._player2 = self._read_player(line, 2)
-        self._player3 = self._read_player(line, 3)
-
-        self._hands = {}
-        self._hands[1] = self._read_hand(line, 1)
-        self._hands[2] = self._read_hand(line, 2)
-        self._hands[3] = self._read_hand(line, 3)
-        self._hands[4] = self._read_hand(line, 4)
+        Raises:
+            ValueError: If the line does not contain the expected tags.
+        """
+        match = self._LINE_PATTERN.search(line)
+        if match is None:
+            raise ValueError('Line is not a valid ISS game line')
+        self._set(line, match)
 
-    def _read_hand(self, line: str, player: int) -> str:
-        '''Extracts and returns the hand belonging to player a string from a line.
+    @classmethod
+    def _match(cls, line: str) -> Optional['GameLine']:
+        '''
+        Returns the GameLine of 'line' like GameLine(line), but returns None
+        instead of raising ValueError if the line does not contain the
+        expected tags.
+        '''
+        match = cls._LINE_PATTERN.search(line)
+        if match is None:
+            return None
+        game = cls.__new__(cls)
+        game._set(line, match)
+        return game
+
+    def _set(self, line: str, match: 're.Match') -> None:
+        '''Keeps the tag values and the deal of a _LINE_PATTERN match'''
+        game_id, date_time, self._date, player1, player2, player3 =\
+            match.groups()
+        self._id = game_id + '_' + date_time
+
+        self._player1 = sys.intern(player1)
+        self._player2 = sys.intern(player2)
+        self._player3 = sys.intern(player3)
+
+        deal_start = match.end()
+        self._deal = line[deal_start:deal_start + 95]
+        self._line = line
+        self._details = None
+
+    def _read_hand(self, player: int) -> str:
+        '''Extracts and returns the hand belonging to player as a string.
 
         Args:
-            line (str): a .svg skat game line
             player (int): The player (1, 2, 3 or 4 for skat)
 
         Returns:
@@ -138,31 +330,18 @@ class GameLine():
             length = 2
         else:
             length = 10
-        start = (2+(player-1)*30)
+        start = (player-1)*30
         end = start + length*3-1
-        return '_'.join(line.split(']MV[')[1][start:end].split('.'))
-
-    def _read_player(self, line: str, player: int) -> str:
-        '''
-        Extracts and returns the name of the player given by 'player'.
-
-        Args:
-            line (str): .svg game line
-            player (int): Player number (1-3 or 4 for skat)
-
-        Returns:
-            str: A player name
-        '''
-        return line.split(']P' + str(player-1) + '[')[1].split(']')[0]
+        return self._deal[start:end].replace('.', '_')
 
     def get_player(self, player: int) -> str:
         '''Returns the name of player 'player' (1-3, not skat) as a string'''
         if player == 1:
-            return self.get_player1()
+            return self._player1
         if player == 2:
-            return self.get_player2()
+            return self._player2
         if player == 3:
-            return self.get_player3()
+            return self._player3
 
     def get_player1(self) -> str:
         '''Returns the name of player 1 as a string'''
@@ -177,28 +356,26 @@ class GameLine():
         return self._player3
 
     def get_hand(self, player: int) -> str:
-        '''Returns the hand of to player a string from a line.'''
-        try:
-            return self._hands[player]
-        except KeyError:
-            self._hands[player] = self._read_hand(player)
-            return self._hands[player]
+        '''Returns the hand of player (1-3 or 4 for skat) as a string.'''
+        if player not in (1, 2, 3, 4):
+            raise KeyError(player)
+        return self._read_hand(player)
 
     def get_hand1(self) -> str:
         '''Returns the hand of player 1'''
-        return self._hands[1]
+        return self._read_hand(1)
 
     def get_hand2(self) -> str:
-        '''Returns the hand of player 1'''
-        return self._hands[2]
+        '''Returns the hand of player 2'''
+        return self._read_hand(2)
 
     def get_hand3(self) -> str:
-        '''Returns the hand of player 1'''
-        return self._hands[3]
+        '''Returns the hand of player 3'''
+        return self._read_hand(3)
 
     def get_skat(self) -> str:
         '''Returns the skat as a two-card hand'''
-        return self._hands[4]
+        return self._read_hand(4)
 
     def get_all(self) -> str:
         '''Returns all hands and the skat'''
@@ -207,6 +384,10 @@ class GameLine():
             + self.get_hand3()\
             + self.get_skat()
 
+    def get_deal(self) -> str:
+        '''Returns all 32 cards in the order dealt, separated by underscores'''
+        return self._deal.replace('.', '_')
+
     def get_date(self) -> str:
         '''Returns the session date as a string'''
         return self._date
@@ -222,10 +403,60 @@ class GameLine():
 
     def get_session(self) -> str:
         '''Returns a string representation of the session information'''
-        file_string = self.get_date()
-        for player in sorted([self.get_player1(), self.get_player2(), self.get_player3()]):
-            file_string += '-' + player
-        return file_string
+        return '-'.join(
+            [self._date]
+            + sorted([self._player1, self._player2, self._player3])
+        )
+
+    def get_details(self) -> GameDetails:
+        '''Returns the course of the game, parsing it on first use'''
+        if self._details is None:
+            self._details = _parse_details(self._line)
+        return self._details
+
+    @property
+    def moves(self) -> List[Tuple[str, str]]:
+        return self.get_details().moves
+
+    @property
+    def bidding(self) -> List[Tuple[int, str]]:
+        return self.get_details().bidding
+
+    @property
+    def declaration(self) -> Optional[str]:
+        return self.get_details().declaration
+
+    @property
+    def tricks(self) -> List[Tuple[Tuple[int, str], ...]]:
+        return self.get_details().tricks
+
+    @property
+    def result(self) -> Dict[str, Union[int, str, bool]]:
+        return self.get_details().result
+
+    def get_declarer(self) -> Optional[int]:
+        '''Returns the position (1-3) of the declarer, None if passed in'''
+        declarer = self.get_details().declarer
+        return None if declarer is None else declarer + 1
+
+    def get_game_type(self) -> Optional[str]:
+        '''Returns the declared game type, e.g. 'grand', None if passed in'''
+        if self.declaration is None:
+            return None
+        return GAME_TYPES[self.declaration[0]]
+
+    def get_modifiers(self) -> List[str]:
+        '''Returns the declared modifiers, e.g. ['hand', 'ouvert']'''
+        if self.declaration is None:
+            return []
+        return [MODIFIERS[modifier]
+                for modifier in self.declaration.split('.')[0][1:]
+                if modifier in MODIFIERS]
+
+    def get_bid(self) -> int:
+        '''Returns the highest bid, 0 if all players passed'''
+        return max([int(action) for __seat, action in self.bidding
+                    if action.isdigit()], default=0)
 
     def get_hands(self) -> pandas.DataFrame:
         '''
@@ -235,19 +466,210 @@ class GameLine():
         Returns:
             pandas.DataFrame: Main information for each player.
         '''
-        return_dict = {
-            'id': [],
-            'session': [],
-            'player': [],
-            'position': [],
-            'hand': []
-        }
+        return GameLine.parse_many([self]).to_frame()
+
+    @staticmethod
+    def parse_many(lines: Iterable[Union[str, 'GameLine']],
+                   keep_games: bool = False) -> 'GameBatch':
+        '''
+        Parses a chunk of .svg lines into a single GameBatch. Lines that are
+        not valid ISS game lines are skipped, counted in GameBatch.skipped,
+        and kept with the reason of validate_line() in GameBatch.rejected.
+        The deals of all games are checked at once with deal_errors().
 
+        Args:
+            lines (Iterable[Union[str, GameLine]]): .svg file lines or
+            already parsed GameLine objects.
+            keep_games (bool, optional): Keep the GameLine of each game in
+            GameBatch.games, as needed by issgame.scorers.score_batch().
+            Defaults to False.
+
+        Returns:
+            GameBatch: One row per player for every valid game.
+        '''
+        if not isinstance(lines, Sequence):
+            lines = list(lines)
+        batch = GameBatch(len(lines), keep_games)
+        deals = []
+        positions = []
+        rejected = []
+        for position, line in enumerate(lines):
+            if not isinstance(line, GameLine):
+                game = GameLine._match(line)
+                if game is None:
+                    # only the rare lines the pattern rejects are examined
+                    rejected.append((position,
+                                     validate_line(line) or 'unparsable'))
+                    continue
+                line = game
+            deals.append(line._deal)
+            positions.append(position)
+            batch.append(line)
+        batch.trim()
+
+        errors = deal_errors(deals)
+        if errors.any():
+            batch = batch.select_games(errors == 0)
+            rejected.extend((position, DEAL_ERRORS[error]) for position, error
+                            in zip(positions, errors.tolist()) if error)
+        # rejected lines in input order
+        for position, reason in sorted(rejected):
+            line = lines[position]
+            if isinstance(line, GameLine):
+                line = line._line
+            batch.reject(reason, line)
+        return batch
+
+    @staticmethod
+    def details_many(lines: Iterable[Union[str, 'GameLine']]
+                     ) -> pandas.DataFrame:
+        '''
+        Parses the course of many games into one row per game. Lines that
+        are not valid ISS game lines are skipped.
+
+        Args:
+            lines (Iterable[Union[str, GameLine]]): .svg file lines or
+            already parsed GameLine objects.
+
+        Returns:
+            pandas.DataFrame: The columns of DETAIL_COLUMNS: id, declarer
+            (position 1-3, 0 if passed in), game_type, hand_game, ouvert,
+            bid, skat_pickup, won, value, points (of the declarer), and
+            tricks (won by the declarer).
+        '''
+        columns = {column: [] for column in DETAIL_COLUMNS}
+        for line in lines:
+            if not isinstance(line, GameLine):
+                line = GameLine._match(line)
+                if line is None:
+                    continue
+            details = line.get_details()
+            result = details.result
+            modifiers = line.get_modifiers()
+            columns['id'].append(line.get_id())
+            columns['declarer'].append(line.get_declarer() or 0)
+            columns['game_type'].append(line.get_game_type() or 'passed')
+            columns['hand_game'].append('hand' in modifiers)
+            columns['ouvert'].append('ouvert' in modifiers)
+            columns['bid'].append(line.get_bid())
+            columns['skat_pickup'].append(details.skat_pickup)
+            columns['won'].append(bool(result.get('win', False)))
+            columns['value'].append(result.get('v', 0))
+            columns['points'].append(result.get('p', 0))
+            columns['tricks'].append(result.get('t', 0))
+        return pandas.DataFrame(columns, columns=list(DETAIL_COLUMNS))
+
+
+class GameBatch():
+    """
+    Columnar container for the hands of a chunk of games. Columns are
+    preallocated for a known number of games and filled row by row by
+    append(), three rows (one per player) per game. Score columns of
+    issgame.scorers are kept in 'scores' and output after the COLUMNS.
+    """
+
+    COLUMNS = ('id', 'session', 'player', 'position', 'hand')
+
+    __slots__ = COLUMNS + ('size', 'skipped', 'rejected', 'scores', 'games')
+
+    def __init__(self, games: int = 0, keep_games: bool = False):
+        """
+        Initiates an empty GameBatch with room for 'games' games.
+
+        Args:
+            games (int, optional): Number of games to preallocate for.
+            keep_games (bool, optional): Keep the appended GameLine objects
+                in 'games'. Defaults to False, setting 'games' to None.
+        """
+        rows = 3*games
+        self.id = [None]*rows
+        self.session = [None]*rows
+        self.player = [None]*rows
+        self.position = [1, 2, 3]*games
+        self.hand = [None]*rows
+        self.size = 0
+        self.skipped = 0
+        self.rejected = []
+        self.scores: Dict[str, numpy.ndarray] = {}
+        self.games: Optional[List[GameLine]] = [] if keep_games else None
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, game: GameLine) -> None:
+        '''Adds the three rows of 'game' to the batch'''
+        row = self.size
+        if row + 3 > len(self.id):
+            for column in self.COLUMNS:
+                getattr(self, column).extend([None]*3)
+            self.position[row:row + 3] = [1, 2, 3]
+
+        game_id = game.get_id()
+        session = game.get_session()
         for playerpos in range(1, 4):
-            return_dict['id'].append(self.get_id())
-            return_dict['session'].append(self.get_session())
-            return_dict['player'].append(self.get_player(playerpos))
-            return_dict['position'].append(playerpos)
-            return_dict['hand'].append(self.get_hand(playerpos))
+            self.id[row] = game_id
+            self.session[row] = session
+            self.player[row] = game.get_player(playerpos)
+            self.hand[row] = game.get_hand(playerpos)
+            row += 1
+        self.size = row
+        if self.games is not None:
+            self.games.append(game)
+
+    def reject(self, reason: str, line: str) -> None:
+        '''Records a line that was not added for 'reason' '''
+        self.skipped += 1
+        self.rejected.append((reason, line))
+
+    def trim(self) -> None:
+        '''Drops preallocated rows that were not filled'''
+        for column in self.COLUMNS:
+            del getattr(self, column)[self.size:]
+
+    def game_ids(self) -> List[int]:
+        '''Returns the ISS game number of each game in the batch'''
+        return [int(game_id.split('_', 1)[0])
+                for game_id in self.id[:self.size:3]]
+
+    def select_games(self, keep: Sequence[bool]) -> 'GameBatch':
+        '''
+        Returns a new GameBatch with the games for which 'keep' is True.
 
-        return pandas.DataFrame(return_dict)
+        Args:
+            keep (Sequence[bool]): One flag per game in the batch.
+
+        Returns:
+            GameBatch: The selected games.
+        '''
+        rows = [row for game, kept in enumerate(keep) if kept
+                for row in range(3*game, 3*game + 3)]
+        selected = GameBatch()
+        for column in self.COLUMNS:
+            values = getattr(self, column)
+            setattr(selected, column, [values[row] for row in rows])
+        selected.size = len(rows)
+        selected.skipped = self.skipped
+        selected.rejected = self.rejected
+        selected.scores = {column: values[rows]
+                           for column, values in self.scores.items()}
+        if self.games is not None:
+            selected.games = list(itertools.compress(self.games, keep))
+        return selected
+
+    def columns(self) -> Dict[str, list]:
+        '''Returns the filled rows of the batch as a dict of columns'''
+        return {column: getattr(self, column)[:self.size]
+                for column in self.COLUMNS}
+
+    def to_frame(self) -> pandas.DataFrame:
+        '''
+        Provides the batch as a pandas DataFrame with the columns id, session,
+        player, position and hand, followed by any score columns.
+
+        Returns:
+            pandas.DataFrame: One row per player and game.
+        '''
+        columns = self.columns()
+        columns.update(self.scores)
+        return pandas.DataFrame(columns,
+                                columns=list(self.COLUMNS) + list(self.scores))
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Exact distribution of hand_score() over all C(32, 10) = 64,512,240 hands, i.e.
+the distribution of scores an ideal dealer would produce.
+
+The score of a hand only depends on its jacks and on how many aces and tens
+and how many other cards it holds in each suit. Instead of scoring every hand,
+each such composition is scored once with a representative hand and weighted
+by the number of hands that share it.
+"""
+
+import itertools
+import math
+import os
+from typing import Optional
+
+import numpy
+
+from issgame.cards import CARD_BITS, SUITS, hand_score_array
+
+DISTRIBUTION_FILE = os.path.join(os.path.dirname(__file__), 'data',
+                                 'hand_score_distribution.tsv')
+
+HAND_SIZE = 10
+ALL_HANDS = math.comb(32, HAND_SIZE)
+
+
+class ScoreDistribution():
+    """
+    A discrete distribution of hand scores given as distinct scores and the
+    number of hands with each score.
+    """
+
+    def __init__(self, scores: numpy.ndarray, counts: numpy.ndarray):
+        """
+        Initiates a ScoreDistribution.
+
+        Args:
+            scores (numpy.ndarray): Distinct scores in ascending order.
+            counts (numpy.ndarray): Number of hands with each score.
+        """
+        self.scores = numpy.asarray(scores, dtype=numpy.float64)
+        self.counts = numpy.asarray(counts, dtype=numpy.int64)
+        self.total = int(self.counts.sum())
+        self.probabilities = self.counts/self.total
+        self._cumulative = numpy.cumsum(self.counts)
+
+    def mean(self) -> float:
+        '''Returns the mean score'''
+        return float(numpy.dot(self.scores, self.probabilities))
+
+    def variance(self) -> float:
+        '''Returns the (population) variance of the scores'''
+        deviation = self.scores - self.mean()
+        return float(numpy.dot(deviation*deviation, self.probabilities))
+
+    def std(self) -> float:
+        '''Returns the standard deviation of the scores'''
+        return math.sqrt(self.variance())
+
+    def cdf(self, score: float) -> float:
+        '''Returns the probability of a score of at most 'score' '''
+        index = numpy.searchsorted(self.scores, score, side='right')
+        if index == 0:
+            return 0.0
+        return float(self._cumulative[index - 1]/self.total)
+
+    def quantile(self, q: float) -> float:
+        '''Returns the smallest score with a cdf of at least 'q' '''
+        index = numpy.searchsorted(self._cumulative, q*self.total, side='left')
+        return float(self.scores[min(index, len(self.scores) - 1)])
+
+    def sample(self, size, generator: Optional[numpy.random.Generator] = None
+               ) -> numpy.ndarray:
+        '''
+        Draws scores of randomly dealt hands.
+
+        Args:
+            size: Number or shape of the scores to draw.
+            generator (numpy.random.Generator, optional): Random generator.
+
+        Returns:
+            numpy.ndarray: Scores drawn from the distribution.
+        '''
+        if generator is None:
+            generator = numpy.random.default_rng()
+        return generator.choice(self.scores, size=size, p=self.probabilities)
+
+    def save(self, filename: str) -> None:
+        '''Writes the distribution as a tab separated score and count table'''
+        with open(filename, 'w') as out_file:
+            out_file.write('score\tcount\n')
+            for score, count in zip(self.scores.tolist(), self.counts.tolist()):
+                out_file.write(str(score) + '\t' + str(count) + '\n')
+
+    @classmethod
+    def load(cls, filename: str) -> 'ScoreDistribution':
+        '''Reads a distribution written by save()'''
+        table = numpy.loadtxt(filename, delimiter='\t', skiprows=1, ndmin=2)
+        return cls(table[:, 0], table[:, 1].astype(numpy.int64))
+
+
+def _suit_compositions():
+    '''
+    Yields (cards, card mask, number of hands) for the possible holdings in a
+    suit without its jack, grouped by the number of aces and tens and the
+    number of other cards.
+    '''
+    for suit in SUITS:
+        high = [CARD_BITS[suit + rank] for rank in 'AT']
+        low = [CARD_BITS[suit + rank] for rank in 'KQ987']
+        compositions = []
+        for aces_tens in range(len(high) + 1):
+            for others in range(len(low) + 1):
+                compositions.append((
+                    aces_tens + others,
+                    sum(high[:aces_tens]) + sum(low[:others]),
+                    math.comb(len(high), aces_tens)*math.comb(len(low), others),
+                ))
+        yield numpy.array(compositions, dtype=numpy.int64)
+
+
+def hand_score_distribution() -> ScoreDistribution:
+    '''
+    Calculates the exact distribution of hand_score() over all possible
+    hands of 10 cards.
+
+    Returns:
+        ScoreDistribution: Scores and the number of hands with each score.
+    '''
+    # cards, mask, and number of hands for each combination of jacks
+    jacks = [CARD_BITS[suit + 'J'] for suit in SUITS]
+    combinations = [(len(subset), sum(subset), 1)
+                    for size in range(len(jacks) + 1)
+                    for subset in itertools.combinations(jacks, size)]
+    compositions = numpy.array(combinations, dtype=numpy.int64)
+
+    # cross every suit holding with the compositions so far
+    for suit in _suit_compositions():
+        cards = compositions[:, None, 0] + suit[None, :, 0]
+        masks = compositions[:, None, 1] | suit[None, :, 1]
+        hands = compositions[:, None, 2]*suit[None, :, 2]
+        keep = cards <= HAND_SIZE
+        compositions = numpy.stack([cards[keep], masks[keep], hands[keep]],
+                                   axis=1)
+
+    compositions = compositions[compositions[:, 0] == HAND_SIZE]
+    scores = hand_score_array(compositions[:, 1].astype(numpy.uint32))
+    distinct, index = numpy.unique(scores, return_inverse=True)
+    counts = numpy.bincount(index, weights=compositions[:, 2],
+                            minlength=len(distinct)).astype(numpy.int64)
+    return ScoreDistribution(distinct, counts)
+
+
+def load_hand_score_distribution(filename: Optional[str] = None
+                                 ) -> ScoreDistribution:
+    '''
+    Loads the precomputed exact distribution of hand_score(), calculating and
+    storing it first if the file does not exist yet.
+
+    Args:
+        filename (str, optional): Distribution file. Defaults to the file
+        distributed with issgame.
+
+    Returns:
+        ScoreDistribution: Scores and the number of hands with each score.
+    '''
+    if filename is None:
+        filename = DISTRIBUTION_FILE
+    if not os.path.isfile(filename):
+        hand_score_distribution().save(filename)
+    return ScoreDistribution.load(filename)
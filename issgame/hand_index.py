@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Player and day index over the output of extract_svg_hands, stored next to it
+as <converted_file>.index.npz. For each player and each day the index holds
+the row numbers of the matching hands and, for .tsv output, the byte offset
+of each row, so the hands of one player or date range are read without
+scanning the whole file.
+"""
+
+import array
+import os
+from typing import Dict, List, Optional
+
+import numpy
+import pandas
+
+from issgame.cards import decode_hand
+from issgame.columnar import is_columnar, load_columnar
+from issgame.gameline import GameBatch
+
+COLUMNS = list(GameBatch.COLUMNS)
+
+
+def index_filename(converted_file: str) -> str:
+    '''Returns the name of the index file of 'converted_file' '''
+    return converted_file.rstrip(os.sep) + '.index.npz'
+
+
+def _day(game_id: str) -> str:
+    '''Returns the day of a game id such as 6997010_2021-04-30/01:07:29/UTC'''
+    return game_id.split('_', 1)[1][:10]
+
+
+class HandIndexBuilder():
+    """
+    Collects the player, day, and output position of every row while the
+    rows are written and stores them as a HandIndex.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self._codes = {'player': {}, 'day': {}}
+        self._players = array.array('i')
+        self._days = array.array('i')
+        self._offsets = array.array('q')
+
+    def _code(self, key: str, value: str) -> int:
+        codes = self._codes[key]
+        return codes.setdefault(value, len(codes))
+
+    def add(self, player: str, game_id: str, offset: int = -1) -> None:
+        '''Adds one row at byte 'offset' of the output'''
+        self._players.append(self._code('player', player))
+        self._days.append(self._code('day', _day(game_id)))
+        self._offsets.append(offset)
+        self.rows += 1
+
+    def add_batch(self, batch: GameBatch, text: Optional[str] = None,
+                  offset: int = -1) -> None:
+        '''
+        Adds the rows of 'batch'. If the batch was written as 'text' starting
+        at byte 'offset' of the output, the byte offset of each row is
+        recorded too.
+        '''
+        if len(batch) == 0:
+            return
+        columns = batch.columns()
+        if text is None:
+            offsets = [-1]*len(batch)
+        else:
+            lines = text.splitlines(keepends=True)[-len(batch):]
+            header = text[:len(text) - sum(len(line) for line in lines)]
+            offsets = numpy.cumsum([len(header.encode())]
+                                   + [len(line.encode()) for line in lines])
+            offsets = (offsets[:-1] + offset).tolist()
+        for player, game_id, row_offset in zip(columns['player'],
+                                               columns['id'], offsets):
+            self.add(player, game_id, row_offset)
+
+    def scan(self, converted_file: str, end: int) -> None:
+        '''Adds the rows of the first 'end' bytes of a .tsv output file'''
+        with open(converted_file, 'rb') as converted:
+            offset = len(converted.readline())
+            while offset < end:
+                line = converted.readline()
+                if not line:
+                    break
+                game_id, __session, player = line.decode().split('\t', 3)[:3]
+                self.add(player, game_id, offset)
+                offset += len(line)
+
+    def build(self) -> 'HandIndex':
+        '''Returns the index of all added rows'''
+        rows = numpy.arange(self.rows, dtype=numpy.int64)
+        offsets = numpy.frombuffer(self._offsets, dtype=numpy.int64)
+        groups = {}
+        for key, codes in [('player', self._players), ('day', self._days)]:
+            codes = numpy.frombuffer(codes, dtype=numpy.int32)
+            order = numpy.argsort(codes, kind='stable')
+            pointers = numpy.zeros(len(self._codes[key]) + 1,
+                                   dtype=numpy.int64)
+            numpy.cumsum(numpy.bincount(codes,
+                                        minlength=len(self._codes[key])),
+                         out=pointers[1:])
+            groups[key] = (list(self._codes[key]), pointers,
+                           rows[order], offsets[order])
+        return HandIndex(groups)
+
+    def save(self, converted_file: str) -> None:
+        '''Stores the index next to 'converted_file' '''
+        self.build().save(converted_file)
+
+
+class HandIndex():
+    """
+    Row numbers and byte offsets of the hands of each player and each day.
+    """
+
+    def __init__(self, groups: Dict[str, tuple]):
+        """
+        Initiates a HandIndex.
+
+        Args:
+            groups (Dict[str, tuple]): For 'player' and 'day' a tuple of the
+                names, pointers into the rows of each name, and the row
+                numbers and byte offsets grouped by name.
+        """
+        self._groups = groups
+        self._positions = {key: {name: position
+                                 for position, name in enumerate(group[0])}
+                           for key, group in groups.items()}
+
+    @property
+    def players(self) -> List[str]:
+        return self._groups['player'][0]
+
+    @property
+    def days(self) -> List[str]:
+        return self._groups['day'][0]
+
+    def save(self, converted_file: str) -> None:
+        '''Writes the index to <converted_file>.index.npz'''
+        arrays = {}
+        for key, (names, pointers, rows, offsets) in self._groups.items():
+            arrays[key + '_names'] = numpy.array(names, dtype=str)
+            arrays[key + '_pointers'] = pointers
+            arrays[key + '_rows'] = rows
+            arrays[key + '_offsets'] = offsets
+        with open(index_filename(converted_file), 'wb') as index_file:
+            numpy.savez(index_file, **arrays)
+
+    @classmethod
+    def load(cls, converted_file: str) -> 'HandIndex':
+        '''Reads the index of 'converted_file' '''
+        with numpy.load(index_filename(converted_file)) as stored:
+            groups = {key: (stored[key + '_names'].tolist(),
+                            stored[key + '_pointers'],
+                            stored[key + '_rows'],
+                            stored[key + '_offsets'])
+                      for key in ('player', 'day')}
+        return cls(groups)
+
+    def _select(self, key: str, names: List[str]) -> numpy.ndarray:
+        '''Returns the positions in the grouped arrays of 'names' '''
+        __names, pointers, __rows, __offsets = self._groups[key]
+        positions = [self._positions[key][name] for name in names
+                     if name in self._positions[key]]
+        if not positions:
+            return numpy.zeros(0, dtype=numpy.int64)
+        return numpy.concatenate([numpy.arange(pointers[position],
+                                               pointers[position + 1])
+                                  for position in positions])
+
+    def lookup(self,
+               player: Optional[str] = None,
+               date_from: Optional[str] = None,
+               date_to: Optional[str] = None
+               ) -> pandas.DataFrame:
+        '''
+        Finds the rows of 'player' dated from 'date_from' to 'date_to'
+        (inclusive, compared as prefixes of the day like 'YYYY-MM-DD').
+
+        Returns:
+            pandas.DataFrame: 'row' and 'offset' of each matching row in
+            output order.
+        '''
+        __names, __pointers, rows, offsets = self._groups['player']
+        if player is not None:
+            selection = self._select('player', [player])
+            rows, offsets = rows[selection], offsets[selection]
+        if date_from is not None or date_to is not None:
+            days = [day for day in self.days
+                    if (date_from is None or day[:len(date_from)] >= date_from)
+                    and (date_to is None or day[:len(date_to)] <= date_to)]
+            selection = self._select('day', days)
+            day_rows = self._groups['day'][2][selection]
+            keep = numpy.isin(rows, day_rows)
+            rows, offsets = rows[keep], offsets[keep]
+        order = numpy.argsort(rows)
+        return pandas.DataFrame({'row': rows[order], 'offset': offsets[order]})
+
+
+def query_hands(converted_file: str,
+                player: Optional[str] = None,
+                date_from: Optional[str] = None,
+                date_to: Optional[str] = None
+                ) -> pandas.DataFrame:
+    '''
+    Reads the hands of 'player' and/or a date range from the output of
+    extract_svg_hands(..., index=True), using the index to read only the
+    matching rows.
+
+    Args:
+        converted_file (str): .tsv file or columnar directory with an index.
+        player (str, optional): Player name.
+        date_from (str, optional): First day, e.g. '2019' or '2019-06-01'.
+        date_to (str, optional): Last day, e.g. '2021' or '2021-04-30'.
+
+    Returns:
+        pandas.DataFrame: The matching rows with the columns of the .tsv
+        output, including any score columns.
+    '''
+    found = HandIndex.load(converted_file).lookup(player, date_from, date_to)
+
+    if is_columnar(converted_file):
+        rows = found['row'].to_numpy()
+        columns = load_columnar(converted_file)
+        hands = pandas.DataFrame({
+            'id': columns.decoded('game', rows),
+            'session': columns.decoded('session', rows),
+            'player': columns.decoded('player', rows),
+            'position': numpy.asarray(columns.position[rows],
+                                      dtype=numpy.int64),
+            'hand': [decode_hand(mask)
+                     for mask in columns.hand[rows].tolist()],
+        }, columns=COLUMNS)
+        for column, values in columns.scores.items():
+            hands[column] = numpy.asarray(values[rows])
+        return hands
+
+    lines = []
+    with open(converted_file, 'rb') as converted:
+        header = converted.readline().decode().rstrip('\r\n').split('\t')
+        for offset in found['offset'].tolist():
+            converted.seek(offset)
+            lines.append(converted.readline().decode().rstrip('\r\n')
+                         .split('\t'))
+    hands = pandas.DataFrame(lines, columns=header)
+    hands['position'] = hands['position'].astype(numpy.int64)
+    for column in header[len(COLUMNS):]:
+        # empty fields are missing scores
+        hands[column] = pandas.to_numeric(hands[column].replace('', numpy.nan))
+    return hands
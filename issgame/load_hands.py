@@ -1,15 +1,51 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import numpy
 import pandas
-import issgame
+from issgame.cards import encode_hands, hand_score_array
+from issgame.columnar import is_columnar, load_columnar
+
+
+def load_hand_scores(filename, player_pos, chunksize=None, cache=None):
+    '''
+    Loads the scores of all hands dealt to position 'player_pos'. Only the
+    position and hand columns are read, and the hands are scored in bulk.
+
+    Args:
+        filename (str): A .tsv file or columnar directory written by
+            extract_svg_hands.
+        player_pos (int): Player position (1-3).
+        chunksize (int, optional): Read the .tsv file in chunks of this many
+            rows, so only one chunk of hands is held at a time. Defaults to
+            None, reading the whole file at once.
+        cache (ScoreCache, optional): Score .tsv hands through this cache.
+            Defaults to None, scoring with hand_score_array().
+
+    Returns:
+        numpy.ndarray: A float64 score per hand in file order.
+    '''
+    if is_columnar(filename):
+        columns = load_columnar(filename)
+        return hand_score_array(columns.hand[columns.position == player_pos])
+
+    chunks = pandas.read_csv(filename, sep='\t',
+                             usecols=['position', 'hand'],
+                             dtype={'position': numpy.int8, 'hand': str},
+                             chunksize=chunksize)
+    if chunksize is None:
+        chunks = [chunks]
+
+    scores = []
+    for chunk in chunks:
+        hands = chunk['hand'].to_numpy()[chunk['position'].to_numpy()
+                                         == player_pos]
+        if cache is not None:
+            scores.append(cache.score_many(hands))
+        else:
+            scores.append(hand_score_array(encode_hands(hands)))
+    return numpy.concatenate(scores) if scores else numpy.zeros(0)
 
 
 def load_hands(filename, player_pos):
-    games = pandas.read_csv(filename, sep='\t')
-    return_list = []
-    for __i, line in games.iterrows():
-        if line.loc['position'] == player_pos:
-            # TODO: should not be calculated here and in extract_sessions
-            return_list.append(float(issgame.hand_score(line.loc['hand'])))
-    return return_list
+    return load_hand_scores(filename, player_pos).tolist()
@@ -1,3 +1,9 @@
+import os
+from typing import Dict, Iterator, List
+
+import numpy
+
+
 def load_sessions(filename, player):
     all_hands = {}
 
@@ -14,3 +20,215 @@ def load_sessions(filename, player):
                 all_hands[player][session].append(float(score))
 
     return all_hands
+
+
+class PlayerSessions():
+    """
+    Read-only dict-like view of the sessions of one player in a SessionStore,
+    mapping session names to lists of scores.
+    """
+
+    def __init__(self, store: 'SessionStore', segments: Dict[str, List[int]]):
+        self._store = store
+        self._segments = segments
+
+    def __getitem__(self, session: str) -> List[float]:
+        scores = []
+        for segment in self._segments[session]:
+            scores.extend(self._store.segment_scores(segment))
+        return scores
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._segments)
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    def __contains__(self, session: str) -> bool:
+        return session in self._segments
+
+    def keys(self):
+        return self._segments.keys()
+
+    def items(self):
+        return ((session, self[session]) for session in self._segments)
+
+    def to_dict(self) -> Dict[str, List[float]]:
+        return dict(self.items())
+
+
+class SessionStore():
+    """
+    Session scores held in contiguous arrays instead of nested dicts. Each
+    session is a segment of 'scores' from offsets[i] to offsets[i + 1], with
+    session_ids[i] and player_ids[i] indexing 'sessions' and 'players'.
+
+    Scores are stored as float32. As scores have at most three decimals,
+    the dict-like access rounds them back to the values of load_sessions().
+    """
+
+    ARRAYS = ('scores', 'offsets', 'session_ids', 'player_ids')
+
+    def __init__(self,
+                 scores: numpy.ndarray,
+                 offsets: numpy.ndarray,
+                 session_ids: numpy.ndarray,
+                 player_ids: numpy.ndarray,
+                 sessions: List[str],
+                 players: List[str]):
+        """
+        Initiates a SessionStore from its arrays.
+
+        Args:
+            scores (numpy.ndarray): float32 scores of all sessions.
+            offsets (numpy.ndarray): int64 start of each session in 'scores'
+                followed by the total number of scores.
+            session_ids (numpy.ndarray): int32 session name of each session.
+            player_ids (numpy.ndarray): int32 player name of each session.
+            sessions (List[str]): Session names.
+            players (List[str]): Player names.
+        """
+        self.scores = scores
+        self.offsets = offsets
+        self.session_ids = session_ids
+        self.player_ids = player_ids
+        self.sessions = sessions
+        self.players = players
+        self._index = None
+
+    @classmethod
+    def from_csv(cls, filename: str) -> 'SessionStore':
+        '''
+        Reads a session file as written by extract_sessions() or
+        extract_all_sessions().
+        '''
+        player_codes = {}
+        session_codes = {}
+        player_ids = []
+        session_ids = []
+        lengths = []
+        scores = []
+        with open(filename) as games:
+            for line in games:
+                player, session, *session_scores = line.rstrip('\n').split(',')
+                player_ids.append(player_codes.setdefault(player,
+                                                          len(player_codes)))
+                session_ids.append(session_codes.setdefault(session,
+                                                            len(session_codes)))
+                lengths.append(len(session_scores))
+                scores.extend(session_scores)
+
+        offsets = numpy.zeros(len(lengths) + 1, dtype=numpy.int64)
+        numpy.cumsum(lengths, out=offsets[1:])
+        scores = numpy.array(scores, dtype=numpy.float64)
+        return cls(scores.astype(numpy.float32),
+                   offsets,
+                   numpy.array(session_ids, dtype=numpy.int32),
+                   numpy.array(player_ids, dtype=numpy.int32),
+                   list(session_codes), list(player_codes))
+
+    def save(self, directory: str) -> None:
+        '''Writes the store as .npy arrays and name lists to 'directory' '''
+        os.makedirs(directory, exist_ok=True)
+        for name in self.ARRAYS:
+            numpy.save(os.path.join(directory, name + '.npy'),
+                       getattr(self, name))
+        for name in ('sessions', 'players'):
+            with open(os.path.join(directory, name + '.txt'), 'w') as values:
+                values.writelines(value + '\n' for value in getattr(self, name))
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> 'SessionStore':
+        '''Loads a store written by save(), memory mapping the arrays'''
+        mmap_mode = 'r' if mmap else None
+        arrays = [numpy.load(os.path.join(directory, name + '.npy'),
+                             mmap_mode=mmap_mode) for name in cls.ARRAYS]
+        names = []
+        for name in ('sessions', 'players'):
+            with open(os.path.join(directory, name + '.txt')) as values:
+                names.append(values.read().splitlines())
+        return cls(*arrays, *names)
+
+    def __len__(self) -> int:
+        '''Returns the number of players'''
+        return len(self._player_index())
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._player_index())
+
+    def __contains__(self, player: str) -> bool:
+        return player in self._player_index()
+
+    def __getitem__(self, player: str) -> PlayerSessions:
+        return PlayerSessions(self, self._player_index()[player])
+
+    def keys(self):
+        return self._player_index().keys()
+
+    def items(self):
+        return ((player, self[player]) for player in self)
+
+    def to_dict(self) -> Dict[str, Dict[str, List[float]]]:
+        '''Returns the nested dict returned by load_sessions()'''
+        return {player: sessions.to_dict() for player, sessions in self.items()}
+
+    def _player_index(self) -> Dict[str, Dict[str, List[int]]]:
+        '''Maps players to their session names and segment numbers'''
+        if self._index is None:
+            self._index = {}
+            for segment, (player, session) in enumerate(zip(
+                    self.player_ids.tolist(), self.session_ids.tolist())):
+                self._index.setdefault(self.players[player], {})\
+                    .setdefault(self.sessions[session], []).append(segment)
+        return self._index
+
+    def segment_scores(self, segment: int) -> List[float]:
+        '''Returns the scores of one segment rounded to three decimals'''
+        start, end = self.offsets[segment], self.offsets[segment + 1]
+        return [round(score, 3) for score in self.scores[start:end].tolist()]
+
+    def lengths(self) -> numpy.ndarray:
+        '''Returns the number of scores in each session'''
+        return numpy.diff(self.offsets)
+
+    def segment_ids(self) -> numpy.ndarray:
+        '''Returns the session number of each score'''
+        return numpy.repeat(numpy.arange(len(self.offsets) - 1),
+                            self.lengths())
+
+    def sums(self) -> numpy.ndarray:
+        '''Returns the sum of the scores of each session'''
+        return numpy.bincount(self.segment_ids(), weights=self.scores,
+                              minlength=len(self.offsets) - 1)
+
+    def means(self) -> numpy.ndarray:
+        '''Returns the mean score of each session, nan for empty sessions'''
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            return self.sums()/self.lengths()
+
+    def variances(self, ddof: int = 1) -> numpy.ndarray:
+        '''Returns the variance of the scores of each session'''
+        deviations = self.scores - numpy.repeat(self.means(), self.lengths())
+        squares = numpy.bincount(self.segment_ids(),
+                                 weights=deviations*deviations,
+                                 minlength=len(self.offsets) - 1)
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            return squares/(self.lengths() - ddof)
+
+
+def load_session_store(filename: str, mmap: bool = True) -> SessionStore:
+    '''
+    Loads session scores into a SessionStore, either from a session file
+    written by extract_sessions() or extract_all_sessions() or from a
+    directory written by SessionStore.save().
+
+    Args:
+        filename (str): Session file or SessionStore directory.
+        mmap (bool, optional): Memory map the arrays of a directory.
+
+    Returns:
+        SessionStore: The session scores.
+    '''
+    if os.path.isdir(filename):
+        return SessionStore.load(filename, mmap)
+    return SessionStore.from_csv(filename)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Checkpoint manifest of an extraction run, stored next to the output as
+<converted_file>.manifest.json, with the ids of the extracted games in
+<converted_file>.ids (one ISS game number per line).
+
+The manifest records how far each input file has been processed and the size
+of the output and id files at that point. Anything written after the last
+checkpoint is truncated when an interrupted run is resumed.
+"""
+
+import json
+import os
+from typing import Dict, Iterable
+
+import numpy
+
+
+class Manifest():
+    """
+    The processed byte offset of each input file and the ids of all games
+    written to an output file.
+    """
+
+    def __init__(self, converted_file: str):
+        """
+        Initiates an empty Manifest for 'converted_file'.
+
+        Args:
+            converted_file (str): The output file of the extraction.
+        """
+        self.converted_file = converted_file
+        self.filename = converted_file + '.manifest.json'
+        self.ids_filename = converted_file + '.ids'
+        self.output_size = 0
+        self.ids_size = 0
+        self.files = {}
+        self._seen = numpy.zeros(0, dtype=numpy.int64)
+
+    @classmethod
+    def load(cls, converted_file: str) -> 'Manifest':
+        '''
+        Loads the manifest of 'converted_file' and truncates the output and id
+        files to their sizes at the last checkpoint. Without a manifest the
+        output is truncated and an empty manifest is returned.
+        '''
+        manifest = cls(converted_file)
+        if not os.path.isfile(manifest.filename):
+            cls.remove(converted_file)
+            if os.path.isfile(converted_file):
+                os.truncate(converted_file, 0)
+            return manifest
+        with open(manifest.filename) as manifest_file:
+            stored = json.load(manifest_file)
+        manifest.output_size = stored['output_size']
+        manifest.ids_size = stored['ids_size']
+        manifest.files = stored['files']
+
+        for filename, size in [(converted_file, manifest.output_size),
+                               (manifest.ids_filename, manifest.ids_size)]:
+            if os.path.isfile(filename) and os.path.getsize(filename) > size:
+                os.truncate(filename, size)
+        if manifest.ids_size:
+            manifest._seen = numpy.unique(
+                numpy.loadtxt(manifest.ids_filename, dtype=numpy.int64,
+                              ndmin=1))
+        return manifest
+
+    @staticmethod
+    def remove(converted_file: str) -> None:
+        '''Deletes the manifest and id files of 'converted_file' '''
+        for filename in [converted_file + '.manifest.json',
+                         converted_file + '.ids']:
+            if os.path.isfile(filename):
+                os.remove(filename)
+
+    @staticmethod
+    def _key(raw_file: str) -> str:
+        return os.path.abspath(raw_file)
+
+    def _entry(self, raw_file: str) -> Dict:
+        status = os.stat(raw_file)
+        return {'size': status.st_size, 'mtime': status.st_mtime,
+                'offset': 0, 'complete': False}
+
+    def offset(self, raw_file: str) -> int:
+        '''
+        Returns the byte offset up to which 'raw_file' was processed, or None
+        if it was processed completely. Files that changed since they were
+        recorded start again at 0.
+        '''
+        entry = self.files.get(self._key(raw_file))
+        current = self._entry(raw_file)
+        if entry is None or entry['size'] != current['size']\
+                or entry['mtime'] != current['mtime']:
+            return 0
+        if entry['complete']:
+            return None
+        return entry['offset']
+
+    def seen(self, game_ids: Iterable[int]) -> numpy.ndarray:
+        '''Returns a boolean array marking ids recorded in earlier runs'''
+        return numpy.isin(numpy.fromiter(game_ids, dtype=numpy.int64),
+                          self._seen)
+
+    def checkpoint(self, raw_file: str, offset: int, complete: bool,
+                   game_ids: Iterable[int]) -> None:
+        '''
+        Records that 'raw_file' was processed up to 'offset' (completely if
+        'complete') and that the games 'game_ids' were written, then stores
+        the manifest. The output file must be flushed before.
+        '''
+        lines = ''.join(str(game_id) + '\n' for game_id in game_ids)
+        with open(self.ids_filename, 'a') as ids_file:
+            ids_file.write(lines)
+        self.ids_size = os.path.getsize(self.ids_filename)
+        self.output_size = os.path.getsize(self.converted_file)
+
+        entry = self._entry(raw_file)
+        entry['offset'] = offset
+        entry['complete'] = complete
+        self.files[self._key(raw_file)] = entry
+
+        temporary = self.filename + '.tmp'
+        with open(temporary, 'w') as manifest_file:
+            json.dump({'output_size': self.output_size,
+                       'ids_size': self.ids_size,
+                       'files': self.files}, manifest_file, indent=1)
+        os.replace(temporary, self.filename)
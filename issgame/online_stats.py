@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Summary statistics of the hand scores accumulated while the raw games are
+read, without writing the converted file or session files first.
+
+Counts, means, and variances are kept per group in arrays and updated once
+per batch: the moments of the batch are computed for each group and merged
+into the running moments with the parallel form of Welford's algorithm
+(Chan et al.). Memory grows with the number of groups, i.e. sessions, not
+with the number of hands.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy
+import pandas
+
+from issgame.cards import encode_hands, hand_score_array
+from issgame.shards import CHUNKSIZE, SHARDSIZE, file_shards, parsed_shards
+from issgame.gameline import GameBatch
+
+
+class RunningMoments():
+    """
+    Count, mean, and sum of squared deviations of the scores of each group,
+    where a group is identified by a tuple of the values of 'keys'.
+    """
+
+    def __init__(self, keys: Tuple[str, ...]):
+        self.keys = keys
+        self._codes: Dict[tuple, int] = {}
+        self.count = numpy.zeros(0, dtype=numpy.int64)
+        self.mean = numpy.zeros(0)
+        self.m2 = numpy.zeros(0)
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def _encode(self, groups: List[tuple]) -> numpy.ndarray:
+        '''Returns the code of each group, adding codes for new groups'''
+        codes = numpy.array([self._codes.setdefault(group, len(self._codes))
+                             for group in groups], dtype=numpy.int64)
+        if len(self._codes) > len(self.count):
+            size = max(len(self._codes), 2*len(self.count))
+            for name in ('count', 'mean', 'm2'):
+                grown = numpy.zeros(size, dtype=getattr(self, name).dtype)
+                grown[:len(getattr(self, name))] = getattr(self, name)
+                setattr(self, name, grown)
+        return codes
+
+    def _merge(self, codes: numpy.ndarray, count: numpy.ndarray,
+               mean: numpy.ndarray, m2: numpy.ndarray) -> None:
+        '''Merges the moments of the groups 'codes' into the running ones'''
+        total = self.count[codes] + count
+        delta = mean - self.mean[codes]
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            weight = numpy.where(total > 0, count/total, 0)
+        self.m2[codes] += m2 + delta*delta*self.count[codes]*weight
+        self.mean[codes] += delta*weight
+        self.count[codes] = total
+
+    def update(self, groups: List[tuple], scores: numpy.ndarray) -> None:
+        '''
+        Adds scores to the running moments.
+
+        Args:
+            groups (List[tuple]): The group of each score.
+            scores (numpy.ndarray): The scores.
+        '''
+        if len(scores) == 0:
+            return
+        codes = self._encode(groups)
+        present, inverse = numpy.unique(codes, return_inverse=True)
+        count = numpy.bincount(inverse)
+        mean = numpy.bincount(inverse, weights=scores)/count
+        deviations = scores - mean[inverse]
+        m2 = numpy.bincount(inverse, weights=deviations*deviations)
+        self._merge(present, count, mean, m2)
+
+    def merge(self, other: 'RunningMoments') -> None:
+        '''Adds the moments of 'other', e.g. from another worker'''
+        groups = list(other._codes)
+        if not groups:
+            return
+        codes = self._encode(groups)
+        others = numpy.array(list(other._codes.values()), dtype=numpy.int64)
+        self._merge(codes, other.count[others], other.mean[others],
+                    other.m2[others])
+
+    def to_frame(self) -> pandas.DataFrame:
+        '''
+        Returns the key columns and n, mean, and var (ddof=1) of each group
+        in order of appearance.
+        '''
+        size = len(self._codes)
+        frame = pandas.DataFrame(list(self._codes), columns=list(self.keys))
+        count = self.count[:size]
+        frame['n'] = count
+        frame['mean'] = self.mean[:size]
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            frame['var'] = self.m2[:size]/(count - 1)
+        return frame
+
+
+class OnlineStats():
+    """
+    Hand score statistics updated batch by batch: moments per player and
+    session, per player, and per position, and a histogram of the scores of
+    each position.
+    """
+
+    def __init__(self):
+        self.sessions = RunningMoments(('player', 'session'))
+        self.players = RunningMoments(('player',))
+        self.positions = RunningMoments(('position',))
+        self._histograms: Dict[Tuple[int, float], int] = {}
+        self.hands = 0
+
+    def add_batch(self, batch: GameBatch,
+                  scores: Optional[numpy.ndarray] = None) -> None:
+        '''
+        Adds the hands of a batch.
+
+        Args:
+            batch (GameBatch): Parsed games.
+            scores (numpy.ndarray, optional): Score of each hand, if already
+                calculated. Defaults to None, using the 'stegen' column of
+                the batch or scoring the hands.
+        '''
+        if len(batch) == 0:
+            return
+        columns = batch.columns()
+        if scores is None:
+            scores = batch.scores.get('stegen')
+        if scores is None:
+            scores = hand_score_array(encode_hands(columns['hand']))
+        players = columns['player']
+        positions = columns['position']
+        self.sessions.update(list(zip(players, columns['session'])), scores)
+        self.players.update([(player,) for player in players], scores)
+        self.positions.update([(position,) for position in positions],
+                              scores)
+        values, counts = numpy.unique(
+            numpy.column_stack([positions, scores]), axis=0,
+            return_counts=True)
+        for (position, score), count in zip(values.tolist(), counts.tolist()):
+            key = (int(position), score)
+            self._histograms[key] = self._histograms.get(key, 0) + count
+        self.hands += len(scores)
+
+    def merge(self, other: 'OnlineStats') -> None:
+        '''Adds the statistics of 'other', e.g. from another worker'''
+        self.sessions.merge(other.sessions)
+        self.players.merge(other.players)
+        self.positions.merge(other.positions)
+        for key, count in other._histograms.items():
+            self._histograms[key] = self._histograms.get(key, 0) + count
+        self.hands += other.hands
+
+    def histogram(self) -> pandas.DataFrame:
+        '''Returns the number of hands per position and score'''
+        frame = pandas.DataFrame(
+            [key + (count,) for key, count in self._histograms.items()],
+            columns=['position', 'score', 'count'])
+        return frame.sort_values(['position', 'score'], ignore_index=True)
+
+    def session_frame(self) -> pandas.DataFrame:
+        '''Returns player, session, n, mean, and var of each session'''
+        return self.sessions.to_frame()
+
+    def player_frame(self) -> pandas.DataFrame:
+        '''Returns player, n, mean, and var of each player'''
+        return self.players.to_frame()
+
+    def position_frame(self) -> pandas.DataFrame:
+        '''Returns position, n, mean, and var of each position'''
+        return self.positions.to_frame().sort_values('position',
+                                                     ignore_index=True)
+
+
+def summarise(raw_files: List[str],
+              chunksize: int = CHUNKSIZE,
+              jobs: int = 1,
+              shardsize: int = SHARDSIZE,
+              date_from: Optional[str] = None,
+              date_to: Optional[str] = None
+              ) -> OnlineStats:
+    '''
+    Reads raw game files once and returns the statistics of all hands,
+    without writing any files. The arguments are those of
+    extract_svg_hands().
+
+    Args:
+        raw_files (List[str]): Input filename strings (.sgv ISS game files).
+        chunksize (int, optional): Number of games parsed at once.
+        jobs (int, optional): Number of processes parsing the input files.
+        shardsize (int, optional): Bytes of input per shard.
+        date_from (str, optional): Only include games dated on or after this
+            date.
+        date_to (str, optional): Only include games dated on or before this
+            date.
+
+    Returns:
+        OnlineStats: The statistics.
+    '''
+    stats = OnlineStats()
+    parsed = parsed_shards(file_shards(raw_files, shardsize), jobs,
+                                   chunksize=chunksize, date_from=date_from,
+                                   date_to=date_to)
+    for __shard, batches in parsed:
+        for batch in batches:
+            stats.add_batch(batch)
+    return stats
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+A pipeline of stages running concurrently in threads, connected by bounded
+queues. A stage that gets ahead of the next one blocks once the queue
+between them is full, so memory stays bounded.
+
+Each stage records the time spent working ('busy') and the time spent
+waiting for input or for room in its output queue ('waiting'). The stage
+with the highest utilisation (busy time over the run time) is the
+bottleneck.
+
+Threads overlap the stages that release the GIL, such as reading and
+decompressing files, NumPy operations, and writing. Pure Python stages share
+one core.
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Iterable, Iterator, List, Optional
+
+import pandas
+
+QUEUE_SIZE = 4
+_END = object()
+
+
+class Stage():
+    """
+    A step of a Pipeline. 'function' is called for every input item and
+    returns one output item or, if 'expand' is True, an iterable of output
+    items.
+    """
+
+    def __init__(self, name: str, function: Callable, expand: bool = False):
+        self.name = name
+        self.function = function
+        self.expand = expand
+        self.items = 0
+        self.busy = 0.0
+        self.waiting = 0.0
+
+
+class Pipeline():
+    """
+    Runs stages concurrently, passing items from stage to stage through
+    queues of at most 'queue_size' items, and reports the time each stage
+    spent working and waiting.
+    """
+
+    def __init__(self, queue_size: int = QUEUE_SIZE):
+        """
+        Initiates a Pipeline.
+
+        Args:
+            queue_size (int, optional): Maximum number of items between two
+                stages. Defaults to QUEUE_SIZE.
+        """
+        self.queue_size = queue_size
+        self.stages: List[Stage] = []
+        self.wall = 0.0
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    def _put(self, stage: Stage, output: queue.Queue, item) -> None:
+        '''Puts 'item' into 'output', waiting for room unless stopped'''
+        start = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                output.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        stage.waiting += time.perf_counter() - start
+
+    def _inputs(self, stage: Stage, inputs: queue.Queue) -> Iterator:
+        '''Yields the items of 'inputs' until the end or a stop'''
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            try:
+                item = inputs.get(timeout=0.1)
+            except queue.Empty:
+                stage.waiting += time.perf_counter() - start
+                continue
+            stage.waiting += time.perf_counter() - start
+            if item is _END:
+                return
+            yield item
+
+    def _process(self, stage: Stage, inputs: Iterable,
+                 output: Optional[queue.Queue]) -> None:
+        '''Applies 'stage' to 'inputs' and passes the results on'''
+        for item in inputs:
+            stage.items += 1
+            start = time.perf_counter()
+            results = stage.function(item)
+            if not stage.expand:
+                results = [results]
+            results = iter(results)
+            while True:
+                try:
+                    result = next(results)
+                except StopIteration:
+                    stage.busy += time.perf_counter() - start
+                    break
+                stage.busy += time.perf_counter() - start
+                if output is not None:
+                    self._put(stage, output, result)
+                start = time.perf_counter()
+            if self._stop.is_set():
+                return
+
+    def _run_stage(self, stage: Stage, inputs: Iterable,
+                   output: queue.Queue) -> None:
+        '''Thread target running all but the last stage'''
+        try:
+            self._process(stage, inputs, output)
+        except BaseException as error:
+            self._error = error
+            self._stop.set()
+        self._put(stage, output, _END)
+
+    def run(self, items: Iterable, stages: List[Stage]) -> None:
+        '''
+        Passes 'items' through 'stages'. All stages but the last run in
+        their own thread, the last stage runs in the calling thread and its
+        results are discarded.
+
+        Args:
+            items (Iterable): Inputs of the first stage.
+            stages (List[Stage]): The stages in order.
+
+        Raises:
+            Exception: The first exception raised by a stage.
+        '''
+        self.stages = stages
+        self._stop.clear()
+        self._error = None
+        start = time.perf_counter()
+
+        threads = []
+        inputs = items
+        for position, stage in enumerate(stages[:-1]):
+            output = queue.Queue(self.queue_size)
+            threads.append(threading.Thread(
+                target=self._run_stage, args=(stage, inputs, output),
+                name='pipeline-' + stage.name, daemon=True))
+            inputs = self._inputs(stages[position + 1], output)
+        for thread in threads:
+            thread.start()
+        try:
+            self._process(stages[-1], inputs, None)
+        except BaseException:
+            self._stop.set()
+            raise
+        finally:
+            for thread in threads:
+                thread.join()
+            self.wall = time.perf_counter() - start
+        if self._error is not None:
+            raise self._error
+
+    def report(self) -> pandas.DataFrame:
+        '''
+        Returns the 'items' processed, 'busy' and 'waiting' seconds, and the
+        'utilisation' (busy share of the run time) of each stage.
+        '''
+        return pandas.DataFrame({
+            'stage': [stage.name for stage in self.stages],
+            'items': [stage.items for stage in self.stages],
+            'busy': [stage.busy for stage in self.stages],
+            'waiting': [stage.waiting for stage in self.stages],
+            'utilisation': [stage.busy/self.wall if self.wall else 0.0
+                            for stage in self.stages],
+        })
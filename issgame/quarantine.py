@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Collection of the input lines rejected by GameLine.parse_many(), so the
+lines dropped from an extraction can be inspected. Each rejected line is
+written to the quarantine file after its reason and a tab, and the number
+of lines per reason is counted.
+"""
+
+import collections
+from typing import Dict, Iterable, Optional, TextIO, Tuple
+
+
+class Quarantine():
+    """
+    Counts rejected lines by reason and, if a filename is given, writes them
+    to that file as '<reason>\\t<line>'.
+    """
+
+    def __init__(self, filename: Optional[str] = None):
+        """
+        Initiates a Quarantine.
+
+        Args:
+            filename (str, optional): File the rejected lines are written
+                to. It is created on the first rejected line. Defaults to
+                None, counting the lines only.
+        """
+        self.filename = filename
+        self.counts = collections.Counter()
+        self._file: Optional[TextIO] = None
+
+    def add(self, rejected: Iterable[Tuple[str, str]]) -> None:
+        '''Adds (reason, line) pairs such as GameBatch.rejected'''
+        for reason, line in rejected:
+            self.counts[reason] += 1
+            if self.filename is None:
+                continue
+            if self._file is None:
+                self._file = open(self.filename, 'w')
+            self._file.write(reason + '\t' + line.rstrip('\r\n') + '\n')
+
+    def total(self) -> int:
+        '''Returns the number of rejected lines'''
+        return sum(self.counts.values())
+
+    def to_dict(self) -> Dict[str, int]:
+        '''Returns the number of rejected lines per reason'''
+        return dict(self.counts)
+
+    def close(self) -> None:
+        '''Closes the quarantine file'''
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> 'Quarantine':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Null distributions of session statistics by resampling the scores of all
+hands. Every replicate draws a session-sized sample, with replacement
+('bootstrap') or without ('permutation'), as one row of a NumPy matrix.
+
+Replicates are drawn in blocks of BLOCKSIZE with a random generator spawned
+per block from the seed, so the result for a seed does not depend on the
+number of processes used.
+"""
+
+import concurrent.futures
+from typing import Callable, Dict, Optional, Union
+
+import numpy
+
+from issgame.hand_distribution import ScoreDistribution
+
+BLOCKSIZE = 1000
+
+
+def _variance(samples: numpy.ndarray, axis: int) -> numpy.ndarray:
+    return numpy.var(samples, axis=axis, ddof=1)
+
+
+# module level functions, so they can be sent to worker processes
+STATISTICS = {
+    'mean': numpy.mean,
+    'var': _variance,
+    'median': numpy.median,
+}
+
+# population of the worker processes, set once per process
+_population = None
+
+
+def _set_population(population) -> None:
+    global _population
+    _population = population
+
+
+def _distinct_indices(size: int,
+                      length: int,
+                      replicates: int,
+                      generator: numpy.random.Generator
+                      ) -> numpy.ndarray:
+    '''
+    Draws a (replicates, length) matrix of indices below 'size' without
+    replacement in each row, every ordered sample equally likely.
+    '''
+    if length > size:
+        raise ValueError('Sessions are longer than the population')
+    if 2*length > size:
+        # a small population: the start of a random order of all indices
+        indices = numpy.tile(numpy.arange(size), (replicates, 1))
+        return generator.permuted(indices, axis=1, out=indices)[:, :length]
+
+    # redraw only the entries equal to an earlier entry of their row; at
+    # most half of the population is drawn, so every round removes at
+    # least half of the repeats on average
+    indices = generator.integers(size, size=(replicates, length))
+    rows = numpy.arange(replicates)
+    while len(rows):
+        order = numpy.argsort(indices[rows], axis=1, kind='stable')
+        ordered = numpy.take_along_axis(indices[rows], order, axis=1)
+        repeated = ordered[:, 1:] == ordered[:, :-1]
+        row_positions, columns = numpy.nonzero(repeated)
+        indices[rows[row_positions], order[row_positions, columns + 1]] = \
+            generator.integers(size, size=len(columns))
+        rows = rows[repeated.any(axis=1)]
+    return indices
+
+
+def _draw(population: Union[numpy.ndarray, ScoreDistribution],
+          length: int,
+          replicates: int,
+          method: str,
+          generator: numpy.random.Generator
+          ) -> numpy.ndarray:
+    '''Draws a (replicates, length) matrix of resampled scores'''
+    if isinstance(population, ScoreDistribution):
+        if method != 'bootstrap':
+            raise ValueError('A distribution can only be bootstrapped')
+        return population.sample((replicates, length), generator)
+
+    if method == 'bootstrap':
+        indices = generator.integers(len(population),
+                                     size=(replicates, length))
+    elif method == 'permutation':
+        indices = _distinct_indices(len(population), length, replicates,
+                                    generator)
+    else:
+        raise ValueError('Unknown resampling method: ' + repr(method))
+    return population[indices]
+
+
+def _block(length: int, replicates: int, method: str, statistic: Callable,
+           seed: numpy.random.SeedSequence) -> numpy.ndarray:
+    '''Computes 'statistic' of one block of replicates in a worker'''
+    generator = numpy.random.default_rng(seed)
+    samples = _draw(_population, length, replicates, method, generator)
+    return statistic(samples, axis=1)
+
+
+class NullDistributions():
+    """
+    Resampled null distributions of a session statistic, cached by session
+    length so they are drawn once and reused for all players.
+    """
+
+    def __init__(self,
+                 population: Union[numpy.ndarray, ScoreDistribution],
+                 replicates: int = 10000,
+                 statistic: Union[str, Callable] = 'mean',
+                 method: str = 'bootstrap',
+                 seed: Optional[int] = None,
+                 jobs: int = 1):
+        """
+        Initiates NullDistributions.
+
+        Args:
+            population (Union[numpy.ndarray, ScoreDistribution]): Scores of all
+                hands, or an exact score distribution to bootstrap from.
+            replicates (int, optional): Replicates per session length.
+            statistic (Union[str, Callable], optional): 'mean', 'var',
+                'median', or a function taking (samples, axis).
+            method (str, optional): 'bootstrap' (with replacement) or
+                'permutation' (without replacement).
+            seed (int, optional): Seed of the random generator.
+            jobs (int, optional): Number of processes drawing the blocks of
+                replicates. Defaults to 1.
+        """
+        if not isinstance(population, ScoreDistribution):
+            population = numpy.asarray(population, dtype=numpy.float64)
+        self.population = population
+        self.replicates = replicates
+        self.statistic = STATISTICS.get(statistic, statistic)
+        self.method = method
+        self.seed = numpy.random.SeedSequence(seed)
+        self.jobs = jobs
+        self._cache: Dict[int, numpy.ndarray] = {}
+
+    def _seeds(self, length: int):
+        '''Returns one seed per block, derived from the seed and length'''
+        blocks = -(-self.replicates//BLOCKSIZE)
+        length_seed = numpy.random.SeedSequence(
+            self.seed.entropy, spawn_key=(length,))
+        return length_seed.spawn(blocks)
+
+    def _blocks(self, length: int):
+        sizes = [min(BLOCKSIZE, self.replicates - start)
+                 for start in range(0, self.replicates, BLOCKSIZE)]
+        return [(length, size, self.method, self.statistic, seed)
+                for size, seed in zip(sizes, self._seeds(length))]
+
+    def draw(self, lengths) -> None:
+        '''Draws the null distributions of all 'lengths' not cached yet'''
+        lengths = sorted(set(int(length) for length in lengths)
+                         - set(self._cache))
+        if not lengths:
+            return
+        blocks = [block for length in lengths for block in self._blocks(length)]
+        if self.jobs > 1:
+            with concurrent.futures.ProcessPoolExecutor(
+                    self.jobs, initializer=_set_population,
+                    initargs=(self.population,)) as executor:
+                results = list(executor.map(_block, *zip(*blocks)))
+        else:
+            _set_population(self.population)
+            results = [_block(*block) for block in blocks]
+
+        start = 0
+        for length in lengths:
+            count = len(self._blocks(length))
+            self._cache[length] = numpy.concatenate(
+                results[start:start + count])
+            start += count
+
+    def get(self, length: int) -> numpy.ndarray:
+        '''Returns the replicates of the statistic for sessions of 'length' '''
+        self.draw([length])
+        return self._cache[int(length)]
+
+    def pvalues(self, lengths, observed, alternative: str = 'two-sided'
+                ) -> numpy.ndarray:
+        '''
+        Calculates p-values of observed session statistics. Two-sided
+        p-values are the share of replicates at least as far from the null
+        mean as the observed value, one-sided ones the share of replicates
+        at least as large ('greater') or as small ('less').
+
+        Args:
+            lengths: Length of each session.
+            observed: Statistic of each session.
+            alternative (str, optional): 'two-sided', 'greater', or 'less'.
+                Defaults to 'two-sided'.
+
+        Returns:
+            numpy.ndarray: A p-value per session.
+        '''
+        if alternative not in ('two-sided', 'greater', 'less'):
+            raise ValueError('Unknown alternative: ' + repr(alternative))
+        lengths = numpy.asarray(lengths, dtype=numpy.int64)
+        observed = numpy.asarray(observed, dtype=numpy.float64)
+        self.draw(numpy.unique(lengths))
+        pvalues = numpy.empty(len(lengths))
+        for length in numpy.unique(lengths).tolist():
+            sessions = lengths == length
+            null = self._cache[length]
+            values = observed[sessions]
+            if alternative == 'two-sided':
+                values = numpy.abs(values - null.mean())
+                null = numpy.abs(null - null.mean())
+            null = numpy.sort(null)
+            if alternative == 'less':
+                extreme = numpy.searchsorted(null, values, side='right')
+            else:
+                extreme = len(null) - numpy.searchsorted(null, values,
+                                                         side='left')
+            pvalues[sessions] = (extreme + 1)/(len(null) + 1)
+        return pvalues
+
+    def save(self, filename: str) -> None:
+        '''Writes the cached null distributions to an .npz file'''
+        numpy.savez(filename, **{str(length): replicates
+                                 for length, replicates in self._cache.items()})
+
+    def load(self, filename: str) -> None:
+        '''Adds null distributions written by save() to the cache'''
+        with numpy.load(filename) as stored:
+            for length in stored.files:
+                self._cache[int(length)] = stored[length]
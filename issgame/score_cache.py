@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy
+
+from issgame.cards import encode_hand, encode_hands, hand_score_array
+
+MAXSIZE = 2**18
+
+
+class ScoreCache():
+    """
+    A bounded cache of hand scores keyed on the card mask of a hand, so the
+    same cards in any order share one entry. The masks are held in a sorted
+    array and looked up with numpy.searchsorted(). The least recently used
+    entries are evicted once the cache holds more than 'maxsize' hands.
+    """
+
+    def __init__(self, maxsize: int = MAXSIZE, filename: Optional[str] = None):
+        """
+        Initiates a ScoreCache, loading the scores stored in 'filename' if
+        the file exists.
+
+        Args:
+            maxsize (int, optional): Maximum number of cached hands.
+            filename (str, optional): .npz file used by load() and save().
+        """
+        self.maxsize = maxsize
+        self.filename = filename
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._masks = numpy.zeros(0, dtype=numpy.uint32)
+        self._scores = numpy.zeros(0, dtype=numpy.float64)
+        # the number of the lookup that last used each entry
+        self._used = numpy.zeros(0, dtype=numpy.int64)
+        self._lookups = 0
+        if filename is not None and os.path.isfile(filename):
+            self.load(filename)
+
+    def __len__(self) -> int:
+        return len(self._masks)
+
+    def __contains__(self, hand: str) -> bool:
+        return bool(self._find(numpy.array([encode_hand(hand)],
+                                           dtype=numpy.uint32))[1][0])
+
+    def _find(self, keys: numpy.ndarray
+              ) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        '''Returns the positions of 'keys' and whether they are cached'''
+        positions = numpy.searchsorted(self._masks, keys)
+        found = positions < len(self._masks)
+        found[found] = self._masks[positions[found]] == keys[found]
+        return positions, found
+
+    def _store(self, keys: numpy.ndarray, scores: numpy.ndarray) -> None:
+        '''Adds new 'keys' and evicts the least recently used entries'''
+        masks = numpy.concatenate([self._masks, keys])
+        order = numpy.argsort(masks, kind='stable')
+        self._masks = masks[order]
+        self._scores = numpy.concatenate([self._scores, scores])[order]
+        self._used = numpy.concatenate([
+            self._used, numpy.full(len(keys), self._lookups)])[order]
+
+        evicted = len(self._masks) - self.maxsize
+        if evicted > 0:
+            kept = numpy.sort(numpy.argsort(self._used, kind='stable')
+                              [evicted:])
+            self._masks = self._masks[kept]
+            self._scores = self._scores[kept]
+            self._used = self._used[kept]
+            self.evictions += evicted
+
+    def score(self, hand: str) -> float:
+        '''
+        Returns hand_score(hand), calculating it only if the hand is not
+        cached yet.
+
+        Args:
+            hand (str): A hand as returned by GameLine.get_hand()
+
+        Returns:
+            float: The score of the hand.
+        '''
+        return float(self.score_many([hand])[0])
+
+    def score_many(self, hands: Iterable[str]) -> numpy.ndarray:
+        '''
+        Returns the scores of many hands, looking them up at once and
+        calculating the scores of the hands that are not cached yet in one
+        call of hand_score_array().
+
+        Args:
+            hands (Iterable[str]): Hands of equal length.
+
+        Returns:
+            numpy.ndarray: A float64 score for each hand.
+        '''
+        masks = encode_hands(hands)
+        keys, index = numpy.unique(masks, return_inverse=True)
+        self._lookups += 1
+        positions, found = self._find(keys)
+
+        scores = numpy.empty(len(keys))
+        scores[found] = self._scores[positions[found]]
+        self._used[positions[found]] = self._lookups
+        missing = ~found
+        if missing.any():
+            scores[missing] = hand_score_array(keys[missing])
+            self._store(keys[missing], scores[missing])
+
+        self.misses += int(missing.sum())
+        self.hits += len(masks) - int(missing.sum())
+        return scores[index]
+
+    def stats(self) -> Dict[str, int]:
+        '''Returns the hit, miss, and eviction counters and the cache size'''
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._masks),
+        }
+
+    def clear(self) -> None:
+        '''Removes all cached scores and resets the counters'''
+        self._masks = self._masks[:0]
+        self._scores = self._scores[:0]
+        self._used = self._used[:0]
+        self.hits = self.misses = self.evictions = 0
+
+    def save(self, filename: Optional[str] = None) -> None:
+        '''Writes the cached scores to 'filename' or the cache's own file'''
+        filename = filename or self.filename
+        numpy.savez(filename, masks=self._masks, scores=self._scores)
+
+    def load(self, filename: Optional[str] = None) -> None:
+        '''Adds the scores stored by save() to the cache'''
+        with numpy.load(filename or self.filename) as stored:
+            masks = stored['masks'].astype(numpy.uint32)
+            scores = stored['scores'].astype(numpy.float64)
+        new = ~self._find(masks)[1]
+        self._store(masks[new], scores[new])
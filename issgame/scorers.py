@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registry of hand evaluation models, computed for every hand in the same
+pass as the extraction (see the 'scorers' argument of extract_svg_hands).
+
+Each scorer maps the card masks of a batch of hands to one or more columns
+of float64 values. The built-in scorers are:
+
+    stegen        the Stegen score of hand_score()
+    null          the cards of a hand that can be forced to take a trick in
+                  a null game, 0 for a safe null hand
+    stegen_skat   the Stegen score of the declarer's hand after picking up
+                  the skat and discarding the best two cards, NaN for the
+                  other players and for games that were passed in
+    suits         the Stegen score for each game type: stegen_D, stegen_H,
+                  stegen_S, stegen_C, and stegen_G for the grand
+
+Further models are added with register_scorer().
+"""
+
+import itertools
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, \
+    Tuple
+
+import numpy
+
+from issgame.cards import SUITS, encode_hands, hand_score_array, \
+    suit_score_array
+from issgame.gameline import GameBatch
+
+
+class ScoringInput(NamedTuple):
+    """
+    The hands of a batch as passed to the scorers, one entry per row:
+
+    hands: uint32 card mask of the hand
+    skats: uint32 card mask of the skat of the game
+    declarers: Whether the player is the declarer of the game, None unless
+        a scorer needs it
+    """
+    hands: numpy.ndarray
+    skats: numpy.ndarray
+    declarers: Optional[numpy.ndarray]
+
+
+class Scorer(NamedTuple):
+    """
+    A registered model: the names of its columns, the function returning
+    an array of one row per hand and one column per name, and whether the
+    function needs the declarers.
+    """
+    columns: Tuple[str, ...]
+    function: Callable[[ScoringInput], numpy.ndarray]
+    declarer: bool = False
+
+
+SCORERS: Dict[str, Scorer] = {}
+
+
+def register_scorer(name: str,
+                    columns: Sequence[str],
+                    function: Callable[[ScoringInput], numpy.ndarray],
+                    declarer: bool = False
+                    ) -> None:
+    '''
+    Adds a model to the registry, replacing any model of the same name.
+
+    Args:
+        name (str): Name used to select the model.
+        columns (Sequence[str]): Names of the output columns.
+        function (Callable[[ScoringInput], numpy.ndarray]): Returns the
+            values of the columns for the hands, as an array of one row per
+            hand, or a 1-dimensional array for a single column.
+        declarer (bool, optional): Whether 'function' uses the declarers,
+            which requires parsing the moves of each game. Defaults to False.
+    '''
+    SCORERS[name] = Scorer(tuple(columns), function, declarer)
+
+
+def score_columns(names: Sequence[str]) -> List[str]:
+    '''
+    Returns the output columns of the scorers 'names'.
+
+    Raises:
+        ValueError: If a scorer is not registered.
+    '''
+    columns = []
+    for name in names:
+        if name not in SCORERS:
+            raise ValueError('Unknown scorer: ' + repr(name))
+        columns.extend(SCORERS[name].columns)
+    return columns
+
+
+def score_batch(batch: GameBatch, names: Sequence[str]
+                ) -> Dict[str, numpy.ndarray]:
+    '''
+    Evaluates the hands of a batch with the scorers 'names'.
+
+    Args:
+        batch (GameBatch): Parsed games, with their GameLine objects kept as
+            by GameLine.parse_many(lines, keep_games=True).
+        names (Sequence[str]): Registered scorers.
+
+    Raises:
+        ValueError: If a scorer is not registered or the batch does not keep
+        its games.
+
+    Returns:
+        Dict[str, numpy.ndarray]: The float64 values of each column, one per
+        row of the batch.
+    '''
+    columns = score_columns(names)
+    if batch.games is None:
+        raise ValueError('Scoring needs the games, see parse_many()')
+    scorers = [SCORERS[name] for name in names]
+    hands = encode_hands(batch.columns()['hand'])
+    skats = numpy.repeat(encode_hands(game.get_skat()
+                                      for game in batch.games), 3)
+    declarers = None
+    if any(scorer.declarer for scorer in scorers):
+        declarer = numpy.array([game.get_declarer() or 0
+                                for game in batch.games])
+        declarers = numpy.asarray(batch.position[:len(batch)])\
+            == numpy.repeat(declarer, 3)
+    scoring_input = ScoringInput(hands, skats, declarers)
+
+    values = [numpy.asarray(scorer.function(scoring_input), dtype=float)
+              .reshape(len(batch), -1) for scorer in scorers]
+    if not values:
+        return {}
+    return dict(zip(columns, numpy.concatenate(values, axis=1).T))
+
+
+def _null_risk(suit: int) -> int:
+    '''
+    Counts the cards of an 8-bit suit pattern, in null order from 7 to ace,
+    that the opponents can force to take a trick: every card ranked higher
+    than twice its position among the cards held, so 7, 7-9, and 7-9-J are
+    safe, but a single 8 is not.
+    '''
+    ranks = [rank for rank in range(8) if suit & 1 << rank]
+    return sum(rank > 2*position for position, rank in enumerate(ranks))
+
+
+_NULL_RISK = numpy.array([_null_risk(suit) for suit in range(256)],
+                         dtype=numpy.int8)
+
+# the 66 ways of discarding two of twelve cards
+_DISCARDS = numpy.array(list(itertools.combinations(range(12), 2)))
+
+
+def null_scores(hands: numpy.ndarray) -> numpy.ndarray:
+    '''Returns the null risk of each card mask, 0 for a safe null hand'''
+    hands = numpy.ascontiguousarray(hands, dtype=numpy.uint32)
+    suits = hands.view(numpy.uint8).reshape(hands.shape + (4,))
+    return _NULL_RISK[suits].sum(axis=-1, dtype=numpy.int64)
+
+
+def skat_scores(hands: numpy.ndarray, skats: numpy.ndarray) -> numpy.ndarray:
+    '''
+    Returns the best Stegen score of the ten of the twelve cards of each
+    hand and skat.
+    '''
+    masks = numpy.asarray(hands, dtype=numpy.uint32)\
+        | numpy.asarray(skats, dtype=numpy.uint32)
+    if len(masks) == 0:
+        return numpy.zeros(0)
+    bits = numpy.unpackbits(masks.view(numpy.uint8).reshape(-1, 4), axis=1,
+                            bitorder='little')
+    cards = numpy.nonzero(bits)[1].reshape(len(masks), 12)
+    discarded = numpy.left_shift(numpy.uint32(1),
+                                 cards[:, _DISCARDS].astype(numpy.uint32))
+    kept = masks[:, numpy.newaxis] & ~numpy.bitwise_or.reduce(discarded,
+                                                              axis=2)
+    return hand_score_array(kept).max(axis=1)
+
+
+def _declarer_skat_scores(scoring_input: ScoringInput) -> numpy.ndarray:
+    '''Scores the declarers with skat_scores(), NaN for other players'''
+    scores = numpy.full(len(scoring_input.hands), numpy.nan)
+    declarers = scoring_input.declarers
+    scores[declarers] = skat_scores(scoring_input.hands[declarers],
+                                    scoring_input.skats[declarers])
+    return scores
+
+
+register_scorer('stegen', ['stegen'],
+                lambda scoring_input: hand_score_array(scoring_input.hands))
+register_scorer('null', ['null'],
+                lambda scoring_input: null_scores(scoring_input.hands))
+register_scorer('stegen_skat', ['stegen_skat'], _declarer_skat_scores,
+                declarer=True)
+register_scorer('suits', ['stegen_' + game for game in SUITS + 'G'],
+                lambda scoring_input: suit_score_array(scoring_input.hands))
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sessions split by the time between games rather than by calendar day.
+
+GameLine.get_session() keys a session by the date and the three players,
+so all sittings of a group on one day form one session and a sitting over
+midnight forms two. sessionize() instead orders the games of each group of
+three players by their full DT timestamp and starts a new session whenever
+the group was idle for longer than a gap. Sessions are numbered with
+compact integers, and a mapping table relates them to the date keys.
+"""
+
+from typing import Tuple
+
+import numpy
+import pandas
+
+IDLE_GAP = 3600
+
+_DATE_WIDTH = len('2021-04-30')
+# the date and separator in front of the players of a session key
+_DATE_PREFIX = _DATE_WIDTH + 1
+# the DT tag at the end of a game id, and its time zone
+_TIME_WIDTH = len('2021-04-30/01:07:29/UTC')
+_ZONE_WIDTH = len('/UTC')
+
+
+def game_times(ids) -> numpy.ndarray:
+    '''
+    Returns the timestamps of game ids as written by extract_svg_hands, e.g.
+    6997010_2021-04-30/01:07:29/UTC, as datetime64[s] values.
+    '''
+    # with a T in place of the slash after the date, the DT tag without
+    # its time zone is an ISO time that numpy parses
+    times = pandas.Series(ids, dtype=object).str[-_TIME_WIDTH:-_ZONE_WIDTH]
+    chars = numpy.array(times.to_numpy(), dtype=bytes)
+    if chars.dtype.itemsize != _TIME_WIDTH - _ZONE_WIDTH:
+        raise ValueError('Game ids do not end in DT tags')
+    chars = chars.view(numpy.uint8).reshape(len(chars), -1).copy()
+    chars[:, _DATE_WIDTH] = ord('T')
+    return chars.view('S{:d}'.format(chars.shape[1])).ravel()\
+        .astype('datetime64[s]')
+
+
+def sessionize(games: pandas.DataFrame, gap: float = IDLE_GAP
+               ) -> Tuple[numpy.ndarray, pandas.DataFrame]:
+    '''
+    Splits the games of each group of three players into sessions at idle
+    gaps, in one sort of all rows.
+
+    Args:
+        games (pandas.DataFrame): Rows with the id and session columns of
+            the output of extract_svg_hands, e.g. load_columnar().to_frame()
+            or the .tsv file read with pandas.
+        gap (float, optional): Seconds between two games of a group after
+            which a new session starts. Defaults to IDLE_GAP, an hour.
+
+    Returns:
+        Tuple[numpy.ndarray, pandas.DataFrame]: The int32 session id of each
+        row, and a mapping table with a row per session id and date key
+        (key) it covers, with the columns session_id, key, players (the old
+        key without the date), start and end (first and last game time), and
+        games.
+    '''
+    ids = games['id'].to_numpy()
+    keys = games['session'].to_numpy()
+    if len(ids) == 0:
+        return numpy.zeros(0, dtype=numpy.int32), pandas.DataFrame(
+            columns=['session_id', 'key', 'players', 'start', 'end',
+                     'games'])
+
+    game_codes, game_ids = pandas.factorize(ids)
+    times = game_times(game_ids)[game_codes]
+    # the group of each date key, the players without the date
+    key_codes, key_names = pandas.factorize(keys)
+    key_groups, groups = pandas.factorize(
+        pandas.Series(key_names, dtype=object).str[_DATE_PREFIX:])
+    group_codes = key_groups[key_codes]
+
+    # rows by group, time, and game; a session starts at a new group or
+    # after an idle gap
+    rows = numpy.lexsort((game_codes, times, group_codes))
+    sorted_groups = group_codes[rows]
+    seconds = times[rows].astype(numpy.int64)
+    starts = numpy.ones(len(rows), dtype=bool)
+    starts[1:] = (sorted_groups[1:] != sorted_groups[:-1])\
+        | (numpy.diff(seconds) > gap)
+    session_ids = numpy.empty(len(rows), dtype=numpy.int32)
+    session_ids[rows] = numpy.cumsum(starts) - 1
+
+    pairs = pandas.DataFrame({
+        'session_id': session_ids,
+        'key_code': key_codes,
+        'time': times,
+        'game': game_codes,
+    })
+    mapping = pairs.groupby(['session_id', 'key_code'], sort=True).agg(
+        start=('time', 'min'), end=('time', 'max'),
+        games=('game', 'nunique')).reset_index()
+    mapping.insert(1, 'key', numpy.asarray(key_names,
+                                           dtype=object)[mapping['key_code']])
+    session_groups = sorted_groups[starts]
+    mapping.insert(2, 'players', numpy.asarray(groups, dtype=object)[
+        session_groups[mapping['session_id']]])
+    return session_ids, mapping.drop(columns='key_code')
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reading of ISS game files in shards, shared by the extraction and by the
+passes that only count or index games (issgame.online_stats,
+issgame.fairness, issgame.duplicates).
+
+Plain files are split into byte ranges at line boundaries that processes
+read independently. Compressed files (.bz2, .gz, .xz) cannot be entered at
+an offset and are a single shard, read in chunks of lines as they are
+decompressed.
+"""
+
+import bz2
+import collections
+import concurrent.futures
+import functools
+import gzip
+import itertools
+import lzma
+import os
+from typing import BinaryIO, Callable, Iterable, Iterator, List, NamedTuple, \
+    Optional, Sequence
+
+from issgame.gameline import GameBatch, GameLine
+from issgame.manifest import Manifest
+from issgame.scorers import score_batch
+
+CHUNKSIZE = 10000
+SHARDSIZE = 2**25
+BLOCKSIZE = 2**20
+
+COMPRESSED_OPENERS = {
+    '.bz2': bz2.open,
+    '.gz': gzip.open,
+    '.xz': lzma.open,
+}
+
+
+class Shard(NamedTuple):
+    """
+    A byte range of an input file. A shard holds every line that starts
+    within [start, end), so consecutive shards split a file at line
+    boundaries. Compressed files are a single shard with end None.
+    """
+    filename: str
+    start: int
+    end: Optional[int]
+
+
+def open_raw(filename: str) -> BinaryIO:
+    '''Opens 'filename' for binary reading, decompressing .bz2, .gz, .xz'''
+    opener = COMPRESSED_OPENERS.get(os.path.splitext(filename)[1], open)
+    return opener(filename, 'rb')
+
+
+def file_shards(raw_files: List[str],
+                shardsize: int,
+                manifest: Optional[Manifest] = None
+                ) -> Iterator[Shard]:
+    '''
+    Splits the input files into byte ranges of about 'shardsize' bytes,
+    starting after the part of each file that 'manifest' records as done.
+    '''
+    for raw_file in raw_files:
+        offset = 0
+        if manifest is not None:
+            offset = manifest.offset(raw_file)
+            if offset is None:
+                continue
+        if os.path.splitext(raw_file)[1] in COMPRESSED_OPENERS:
+            # compressed streams cannot be entered at an arbitrary offset
+            yield Shard(raw_file, 0, None)
+            continue
+        size = os.path.getsize(raw_file)
+        for start in range(offset, max(size, offset + 1), shardsize):
+            yield Shard(raw_file, start, min(start + shardsize, size))
+
+
+def read_lines(shard: Shard) -> Iterator[str]:
+    '''
+    Reads the non-empty lines starting within the byte range of 'shard' with
+    the line endings removed.
+    '''
+    with open_raw(shard.filename) as games:
+        position = shard.start
+        end = shard.end
+        if end is None:
+            end = float('inf')
+        if position > 0:
+            # skip the line that started in the previous shard
+            games.seek(position - 1)
+            position += len(games.readline()) - 1
+        while position < end:
+            line = games.readline()
+            if not line:
+                return
+            position += len(line)
+            line = line.rstrip(b'\r\n')
+            if line:
+                yield line.decode('utf-8')
+
+
+def in_date_range(line: str,
+                  date_from: Optional[str],
+                  date_to: Optional[str]
+                  ) -> bool:
+    '''
+    Checks the raw DT tag of 'line' against the date range without parsing
+    the line. The bounds are compared as prefixes of the tag, so date_to
+    '2019' includes all of 2019 and date_from '2019-06' starts in June.
+    '''
+    start = line.find(']DT[') + 4
+    if start == 3:
+        return False
+    if date_from is not None\
+            and line[start:start + len(date_from)] < date_from:
+        return False
+    if date_to is not None\
+            and line[start:start + len(date_to)] > date_to:
+        return False
+    return True
+
+
+def read_chunks(shard: Shard,
+                chunksize: int,
+                date_from: Optional[str] = None,
+                date_to: Optional[str] = None
+                ) -> Iterator[List[str]]:
+    '''Reads the lines of 'shard' in chunks of at most chunksize lines'''
+    lines = read_lines(shard)
+    if date_from is not None or date_to is not None:
+        lines = (line for line in lines
+                 if in_date_range(line, date_from, date_to))
+    while True:
+        chunk = list(itertools.islice(lines, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_chunk(lines: List[str], scorers: Sequence[str] = ()
+                ) -> GameBatch:
+    '''Parses 'lines' into a batch with the columns of 'scorers' '''
+    if not scorers:
+        return GameLine.parse_many(lines)
+    batch = GameLine.parse_many(lines, keep_games=True)
+    batch.scores = score_batch(batch, scorers)
+    # the parsed games are not needed beyond scoring
+    batch.games = None
+    return batch
+
+
+def parse_shard(shard: Shard,
+                chunksize: int,
+                date_from: Optional[str] = None,
+                date_to: Optional[str] = None,
+                scorers: Sequence[str] = ()
+                ) -> Iterator[GameBatch]:
+    '''Parses the lines of 'shard' into batches of at most chunksize games'''
+    for chunk in read_chunks(shard, chunksize, date_from, date_to):
+        yield parse_chunk(chunk, scorers)
+
+
+def map_ordered(function: Callable, items: Iterable,
+                executor: concurrent.futures.Executor, window: int
+                ) -> Iterator:
+    '''
+    Like executor.map() but keeps at most 'window' items in flight, so
+    results are not buffered without bound if the consumer is slow.
+    '''
+    pending = collections.deque()
+    for item in items:
+        pending.append(executor.submit(function, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _shard_tasks(shards: Iterable[Shard], chunksize: int,
+                 date_from: Optional[str] = None,
+                 date_to: Optional[str] = None
+                 ) -> Iterator[tuple]:
+    '''
+    Yields (number, shard, lines) work items for the processes. A file shard
+    is one item that a process reads itself (lines None). A compressed file
+    is a single shard, so it is decompressed here and sent as one item per
+    chunk, and no process holds more than a chunk of it.
+    '''
+    for number, shard in enumerate(shards):
+        if shard.end is not None:
+            yield number, shard, None
+            continue
+        for __shard, lines, __last in shard_chunks(
+                shard, chunksize=chunksize, date_from=date_from,
+                date_to=date_to):
+            yield number, shard, lines
+
+
+def _parse_task(task: tuple, scorers: Sequence[str] = (), **options
+                ) -> tuple:
+    '''Parses a work item of _shard_tasks() in a process'''
+    number, shard, lines = task
+    if lines is None:
+        batches = list(parse_shard(shard, scorers=scorers, **options))
+    else:
+        batches = [parse_chunk(lines, scorers)]
+    return number, shard, batches
+
+
+def parsed_shards(shards: Iterable[Shard], jobs: int, **options
+                  ) -> Iterator[tuple]:
+    '''
+    Parses 'shards' with 'jobs' processes, yielding each shard with an
+    iterator of its batches in input order. The batches are parsed while
+    they are consumed, so a compressed file is never held in memory.
+    '''
+    if jobs <= 1:
+        for shard in shards:
+            yield shard, parse_shard(shard, **options)
+        return
+    scorers = options.pop('scorers', ())
+    parse_task = functools.partial(_parse_task, scorers=scorers,
+                                   chunksize=options['chunksize'],
+                                   date_from=options.get('date_from'),
+                                   date_to=options.get('date_to'))
+    with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+        results = map_ordered(parse_task, _shard_tasks(shards, **options),
+                              executor, 2*jobs)
+        for __number, group in itertools.groupby(
+                results, key=lambda result: result[0]):
+            first = next(group)
+            yield first[1], itertools.chain.from_iterable(
+                batches for __number, __shard, batches
+                in itertools.chain([first], group))
+
+
+def shard_chunks(shard: Shard, **options) -> Iterator[tuple]:
+    '''
+    Reads 'shard' in chunks, yielding (shard, lines, last) where 'last'
+    marks the last chunk. A shard without lines yields one empty chunk.
+    '''
+    chunks = read_chunks(shard, **options)
+    chunk = next(chunks, [])
+    for next_chunk in chunks:
+        yield shard, chunk, False
+        chunk = next_chunk
+    yield shard, chunk, True
+
+
+def read_blocks(shard: Shard, blocksize: int = BLOCKSIZE
+                ) -> Iterator[tuple]:
+    '''
+    Reads the raw lines starting within the byte range of 'shard' in blocks
+    of about 'blocksize' bytes that end at a line boundary, yielding
+    (shard, block, last) where 'last' marks the last block. A shard without
+    lines yields one empty block. The blocks are decompressed but not split
+    into lines, see split_block().
+    '''
+    with open_raw(shard.filename) as games:
+        position = shard.start
+        end = shard.end
+        if end is None:
+            end = float('inf')
+        if position > 0:
+            # skip the line that started in the previous shard
+            games.seek(position - 1)
+            position += len(games.readline()) - 1
+        block = b''
+        while position < end:
+            next_block = games.read(int(min(blocksize, end - position)))
+            if not next_block:
+                break
+            if not next_block.endswith(b'\n'):
+                # complete the last line, which started within the shard
+                next_block += games.readline()
+            position += len(next_block)
+            if block:
+                yield shard, block, False
+            block = next_block
+        yield shard, block, True
+
+
+def split_block(item: tuple,
+                chunksize: int,
+                date_from: Optional[str] = None,
+                date_to: Optional[str] = None
+                ) -> Iterator[tuple]:
+    '''
+    Splits a (shard, block, last) item of read_blocks() into the non-empty
+    lines within the date range, yielding (shard, lines, last) chunks of at
+    most chunksize lines like shard_chunks(). Only the last chunk of the last
+    block is marked 'last', and the last block yields at least one chunk.
+    '''
+    shard, block, last = item
+    lines = [line.decode('utf-8') for line in
+             (line.rstrip(b'\r') for line in block.split(b'\n')) if line]
+    if date_from is not None or date_to is not None:
+        lines = [line for line in lines
+                 if in_date_range(line, date_from, date_to)]
+    starts = range(0, max(len(lines), 1 if last else 0), chunksize)
+    for start in starts:
+        yield shard, lines[start:start + chunksize], \
+            last and start == starts[-1]
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batched tests of the mean session scores against the scores of all hands.
+
+The moments of the population of all hands are calculated once; the Welch
+t-test of every session of every player in a SessionStore then only needs
+the moments of each session, which are computed as segment reductions.
+"""
+
+from typing import Callable, NamedTuple, Optional
+
+import numpy
+import pandas
+import scipy.stats
+
+from issgame.hand_distribution import ScoreDistribution
+from issgame.load_sessions import SessionStore
+
+
+class Moments(NamedTuple):
+    """Size, mean, and sample variance (ddof=1) of a set of scores"""
+    n: float
+    mean: float
+    var: float
+
+
+def population_moments(scores: numpy.ndarray,
+                       transform: Optional[Callable] = None) -> Moments:
+    '''
+    Calculates the moments of a sample of scores, e.g. of load_hands().
+
+    Args:
+        scores (numpy.ndarray): Scores of all hands.
+        transform (Callable, optional): Applied to the scores first, e.g.
+            numpy.sqrt.
+
+    Returns:
+        Moments: The size, mean, and variance of the scores.
+    '''
+    scores = numpy.asarray(scores, dtype=numpy.float64)
+    if transform is not None:
+        scores = transform(scores)
+    return Moments(len(scores), float(scores.mean()),
+                   float(scores.var(ddof=1)))
+
+
+def distribution_moments(distribution: ScoreDistribution,
+                         transform: Optional[Callable] = None) -> Moments:
+    '''
+    Calculates the moments of an exact score distribution such as
+    load_hand_score_distribution().
+
+    Args:
+        distribution (ScoreDistribution): The distribution.
+        transform (Callable, optional): Applied to the scores first.
+
+    Returns:
+        Moments: The number of hands, mean, and variance of the scores.
+    '''
+    scores = distribution.scores
+    if transform is not None:
+        scores = transform(scores)
+    mean = float(numpy.dot(scores, distribution.probabilities))
+    squares = float(numpy.dot((scores - mean)**2, distribution.counts))
+    return Moments(distribution.total, mean, squares/(distribution.total - 1))
+
+
+def session_moments(store: SessionStore,
+                    transform: Optional[Callable] = None) -> pandas.DataFrame:
+    '''
+    Calculates the size, mean, and sample variance of every session.
+
+    Args:
+        store (SessionStore): Session scores.
+        transform (Callable, optional): Applied to the scores first.
+
+    Returns:
+        pandas.DataFrame: player, session, n, mean, and var per session.
+    '''
+    # float32 scores back to the three decimals they were written with
+    scores = numpy.round(numpy.asarray(store.scores, dtype=numpy.float64), 3)
+    if transform is not None:
+        scores = transform(scores)
+    lengths = store.lengths()
+    segments = store.segment_ids()
+    sessions = len(lengths)
+
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        means = numpy.bincount(segments, weights=scores,
+                               minlength=sessions)/lengths
+        deviations = scores - numpy.repeat(means, lengths)
+        variances = numpy.bincount(segments, weights=deviations**2,
+                                   minlength=sessions)/(lengths - 1)
+
+    players = numpy.asarray(store.players, dtype=object)
+    session_names = numpy.asarray(store.sessions, dtype=object)
+    return pandas.DataFrame({
+        'player': players[store.player_ids],
+        'session': session_names[store.session_ids],
+        'n': lengths,
+        'mean': means,
+        'var': variances,
+    })
+
+
+def welch_ttest(moments: pandas.DataFrame,
+                population: Moments) -> pandas.DataFrame:
+    '''
+    Calculates Welch's t-test of the mean of each session against the
+    population, as scipy.stats.ttest_ind(session, population,
+    equal_var=False) does for a single session.
+
+    Args:
+        moments (pandas.DataFrame): n, mean, and var per session as returned
+            by session_moments().
+        population (Moments): Moments of all hands.
+
+    Returns:
+        pandas.DataFrame: 'moments' with the columns t, df, and p added.
+    '''
+    n = moments['n'].to_numpy(dtype=numpy.float64)
+    session_error = moments['var'].to_numpy()/n
+    population_error = population.var/population.n
+
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        error = session_error + population_error
+        t = (moments['mean'].to_numpy() - population.mean)/numpy.sqrt(error)
+        df = error**2/(session_error**2/(n - 1)
+                       + population_error**2/(population.n - 1))
+    tested = moments.copy()
+    tested['t'] = t
+    tested['df'] = df
+    tested['p'] = 2*scipy.stats.t.sf(numpy.abs(t), df)
+    return tested
+
+
+def holm(pvalues: numpy.ndarray) -> numpy.ndarray:
+    '''Returns the Holm-Bonferroni adjusted p-values in input order'''
+    pvalues = numpy.asarray(pvalues, dtype=numpy.float64)
+    order = numpy.argsort(pvalues, kind='stable')
+    m = len(pvalues)
+    adjusted = numpy.maximum.accumulate(
+        (m - numpy.arange(m))*pvalues[order])
+    result = numpy.empty(m)
+    result[order] = numpy.minimum(adjusted, 1)
+    return result
+
+
+def benjamini_hochberg(pvalues: numpy.ndarray) -> numpy.ndarray:
+    '''Returns the Benjamini-Hochberg adjusted p-values in input order'''
+    pvalues = numpy.asarray(pvalues, dtype=numpy.float64)
+    order = numpy.argsort(pvalues, kind='stable')[::-1]
+    m = len(pvalues)
+    adjusted = numpy.minimum.accumulate(
+        m/numpy.arange(m, 0, -1)*pvalues[order])
+    result = numpy.empty(m)
+    result[order] = numpy.minimum(adjusted, 1)
+    return result
+
+
+def adjust_pvalues(pvalues: numpy.ndarray, method: str = 'holm'
+                   ) -> numpy.ndarray:
+    '''
+    Adjusts p-values for multiple testing.
+
+    Args:
+        pvalues (numpy.ndarray): The p-values.
+        method (str, optional): 'holm' or 'fdr_bh' (Benjamini-Hochberg), as
+            named by statsmodels.stats.multitest.multipletests.
+
+    Returns:
+        numpy.ndarray: Adjusted p-values in input order.
+    '''
+    if method == 'holm':
+        return holm(pvalues)
+    if method == 'fdr_bh':
+        return benjamini_hochberg(pvalues)
+    raise ValueError('Unknown correction: ' + repr(method))
+
+
+def session_tests(store: SessionStore,
+                  population: Moments,
+                  min_length: int = 10,
+                  method: str = 'holm',
+                  alpha: float = 0.05,
+                  transform: Optional[Callable] = None
+                  ) -> pandas.DataFrame:
+    '''
+    Tests the mean score of every session of every player in 'store' against
+    the population with Welch's t-test and corrects for multiple testing.
+
+    Args:
+        store (SessionStore): Session scores.
+        population (Moments): Moments of all hands, with the same transform
+            applied.
+        min_length (int, optional): Only test sessions with at least this many
+            hands. Defaults to 10.
+        method (str, optional): Correction method, see adjust_pvalues().
+        alpha (float, optional): Family-wise error rate or false discovery
+            rate. Defaults to 0.05.
+        transform (Callable, optional): Applied to the session scores first,
+            e.g. numpy.sqrt.
+
+    Returns:
+        pandas.DataFrame: player, session, n, mean, var, t, df, p,
+        p_adjusted, and reject for each tested session.
+    '''
+    moments = session_moments(store, transform)
+    moments = moments[moments['n'] >= max(min_length, 2)]
+    tested = welch_ttest(moments.reset_index(drop=True), population)
+    tested['p_adjusted'] = adjust_pvalues(tested['p'].to_numpy(), method)
+    tested['reject'] = tested['p_adjusted'] <= alpha
+    return tested
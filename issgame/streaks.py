@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for sequences of good or bad hands within sessions.
+
+A hand is good if its score is above a threshold, by default the median
+score of all hands, and bad otherwise. For every session of a SessionStore
+the statistics are computed as segment reductions over the score arrays,
+without a loop over sessions:
+
+    runs            number of runs of good or bad hands, with the expected
+                    number and z-score of the Wald-Wolfowitz runs test
+    acf_<k>         lag-k autocorrelation of the scores, 0 for sessions of
+                    equal scores
+    longest_good    longest run of good hands
+    longest_bad     longest run of bad hands
+
+streak_tests() compares the statistics with null distributions simulated
+for each session length by resampling the scores of all hands (see
+issgame.resample), in parallel if requested.
+"""
+
+import functools
+from typing import Optional, Sequence, Union
+
+import numpy
+import pandas
+import scipy.stats
+
+from issgame.hand_distribution import ScoreDistribution
+from issgame.load_sessions import SessionStore
+from issgame.resample import NullDistributions
+
+# alternative of the simulated test of each statistic: few runs and long
+# streaks indicate sequences, the autocorrelation can deviate either way
+ALTERNATIVES = {
+    'runs': 'two-sided',
+    'acf': 'two-sided',
+    'longest_good': 'greater',
+    'longest_bad': 'greater',
+}
+
+
+def _segment_starts(offsets: numpy.ndarray) -> numpy.ndarray:
+    '''Returns whether each score is the first of its segment'''
+    starts = numpy.zeros(offsets[-1], dtype=bool)
+    starts[offsets[:-1][numpy.diff(offsets) > 0]] = True
+    return starts
+
+
+def segment_runs(good: numpy.ndarray, offsets: numpy.ndarray) -> numpy.ndarray:
+    '''
+    Counts the runs of equal flags in each segment.
+
+    Args:
+        good (numpy.ndarray): A flag per score.
+        offsets (numpy.ndarray): Start of each segment followed by the
+            number of scores, as SessionStore.offsets.
+
+    Returns:
+        numpy.ndarray: The number of runs per segment, 0 if it is empty.
+    '''
+    good = numpy.asarray(good, dtype=bool)
+    changes = numpy.ones(len(good), dtype=bool)
+    changes[1:] = good[1:] != good[:-1]
+    changes |= _segment_starts(offsets)
+    counts = numpy.cumsum(changes)
+    ends = numpy.concatenate([[0], counts])[offsets]
+    return numpy.diff(ends)
+
+
+def segment_longest(flags: numpy.ndarray, offsets: numpy.ndarray
+                    ) -> numpy.ndarray:
+    '''
+    Finds the longest run of set flags in each segment.
+
+    Args:
+        flags (numpy.ndarray): A flag per score.
+        offsets (numpy.ndarray): Start of each segment followed by the
+            number of scores.
+
+    Returns:
+        numpy.ndarray: The length of the longest run per segment, 0 if there
+        is none.
+    '''
+    flags = numpy.asarray(flags, dtype=bool)
+    longest = numpy.zeros(len(offsets) - 1, dtype=numpy.int64)
+    if len(flags) == 0:
+        return longest
+    # the count of set flags before the current run, so the run length at
+    # each position is the count of set flags minus that base
+    counts = numpy.cumsum(flags)
+    bases = numpy.where(~flags | _segment_starts(offsets), counts - flags, 0)
+    runs = counts - numpy.maximum.accumulate(bases)
+    filled = numpy.diff(offsets) > 0
+    longest[filled] = numpy.maximum.reduceat(runs, offsets[:-1][filled])
+    return longest
+
+
+def segment_autocorrelation(scores: numpy.ndarray, offsets: numpy.ndarray,
+                            lag: int = 1) -> numpy.ndarray:
+    '''
+    Calculates the lag-k autocorrelation of the scores of each segment,
+    sum((x[t] - m)*(x[t + k] - m))/sum((x[t] - m)**2) with the segment mean
+    m, as in the correlogram of statsmodels' acf().
+
+    Args:
+        scores (numpy.ndarray): Scores.
+        offsets (numpy.ndarray): Start of each segment followed by the
+            number of scores.
+        lag (int, optional): The lag k. Defaults to 1.
+
+    Returns:
+        numpy.ndarray: The autocorrelation per segment, NaN for segments of
+        at most 'lag' scores and 0 for segments of equal scores.
+    '''
+    scores = numpy.asarray(scores, dtype=numpy.float64)
+    lengths = numpy.diff(offsets)
+    segments = numpy.repeat(numpy.arange(len(lengths)), lengths)
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        means = numpy.bincount(segments, weights=scores,
+                               minlength=len(lengths))/lengths
+    deviations = scores - numpy.repeat(means, lengths)
+    squares = numpy.bincount(segments, weights=deviations**2,
+                             minlength=len(lengths))
+    paired = segments[lag:] == segments[:-lag]
+    products = numpy.bincount(
+        segments[lag:][paired],
+        weights=(deviations[lag:]*deviations[:-lag])[paired],
+        minlength=len(lengths))
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        correlations = numpy.where(squares > 0, products/squares, 0.0)
+    correlations[lengths <= lag] = numpy.nan
+    return correlations
+
+
+def _rows(samples: numpy.ndarray) -> numpy.ndarray:
+    '''Returns the offsets of the rows of 'samples' as segments'''
+    return numpy.arange(0, samples.size + 1, samples.shape[1])
+
+
+def _runs(samples: numpy.ndarray, axis: int, threshold: float
+          ) -> numpy.ndarray:
+    return segment_runs(samples.ravel() > threshold, _rows(samples))
+
+
+def _longest(samples: numpy.ndarray, axis: int, threshold: float, good: bool
+             ) -> numpy.ndarray:
+    flags = samples.ravel() > threshold
+    return segment_longest(flags if good else ~flags, _rows(samples))
+
+
+def _autocorrelation(samples: numpy.ndarray, axis: int, lag: int
+                     ) -> numpy.ndarray:
+    return segment_autocorrelation(samples.ravel(), _rows(samples), lag)
+
+
+def _store_scores(store: SessionStore) -> numpy.ndarray:
+    '''Returns the scores of 'store' at the three decimals of the file'''
+    return numpy.round(numpy.asarray(store.scores, dtype=numpy.float64), 3)
+
+
+def streak_statistics(store: SessionStore,
+                      threshold: float,
+                      lags: Sequence[int] = (1,)
+                      ) -> pandas.DataFrame:
+    '''
+    Calculates the streak statistics of every session in 'store'.
+
+    Args:
+        store (SessionStore): Session scores.
+        threshold (float): Scores above the threshold are good hands, e.g.
+            the median score of all hands.
+        lags (Sequence[int], optional): Lags of the autocorrelations.
+            Defaults to (1,).
+
+    Returns:
+        pandas.DataFrame: player, session, n, good (number of good hands),
+        runs, runs_expected, runs_z, runs_p (two-sided normal approximation,
+        NaN if all hands are good or bad), acf_<k> for each lag,
+        longest_good, and longest_bad per session.
+    '''
+    scores = _store_scores(store)
+    offsets = numpy.asarray(store.offsets, dtype=numpy.int64)
+    lengths = numpy.diff(offsets).astype(numpy.float64)
+    good = scores > threshold
+    good_hands = numpy.diff(numpy.concatenate([[0], numpy.cumsum(good)])
+                            [offsets])
+    bad_hands = lengths - good_hands
+    runs = segment_runs(good, offsets)
+
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        pairs = 2*good_hands*bad_hands
+        expected = pairs/lengths + 1
+        variance = pairs*(pairs - lengths)/(lengths**2*(lengths - 1))
+        z = numpy.where(variance > 0, (runs - expected)/numpy.sqrt(variance),
+                        numpy.nan)
+
+    players = numpy.asarray(store.players, dtype=object)
+    sessions = numpy.asarray(store.sessions, dtype=object)
+    statistics = pandas.DataFrame({
+        'player': players[store.player_ids],
+        'session': sessions[store.session_ids],
+        'n': numpy.diff(offsets),
+        'good': good_hands,
+        'runs': runs,
+        'runs_expected': expected,
+        'runs_z': z,
+        'runs_p': 2*scipy.stats.norm.sf(numpy.abs(z)),
+    })
+    for lag in lags:
+        statistics['acf_{:d}'.format(lag)] = segment_autocorrelation(
+            scores, offsets, lag)
+    statistics['longest_good'] = segment_longest(good, offsets)
+    statistics['longest_bad'] = segment_longest(~good, offsets)
+    return statistics
+
+
+def streak_tests(store: SessionStore,
+                 population: Union[numpy.ndarray, ScoreDistribution],
+                 threshold: Optional[float] = None,
+                 lags: Sequence[int] = (1,),
+                 min_length: int = 10,
+                 replicates: int = 10000,
+                 seed: Optional[int] = None,
+                 jobs: int = 1
+                 ) -> pandas.DataFrame:
+    '''
+    Tests the streak statistics of every session against null distributions
+    of independent hands, simulated once per session length by bootstrapping
+    the scores of all hands.
+
+    Args:
+        store (SessionStore): Session scores.
+        population (Union[numpy.ndarray, ScoreDistribution]): Scores of all
+            hands, or their exact distribution.
+        threshold (float, optional): Scores above the threshold are good
+            hands. Defaults to None, the median of the population.
+        lags (Sequence[int], optional): Lags of the autocorrelations.
+            Defaults to (1,).
+        min_length (int, optional): Only test sessions with at least this
+            many hands, and more than the largest lag. Defaults to 10.
+        replicates (int, optional): Simulated sessions per session length.
+            Defaults to 10000.
+        seed (int, optional): Seed of the simulations.
+        jobs (int, optional): Number of processes simulating. Defaults to 1.
+
+    Returns:
+        pandas.DataFrame: The columns of streak_statistics() for each tested
+        session, and the simulated p-values p_runs, p_acf_<k>,
+        p_longest_good, and p_longest_bad. The p-values are not corrected
+        for multiple testing, see issgame.stats.adjust_pvalues().
+    '''
+    if threshold is None:
+        if isinstance(population, ScoreDistribution):
+            threshold = population.quantile(0.5)
+        else:
+            threshold = float(numpy.median(population))
+    statistics = streak_statistics(store, threshold, lags)
+    min_length = max(min_length, max(lags, default=0) + 1, 2)
+    statistics = statistics[statistics['n'] >= min_length]\
+        .reset_index(drop=True)
+
+    nulls = {
+        'runs': functools.partial(_runs, threshold=threshold),
+        'longest_good': functools.partial(_longest, threshold=threshold,
+                                          good=True),
+        'longest_bad': functools.partial(_longest, threshold=threshold,
+                                         good=False),
+    }
+    alternatives = dict(ALTERNATIVES)
+    for lag in lags:
+        nulls['acf_{:d}'.format(lag)] = functools.partial(_autocorrelation,
+                                                          lag=lag)
+        alternatives['acf_{:d}'.format(lag)] = ALTERNATIVES['acf']
+
+    lengths = statistics['n'].to_numpy()
+    for column, statistic in nulls.items():
+        # the same seed draws the same simulated sessions for every statistic
+        null = NullDistributions(population, replicates, statistic,
+                                 seed=seed, jobs=jobs)
+        statistics['p_' + column] = null.pvalues(
+            lengths, statistics[column].to_numpy(), alternatives[column])
+    return statistics
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Synthetic ISS game files for benchmarks and tests.
+
+Games are written in the format of the ISS .sgf dumps with uniformly
+shuffled deals. Players meet in sessions of consecutive games on one day,
+and a share of the lines can be corrupted the ways real dumps are.
+"""
+
+import datetime
+from typing import List, Optional
+
+import numpy
+
+from issgame.cards import CARDS
+
+FIRST_ID = 1000000
+START_DATE = datetime.datetime(2021, 1, 1)
+CORRUPTIONS = ('truncated', 'no_deal', 'unknown_card', 'empty')
+
+_LINE = ('(;GM[Skat]PC[International Skat Server]CO[]SE[{series}]'
+         'ID[{game_id}]DT[{date}]P0[{players[0]}]P1[{players[1]}]'
+         'P2[{players[2]}]R0[]R1[]R2[]MV[w {deal} 1 p 2 p 0 p ]R[passed] ;)')
+
+
+def player_names(count: int) -> List[str]:
+    '''Returns 'count' distinct player names'''
+    return ['player{:d}'.format(number) for number in range(count)]
+
+
+def random_deal(generator: numpy.random.Generator) -> str:
+    '''Returns the 32 cards shuffled and separated by dots as in an MV tag'''
+    return '.'.join(CARDS[card] for card in generator.permutation(len(CARDS)))
+
+
+def _corrupt(line: str, corruption: str) -> str:
+    '''Damages 'line' in the way named by 'corruption' '''
+    if corruption == 'truncated':
+        return line[:line.index('MV[') + 20]
+    if corruption == 'no_deal':
+        return line[:line.index('MV[')]
+    if corruption == 'unknown_card':
+        start = line.index('MV[w ') + 5
+        return line[:start] + 'XX' + line[start + 2:]
+    return ''
+
+
+def synthetic_lines(games: int,
+                    seed: Optional[int] = None,
+                    players: int = 30,
+                    session_games: int = 36,
+                    corrupt: float = 0.0
+                    ) -> List[str]:
+    '''
+    Generates the lines of an ISS game file.
+
+    Args:
+        games (int): Number of games.
+        seed (int, optional): Seed of the random generator.
+        players (int, optional): Number of distinct players. Defaults to 30.
+        session_games (int, optional): Mean number of games a group of three
+            players plays in a session. Defaults to 36.
+        corrupt (float, optional): Share of lines that are corrupted.
+            Defaults to 0.
+
+    Returns:
+        List[str]: One line per game, without line endings.
+    '''
+    generator = numpy.random.default_rng(seed)
+    names = player_names(max(players, 3))
+    lines = []
+    time = START_DATE
+    session_left = 0
+    for number in range(games):
+        if session_left == 0:
+            seats = [names[index] for index in
+                     generator.choice(len(names), 3, replace=False)]
+            session_left = int(generator.geometric(1/session_games))
+            time += datetime.timedelta(hours=int(generator.integers(1, 24)))
+        session_left -= 1
+        time += datetime.timedelta(seconds=int(generator.integers(30, 300)))
+        line = _LINE.format(series=344037, game_id=FIRST_ID + number,
+                            date=time.strftime('%Y-%m-%d/%H:%M:%S/UTC'),
+                            players=seats[number % 3:] + seats[:number % 3],
+                            deal=random_deal(generator))
+        if corrupt and generator.random() < corrupt:
+            line = _corrupt(line, CORRUPTIONS[
+                generator.integers(len(CORRUPTIONS))])
+        lines.append(line)
+    return lines
+
+
+def write_synthetic_games(filename: str, games: int, **options) -> None:
+    '''
+    Writes a synthetic ISS game file of 'games' games.
+
+    Args:
+        filename (str): Output filename.
+        games (int): Number of games.
+        **options: seed, players, session_games, and corrupt as for
+            synthetic_lines().
+    '''
+    with open(filename, 'w') as out_file:
+        for line in synthetic_lines(games, **options):
+            out_file.write(line + '\n')
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import unittest
+
+import numpy
+import pandas
+
+import issgame
+import issgame.cards
+
+
+class TestCards(unittest.TestCase):
+    def test_encode_hand_sets_one_bit_per_card(self):
+        mask = issgame.encode_hand('HQ_HA_H7_CT_ST_SK_SA_HJ_CJ_CK')
+        self.assertEqual(bin(mask).count('1'), 10)
+
+    def test_decode_hand_reverses_encode_hand(self):
+        hand = 'HQ_HA_H7_CT_ST_SK_SA_HJ_CJ_CK'
+        decoded = issgame.decode_hand(issgame.encode_hand(hand))
+        self.assertListEqual(sorted(decoded.split('_')),
+                             sorted(hand.split('_')))
+
+    def test_encode_hands_matches_encode_hand(self):
+        hands = ['HQ_HA_H7_CT_ST_SK_SA_HJ_CJ_CK',
+                 'C8_DQ_S9_SQ_D9_C7_HK_DT_HT_CA']
+        self.assertListEqual(issgame.encode_hands(hands).tolist(),
+                             [issgame.encode_hand(hand) for hand in hands])
+
+    def test_encode_hands_unknown_card_raises_value_error(self):
+        hands = ['HA_KK_S7_DJ_H7_HJ_CA_SA_C9_CT']
+        self.assertRaises(ValueError, issgame.encode_hands, hands)
+
+    def test_card_indices_keeps_card_order(self):
+        indices = issgame.cards.card_indices(['D7_CA', 'HJ_XX'])
+        self.assertListEqual(indices.tolist(), [[0, 31], [12, -1]])
+
+    def test_hand_score_array_matches_known_hands(self):
+        games = pandas.read_csv(
+            'issgame/tests/data/test_converted_games_known.tsv', sep='\t')
+        expected = [issgame.hand_score(hand) for hand in games['hand']]
+        result = issgame.hand_scores(games['hand'])
+        self.assertListEqual(result.tolist(), expected)
+
+    def test_hand_score_array_matches_hand_score_for_random_hands(self):
+        generator = numpy.random.default_rng(5)
+        cards = numpy.argsort(generator.random((20000, 32)), axis=1)[:, :10]
+        masks = numpy.bitwise_or.reduce(
+            numpy.left_shift(numpy.uint32(1), cards.astype(numpy.uint32)),
+            axis=1)
+        expected = [issgame.hand_score(issgame.decode_hand(mask))
+                    for mask in masks]
+        result = issgame.hand_score_array(masks)
+        self.assertListEqual(result.tolist(), expected)
+
+    def test_popcount(self):
+        masks = numpy.array([0, 1, 0xFFFFFFFF, 0x80000001], dtype=numpy.uint32)
+        self.assertListEqual(issgame.cards.popcount(masks).tolist(),
+                             [0, 1, 32, 2])
+
+    def test_deal_errors(self):
+        deal = '.'.join(issgame.cards.CARDS)
+        deals = [deal, deal[:90], deal.replace('.', '_', 1),
+                 'XX' + deal[2:], 'DJ' + deal[2:], 'Dé' + deal[2:]]
+        errors = issgame.cards.deal_errors(deals)
+        self.assertListEqual(
+            [issgame.cards.DEAL_ERRORS[error] for error in errors.tolist()],
+            [None, 'deal_layout', 'deal_layout', 'unknown_card',
+             'repeated_card', 'unknown_card'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas
+
+import issgame
+
+
+class TestColumnar(unittest.TestCase):
+    raw_data = ['issgame/tests/data/test_games.sgf']
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.converted_data = os.path.join(self.directory, 'converted.tsv')
+        self.columnar_data = os.path.join(self.directory, 'converted_npy')
+        issgame.extract_svg_hands(self.raw_data, self.converted_data)
+        issgame.extract_svg_hands(self.raw_data, self.columnar_data,
+                                  output_format='npy', chunksize=3)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_columns_match_tsv_output(self):
+        expected = pandas.read_csv(self.converted_data, sep='\t')
+        result = issgame.load_columnar(self.columnar_data).to_frame()
+        for column in ['id', 'session', 'player', 'position']:
+            self.assertListEqual(result[column].tolist(),
+                                 expected[column].tolist())
+        self.assertListEqual(
+            [sorted(hand.split('_')) for hand in result['hand']],
+            [sorted(hand.split('_')) for hand in expected['hand']])
+
+    def test_column_types(self):
+        columns = issgame.load_columnar(self.columnar_data)
+        self.assertEqual(columns.hand.dtype.name, 'uint32')
+        self.assertEqual(columns.position.dtype.name, 'int8')
+        self.assertListEqual(sorted(columns.players),
+                             ['blkkjk', 'theCount', 'zoot'])
+        self.assertEqual(len(columns.ids), 8)
+
+    def test_load_hands_matches_tsv(self):
+        for position in range(1, 4):
+            self.assertListEqual(
+                issgame.load_hands(self.columnar_data, position),
+                issgame.load_hands(self.converted_data, position))
+
+    def test_extract_sessions_matches_tsv(self):
+        issgame.extract_sessions(self.converted_data, 'zoot')
+        issgame.extract_sessions(self.columnar_data, 'zoot')
+        tsv_sessions = self.converted_data[:-4] + '_zoot.csv'
+        columnar_sessions = self.columnar_data + '_zoot.csv'
+        self.assertListEqual(list(open(columnar_sessions)),
+                             list(open(tsv_sessions)))
+
+    def test_existing_columnar_output_is_replaced(self):
+        issgame.extract_svg_hands(self.raw_data[:0], self.columnar_data,
+                                  output_format='npy')
+        self.assertEqual(len(issgame.load_columnar(self.columnar_data).ids),
+                         0)
+
+    def test_other_directory_is_not_replaced(self):
+        other = os.path.join(self.directory, 'other')
+        os.makedirs(other)
+        with open(os.path.join(other, 'notes.txt'), 'w') as notes:
+            notes.write('keep')
+        with self.assertRaises(FileExistsError):
+            issgame.extract_svg_hands(self.raw_data, other,
+                                      output_format='npy')
+        self.assertListEqual(os.listdir(other), ['notes.txt'])
+        empty = os.path.join(self.directory, 'empty')
+        os.makedirs(empty)
+        issgame.extract_svg_hands(self.raw_data, empty, output_format='npy')
+        self.assertTrue(issgame.columnar.is_columnar(empty))
+
+
+if __name__ == "__main__":
+    unittest.main()
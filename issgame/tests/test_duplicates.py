@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+
+import issgame
+from issgame.duplicates import DEALS, HANDS, expected_repeats
+
+
+class TestDealIndex(unittest.TestCase):
+    raw_data = 'issgame/tests/data/test_games.sgf'
+
+    def setUp(self):
+        self.lines = open(self.raw_data).read().splitlines()
+        first = self.lines[0]
+        deal_start = first.index('MV[w ') + 5
+        deal = first[deal_start:deal_start + 95]
+        # the same deal in another game, and with players 1 and 2 swapped
+        self.repeated = first.replace('ID[6997010]', 'ID[1]')
+        self.permuted = first.replace('ID[6997010]', 'ID[2]').replace(
+            deal, deal[30:60] + deal[:30] + deal[60:])
+
+    def test_finds_repeated_deals(self):
+        index = issgame.DealIndex()
+        new = index.add_games(self.lines)
+        self.assertTrue(new.all())
+        new = index.add_games([self.lines[0], self.repeated, self.permuted,
+                               'not a game'])
+        self.assertListEqual(new.tolist(), [False, False, True])
+        self.assertEqual(index.invalid, 1)
+
+        first_id = issgame.GameLine(self.lines[0]).get_id()
+        duplicates = index.duplicates()
+        self.assertListEqual(duplicates['kind'].tolist(),
+                             ['same_game', 'exact', 'seat_permuted'])
+        self.assertListEqual(duplicates['first_id'].tolist(), [first_id]*3)
+
+        # the game added again is neither a repeated deal nor three hands
+        summary = index.summary()
+        self.assertEqual(summary.loc['deal', 'items'], len(self.lines) + 2)
+        self.assertEqual(summary.loc['deal', 'repeats'], 1)
+        self.assertEqual(summary.loc['hand', 'items'],
+                         3*(len(self.lines) + 2))
+        self.assertGreaterEqual(summary.loc['hand', 'repeats'], 6)
+        self.assertListEqual(summary.loc['same_game'].tolist(),
+                             [len(self.lines) + 3, 1, 0.0])
+
+    def test_bloom_filter_finds_the_same_repeats(self):
+        bloom = issgame.BloomFilter.for_capacity(1000, 0.0001)
+        index = issgame.DealIndex(bloom)
+        index.add_games(self.lines)
+        new = index.add_games([self.repeated, self.permuted, self.repeated])
+        self.assertListEqual(new.tolist(), [False, True, False])
+        duplicates = index.duplicates()
+        self.assertListEqual(duplicates['kind'].tolist(),
+                             ['exact', 'seat_permuted', 'same_game'])
+        # only repeats of deals in the index know their first game
+        repeated_id = issgame.GameLine(self.repeated).get_id()
+        self.assertTrue(duplicates['first_id'].isna().iloc[0])
+        self.assertListEqual(duplicates['first_id'].tolist()[1:],
+                             [repeated_id, repeated_id])
+
+    def test_find_duplicates_reads_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            raw_file = os.path.join(directory, 'games.sgf')
+            with open(raw_file, 'w') as games:
+                games.write('\n'.join(self.lines + [self.repeated]) + '\n')
+            index = issgame.find_duplicates([self.raw_data, raw_file],
+                                            chunksize=4)
+        duplicates = index.duplicates()
+        self.assertEqual((duplicates['kind'] == 'same_game').sum(),
+                         len(self.lines))
+        self.assertEqual((duplicates['kind'] == 'exact').sum(), 1)
+
+    def test_expected_repeats(self):
+        self.assertAlmostEqual(expected_repeats(2, 4), 0.25)
+        # about the number of pairs of equal items if repeats are rare
+        games = 7*10**6
+        self.assertAlmostEqual(expected_repeats(games, DEALS),
+                               games*(games - 1)/2/DEALS, places=6)
+        self.assertGreater(expected_repeats(21*10**6, HANDS), 10**6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,28 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-import unittest
+import bz2
+import gzip
+import importlib
+import lzma
 import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
 
 import issgame
+import issgame.shards
+
+extract_module = importlib.import_module('issgame.extract_svg_hands')
 
 
 class TestExtractData(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
     def test_creates_the_expected_cvs_output_file(self):
         raw_data = ['issgame/tests/data/test_games.sgf']
         converted_data = 'issgame/tests/data/test_converted_games.tsv'
@@ -88,5 +104,103 @@ class TestExtractData(unittest.TestCase):
         self.assertListEqual(list(open(converted_data)),
                              list(open(known_good_data)))
 
+    def test_parallel_output_equals_sequential_output(self):
+        raw_data = ['issgame/tests/data/test_games.sgf']
+        converted_data = os.path.join(self.directory, 'converted.tsv')
+        parallel_data = os.path.join(self.directory, 'parallel.tsv')
+        issgame.extract_svg_hands(raw_data, converted_data)
+        issgame.extract_svg_hands(raw_data, parallel_data,
+                                  jobs=2, shardsize=1000)
+        self.assertListEqual(list(open(parallel_data)),
+                             list(open(converted_data)))
+
+    def test_compressed_input_equals_plain_input(self):
+        raw_data = ['issgame/tests/data/test_games.sgf']
+        converted_data = os.path.join(self.directory, 'converted.tsv')
+        issgame.extract_svg_hands(raw_data, converted_data)
+        for extension, opener in [('.bz2', bz2.open), ('.gz', gzip.open),
+                                  ('.xz', lzma.open)]:
+            compressed = os.path.join(self.directory, 'games.sgf' + extension)
+            with opener(compressed, 'wb') as compressed_file:
+                compressed_file.write(open(raw_data[0], 'rb').read())
+            compressed_data = os.path.join(self.directory, 'compressed.tsv')
+            issgame.extract_svg_hands([compressed], compressed_data)
+            self.assertListEqual(list(open(compressed_data)),
+                                 list(open(converted_data)))
+
+    def test_compressed_input_is_parsed_while_writing(self):
+        games = open('issgame/tests/data/test_games.sgf', 'rb').read()\
+            .rstrip(b'\n') + b'\n'
+        compressed = os.path.join(self.directory, 'games.sgf.gz')
+        with gzip.open(compressed, 'wb') as compressed_file:
+            compressed_file.write(games*10)
+        read_chunks = issgame.shards.read_chunks
+        write = extract_module._TsvOutput.write
+        counts = {'read': 0, 'written': 0, 'ahead': 0}
+
+        def counting_read_chunks(*args, **kwargs):
+            for chunk in read_chunks(*args, **kwargs):
+                counts['read'] += 1
+                yield chunk
+
+        def counting_write(output, batch, *args):
+            counts['written'] += 1
+            counts['ahead'] = max(counts['ahead'],
+                                  counts['read'] - counts['written'])
+            write(output, batch, *args)
+
+        for jobs in [1, 2]:
+            counts.update(read=0, written=0, ahead=0)
+            with mock.patch.object(issgame.shards, 'read_chunks',
+                                   counting_read_chunks), \
+                    mock.patch.object(extract_module._TsvOutput, 'write',
+                                      counting_write):
+                issgame.extract_svg_hands(
+                    [compressed], os.path.join(self.directory, 'games.tsv'),
+                    chunksize=2, jobs=jobs)
+            # at most the chunks in flight in the processes are held
+            self.assertEqual(counts['written'], 40)
+            self.assertLessEqual(counts['ahead'], 2*jobs)
+
+    def test_date_filter_includes_games_within_range(self):
+        raw_data = ['issgame/tests/data/test_games.sgf']
+        converted_data = os.path.join(self.directory, 'converted.tsv')
+        issgame.extract_svg_hands(raw_data, converted_data,
+                                  date_from='2021-04-30/01:13',
+                                  date_to='2021-04-30/01:17')
+        ids = [line.split('_')[0] for line in list(open(converted_data))[1:]]
+        self.assertListEqual(sorted(set(ids)),
+                             ['6997012', '6997013', '6997014'])
+
+    def test_date_filter_excludes_games_outside_range(self):
+        raw_data = ['issgame/tests/data/test_games.sgf']
+        converted_data = os.path.join(self.directory, 'converted.tsv')
+        issgame.extract_svg_hands(raw_data, converted_data, date_to='2020')
+        self.assertEqual(len(list(open(converted_data))), 1)
+
+    def test_quarantine_receives_corrupt_lines(self):
+        lines = open('issgame/tests/data/test_games.sgf').read().splitlines()
+        corrupt = [lines[0].replace('MV[w HQ.HA', 'MV[w XX.HA'),
+                   lines[1][:200],
+                   '(;GM[Skat];)']
+        with tempfile.TemporaryDirectory() as directory:
+            raw_data = os.path.join(directory, 'games.sgf')
+            with open(raw_data, 'w') as raw_file:
+                raw_file.write('\n'.join(lines[:2] + corrupt) + '\n')
+            converted_data = os.path.join(directory, 'converted.tsv')
+            quarantine_file = os.path.join(directory, 'quarantine.txt')
+            quarantine = issgame.Quarantine(quarantine_file)
+            issgame.extract_svg_hands([raw_data], converted_data,
+                                      quarantine=quarantine)
+            self.assertEqual(len(list(open(converted_data))), 7)
+            quarantined = open(quarantine_file).read().splitlines()
+        self.assertDictEqual(quarantine.to_dict(),
+                             {'unknown_card': 1, 'deal_layout': 1,
+                              'missing_id': 1})
+        self.assertListEqual(quarantined,
+                             ['unknown_card\t' + corrupt[0],
+                              'deal_layout\t' + corrupt[1],
+                              'missing_id\t' + corrupt[2]])
+
 if __name__ == "__main__":
     unittest.main()
@@ -2,29 +2,68 @@
 # -*- coding: utf-8 -*-
 import unittest
 import os
+import shutil
+import tempfile
+
+import pandas
 
 import issgame
 
 
 class TestExtractSessions(unittest.TestCase):
+    known_data = 'issgame/tests/data/test_converted_games_known.tsv'
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.input_filename = os.path.join(self.directory, 'games.tsv')
+        shutil.copy(self.known_data, self.input_filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
     def test_creates_expected_file(self):
-        input_filename = 'issgame/tests/data/test_converted_games_known.tsv'
-        expected_file = 'issgame/tests/data/test_converted_games_known_zoot.csv'
-        if os.path.exists(expected_file):
-            os.remove(expected_file)
-        issgame.extract_sessions(input_filename, 'zoot')
+        expected_file = os.path.join(self.directory, 'games_zoot.csv')
+        issgame.extract_sessions(self.input_filename, 'zoot')
         self.assertTrue(os.path.isfile(expected_file))
 
     def test_writes_first_session_to_file(self):
-        input_filename = 'issgame/tests/data/test_converted_games_known.tsv'
-        expected_file = 'issgame/tests/data/test_converted_games_known_zoot.csv'
-        if os.path.exists(expected_file):
-            os.remove(expected_file)
-        issgame.extract_sessions(input_filename, 'zoot')
+        expected_file = os.path.join(self.directory, 'games_zoot.csv')
+        issgame.extract_sessions(self.input_filename, 'zoot')
         expected_line = 'zoot,2021-04-30-blkkjk-theCount-zoot,7.0,8.0,7.0,9.0,10.0,9.0,8.0,8.0,5.0,6.0\n'
 
         self.assertEqual(open(expected_file).readline(), expected_line)
 
+    def test_all_sessions_match_single_player_sessions(self):
+        issgame.extract_all_sessions(self.input_filename)
+        all_lines = list(open(os.path.join(self.directory,
+                                           'games_sessions.csv')))
+        for player in ['zoot', 'theCount', 'xskat:2']:
+            issgame.extract_sessions(self.input_filename, player)
+            player_file = self.input_filename[:-4] + '_' + player + '.csv'
+            self.assertListEqual(
+                [line for line in all_lines if line.startswith(player + ',')],
+                list(open(player_file)))
+
+    def test_all_sessions_can_be_loaded(self):
+        issgame.extract_all_sessions(self.input_filename)
+        sessions = issgame.load_sessions(
+            os.path.join(self.directory, 'games_sessions.csv'), None)
+        self.assertEqual(len(sessions), 9)
+        self.assertListEqual(
+            sessions['zoot']['2017-02-27-@9WScnU3-theCount-zoot'], [4.0])
+
+    def test_all_sessions_use_stored_scores(self):
+        games = pandas.read_csv(self.known_data, sep='\t')
+        # scores no hand has, so recomputed scores would not match
+        games['stegen'] = 100.0 + games.index
+        games.to_csv(self.input_filename, sep='\t', index=False)
+        issgame.extract_all_sessions(self.input_filename)
+        sessions = issgame.load_sessions(
+            os.path.join(self.directory, 'games_sessions.csv'), None)
+        scores = sorted(score for player in sessions.values()
+                        for session in player.values() for score in session)
+        self.assertListEqual(scores, games['stegen'].tolist())
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import itertools
+import os
+import tempfile
+import unittest
+
+import numpy
+
+import issgame
+from issgame.cards import CARDS, encode_hand
+from issgame.fairness import DealCounts, count_deals
+
+
+class TestDealCounts(unittest.TestCase):
+    raw_data = ['issgame/tests/data/test_games.sgf']
+
+    def setUp(self):
+        self.games = [issgame.GameLine(line) for line in open(self.raw_data[0])]
+
+    def test_counts_every_card_once_per_deal(self):
+        counts = DealCounts()
+        counts.add_games(self.games)
+        deals = len(self.games)
+        self.assertEqual(counts.deals, deals)
+        numpy.testing.assert_array_equal(counts.slots.sum(axis=0), deals)
+        numpy.testing.assert_array_equal(counts.slots.sum(axis=1), deals)
+        numpy.testing.assert_array_equal(counts.seats.sum(axis=0),
+                                         [10*deals]*3 + [2*deals])
+        self.assertEqual(counts.skat.sum(), deals)
+        self.assertEqual(numpy.tril(counts.skat).sum(), 0)
+
+    def test_matches_hands_of_first_game(self):
+        counts = DealCounts()
+        counts.add_games(self.games[:1])
+        game = self.games[0]
+        for seat, hand in enumerate([game.get_hand1(), game.get_hand2(),
+                                     game.get_hand3(), game.get_skat()]):
+            dealt = numpy.flatnonzero(counts.seats[:, seat])
+            self.assertEqual(sum(1 << card for card in dealt.tolist()),
+                             encode_hand(hand))
+        first_card = game.get_deal()[:2]
+        self.assertEqual(counts.slots[CARDS.index(first_card), 0], 1)
+
+    def test_invalid_deals_are_not_counted(self):
+        counts = DealCounts()
+        deal = self.games[0].get_deal()
+        counts.add_deals([deal, deal[:3] + deal[:2] + deal[5:], deal[:-3]])
+        counts.add_games(['not a game'])
+        self.assertEqual(counts.deals, 1)
+        self.assertEqual(counts.invalid, 3)
+
+    def test_games_are_counted_in_blocks(self):
+        expected = DealCounts()
+        expected.add_games(self.games)
+        counts = DealCounts()
+        blocks = []
+        add_deals = counts.add_deals
+        counts.add_deals = lambda deals: blocks.append(len(deals))\
+            or add_deals(deals)
+        with open(self.raw_data[0]) as lines:
+            counts.add_games(itertools.chain(['not a game'], lines),
+                             chunksize=3)
+        self.assertEqual(max(blocks), 3)
+        self.assertEqual(sum(blocks), len(self.games))
+        self.assertEqual(counts.invalid, 1)
+        for name in DealCounts.ARRAYS:
+            numpy.testing.assert_array_equal(getattr(counts, name),
+                                             getattr(expected, name))
+
+    def test_count_deals_merges_shards(self):
+        expected = DealCounts()
+        expected.add_games(self.games)
+        counts = count_deals(self.raw_data, jobs=2, shardsize=2000)
+        for name in DealCounts.ARRAYS:
+            numpy.testing.assert_array_equal(getattr(counts, name),
+                                             getattr(expected, name))
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'counts.npz')
+            counts.save(filename)
+            loaded = DealCounts.load(filename)
+        numpy.testing.assert_array_equal(loaded.slots, counts.slots)
+        self.assertEqual(loaded.deals, counts.deals)
+
+    def test_fair_deals_are_not_rejected(self):
+        generator = numpy.random.default_rng(0)
+        deals = ['_'.join(numpy.array(CARDS)[generator.permutation(32)])
+                 for __i in range(20000)]
+        counts = DealCounts()
+        counts.add_deals(deals)
+        tests = counts.tests().set_index('test')
+        self.assertEqual(tests.loc['slot', 'df'], 31*31)
+        self.assertEqual(tests.loc['seat', 'df'], 31*3)
+        self.assertTrue((tests[['chi2_p', 'g_p']] > 0.001).all().all())
+
+        # always dealing the club jack first is detected
+        biased = [deal for deal in deals if deal.startswith('CJ')]
+        counts.add_deals(biased*20)
+        tests = counts.tests().set_index('test')
+        self.assertLess(tests.loc['slot', 'chi2_p'], 1e-10)
+
+
+if __name__ == '__main__':
+    unittest.main()
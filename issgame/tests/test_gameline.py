@@ -4,6 +4,7 @@ import unittest
 import os
 
 import issgame
+import issgame.gameline
 
 
 class TestGameLine(unittest.TestCase):
@@ -135,6 +136,23 @@ class TestGameLine(unittest.TestCase):
         test_string = '2021-04-30'
         self.assertEqual(test_game.get_date(), test_string)
 
+    def test_get_session(self):
+        games = open('issgame/tests/data/test_games.sgf')
+        line = games.readline()
+        test_game = issgame.GameLine(line)
+        test_string = '2021-04-30-blkkjk-theCount-zoot'
+        self.assertEqual(test_game.get_session(), test_string)
+
+    def test_line_without_tags_raises_value_error(self):
+        self.assertRaises(ValueError, issgame.GameLine, '(;GM[Skat];)')
+
+    def test_match_returns_none_instead_of_raising(self):
+        self.assertIsNone(issgame.GameLine._match('(;GM[Skat];)'))
+        line = open('issgame/tests/data/test_games.sgf').readline()
+        game = issgame.GameLine._match(line)
+        self.assertEqual(game.get_id(), issgame.GameLine(line).get_id())
+        self.assertEqual(game.get_hand1(), 'HQ_HA_H7_CT_ST_SK_SA_HJ_CJ_CK')
+
     def test_score_line_1_hand_1(self):
         games = open('issgame/tests/data/test_games.sgf')
         line = games.readline()
@@ -239,5 +257,103 @@ class TestGameLine(unittest.TestCase):
         test_hand = 'HA_DD_S7_DJ_H7_HJ_CA_SA_C9_CT'
         self.assertRaises(AssertionError, issgame.hand_score, test_hand)
 
+    def test_hand_checks_do_not_depend_on_asserts(self):
+        # compiled as by python -O, which removes assert statements
+        source = open(issgame.gameline.__file__).read()
+        namespace = {}
+        exec(compile(source, issgame.gameline.__file__, 'exec', optimize=2),
+             namespace)
+        self.assertRaises(AssertionError, namespace['hand_score'], 'HA_DK')
+
+    def test_validate_line_accepts_test_games(self):
+        for line in open('issgame/tests/data/test_games.sgf'):
+            self.assertIsNone(issgame.validate_line(line))
+
+    def test_validate_line_reasons(self):
+        line = open('issgame/tests/data/test_games.sgf').readline()
+        deal_start = line.index('MV[w ') + 5
+        corrupt = {
+            'missing_date': line.replace(']DT[', ']XX['),
+            'missing_players': line.replace(']P1[', ']XX['),
+            'missing_deal': line[:line.index(']MV[')],
+            'deal_layout': line[:deal_start + 50],
+            'unknown_card': line.replace('HQ.HA', 'HQ.HB', 1),
+            'repeated_card': line.replace('HQ.HA', 'HQ.HQ', 1),
+        }
+        for reason, corrupt_line in corrupt.items():
+            self.assertEqual(issgame.validate_line(corrupt_line), reason)
+        self.assertEqual(line[deal_start:deal_start + 5], 'HQ.HA')
+
+
+class TestGameBatch(unittest.TestCase):
+    def test_parse_many_has_3_rows_per_game(self):
+        lines = list(open('issgame/tests/data/test_games.sgf'))
+        batch = issgame.GameLine.parse_many(lines)
+        self.assertEqual(len(batch), 3*len(lines))
+
+    def test_parse_many_matches_get_hands(self):
+        lines = list(open('issgame/tests/data/test_games.sgf'))
+        frame = issgame.GameLine.parse_many(lines[:2]).to_frame()
+        expected = [issgame.GameLine(line).get_hands() for line in lines[:2]]
+        self.assertListEqual(frame.values.tolist(),
+                             expected[0].values.tolist()
+                             + expected[1].values.tolist())
+
+    def test_parse_many_skips_invalid_lines(self):
+        lines = list(open('issgame/tests/data/test_games.sgf'))[:2]
+        batch = issgame.GameLine.parse_many(lines + ['(;GM[Skat];)'])
+        self.assertEqual(len(batch), 6)
+        self.assertEqual(batch.skipped, 1)
+        self.assertListEqual(batch.rejected, [('missing_id', '(;GM[Skat];)')])
+
+
+class TestGameDetails(unittest.TestCase):
+    def setUp(self):
+        self.lines = open('issgame/tests/data/test_games.sgf').read()\
+            .splitlines()
+
+    def test_details_are_parsed_on_first_use(self):
+        test_game = issgame.GameLine(self.lines[0])
+        self.assertIsNone(test_game._details)
+        test_game.get_hand1()
+        self.assertIsNone(test_game._details)
+        self.assertIs(test_game.tricks, test_game.tricks)
+        self.assertIsNotNone(test_game._details)
+
+    def test_line_1_details(self):
+        test_game = issgame.GameLine(self.lines[0])
+        self.assertListEqual(test_game.bidding[:4],
+                             [(1, 'p'), (2, '18'), (0, 'y'), (2, '20')])
+        self.assertEqual(test_game.get_bid(), 46)
+        self.assertEqual(test_game.declaration, 'G.H7.HQ')
+        self.assertEqual(test_game.get_declarer(), 1)
+        self.assertEqual(test_game.get_game_type(), 'grand')
+        self.assertTrue(test_game.get_details().skat_pickup)
+        self.assertEqual(len(test_game.tricks), 10)
+        self.assertEqual(test_game.tricks[0],
+                         ((0, 'CJ'), (1, 'S9'), (2, 'DJ')))
+        self.assertEqual(test_game.result['v'], 48)
+        self.assertTrue(test_game.result['win'])
+
+    def test_hand_game_and_passed_game(self):
+        hand_game = issgame.GameLine(self.lines[3])
+        self.assertEqual(hand_game.get_modifiers(), ['hand'])
+        self.assertFalse(hand_game.get_details().skat_pickup)
+        passed = issgame.GameLine(self.lines[7])
+        self.assertIsNone(passed.get_declarer())
+        self.assertEqual(passed.get_bid(), 0)
+        self.assertListEqual(passed.tricks, [])
+        self.assertEqual(passed.result, {'passed': True})
+
+    def test_details_many_has_a_row_per_game(self):
+        frame = issgame.GameLine.details_many(self.lines + ['(;GM[Skat];)'])
+        self.assertEqual(len(frame), len(self.lines))
+        self.assertListEqual(frame['declarer'].tolist(),
+                             [1, 3, 2, 1, 2, 1, 1, 0])
+        self.assertListEqual(frame['game_type'].tolist()[:3],
+                             ['grand', 'grand', 'spades'])
+        self.assertListEqual(frame['tricks'].tolist()[:2], [8, 5])
+
+
 if __name__ == "__main__":
     unittest.main()
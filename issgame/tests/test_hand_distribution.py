@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import math
+import unittest
+
+import numpy
+
+import issgame
+
+
+class TestHandDistribution(unittest.TestCase):
+    def test_distribution_covers_all_hands(self):
+        distribution = issgame.hand_score_distribution()
+        self.assertEqual(distribution.total, math.comb(32, 10))
+
+    def test_stored_distribution_is_up_to_date(self):
+        computed = issgame.hand_score_distribution()
+        stored = issgame.load_hand_score_distribution()
+        self.assertListEqual(stored.scores.tolist(), computed.scores.tolist())
+        self.assertListEqual(stored.counts.tolist(), computed.counts.tolist())
+
+    def test_mean_matches_random_hands(self):
+        generator = numpy.random.default_rng(3)
+        cards = numpy.argsort(generator.random((200000, 32)), axis=1)[:, :10]
+        masks = numpy.bitwise_or.reduce(
+            numpy.left_shift(numpy.uint32(1), cards.astype(numpy.uint32)),
+            axis=1)
+        sample_mean = issgame.hand_score_array(masks).mean()
+        distribution = issgame.load_hand_score_distribution()
+        self.assertAlmostEqual(distribution.mean(), sample_mean, places=1)
+
+    def test_quantile_and_cdf_are_consistent(self):
+        distribution = issgame.load_hand_score_distribution()
+        median = distribution.quantile(0.5)
+        self.assertGreaterEqual(distribution.cdf(median), 0.5)
+        self.assertLess(distribution.cdf(median - 0.001), 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
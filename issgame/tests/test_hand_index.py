@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas
+
+import issgame
+
+
+class TestHandIndex(unittest.TestCase):
+    raw_data = ['issgame/tests/data/test_games.sgf']
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.converted_data = os.path.join(self.directory, 'converted.tsv')
+        issgame.extract_svg_hands(self.raw_data, self.converted_data,
+                                  chunksize=3, index=True)
+        self.games = pandas.read_csv(self.converted_data, sep='\t')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_query_player_matches_full_scan(self):
+        result = issgame.query_hands(self.converted_data, player='zoot')
+        expected = self.games[self.games['player'] == 'zoot']
+        self.assertListEqual(result.values.tolist(), expected.values.tolist())
+
+    def test_query_date_range(self):
+        result = issgame.query_hands(self.converted_data,
+                                     date_from='2021-04-30', date_to='2021')
+        self.assertEqual(len(result), len(self.games))
+        result = issgame.query_hands(self.converted_data, date_to='2020')
+        self.assertEqual(len(result), 0)
+
+    def test_query_unknown_player_is_empty(self):
+        result = issgame.query_hands(self.converted_data, player='nobody')
+        self.assertEqual(len(result), 0)
+
+    def test_index_is_complete_after_resume(self):
+        issgame.extract_svg_hands(self.raw_data, self.converted_data,
+                                  resume=True)
+        issgame.extract_svg_hands(self.raw_data, self.converted_data,
+                                  index=True, resume=True)
+        index = issgame.HandIndex.load(self.converted_data)
+        self.assertEqual(len(index.lookup()), len(self.games))
+        result = issgame.query_hands(self.converted_data, player='blkkjk')
+        expected = self.games[self.games['player'] == 'blkkjk']
+        self.assertListEqual(result.values.tolist(), expected.values.tolist())
+
+    def test_query_columnar_output(self):
+        columnar_data = os.path.join(self.directory, 'converted_npy')
+        issgame.extract_svg_hands(self.raw_data, columnar_data,
+                                  output_format='npy', index=True)
+        result = issgame.query_hands(columnar_data, player='zoot')
+        expected = self.games[self.games['player'] == 'zoot']
+        self.assertListEqual(result['id'].tolist(), expected['id'].tolist())
+        self.assertListEqual(result['position'].tolist(),
+                             expected['position'].tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
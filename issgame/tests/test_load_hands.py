@@ -34,5 +34,20 @@ class TestLoadHands(unittest.TestCase):
         self.assertListEqual(result, expected_output)
 
 
+    def test_hand_scores_match_load_hands(self):
+        input_filename = 'issgame/tests/data/test_converted_games_known.tsv'
+        for player_position in range(1, 4):
+            result = issgame.load_hand_scores(input_filename, player_position)
+            self.assertEqual(result.dtype.name, 'float64')
+            self.assertListEqual(
+                result.tolist(),
+                issgame.load_hands(input_filename, player_position))
+
+    def test_hand_scores_in_chunks_match_whole_file(self):
+        input_filename = 'issgame/tests/data/test_converted_games_known.tsv'
+        expected = issgame.load_hand_scores(input_filename, 1)
+        result = issgame.load_hand_scores(input_filename, 1, chunksize=4)
+        self.assertListEqual(result.tolist(), expected.tolist())
+
 if __name__ == "__main__":
     unittest.main()
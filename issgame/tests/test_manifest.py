@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import issgame
+import issgame.shards
+
+
+class TestResumableExtraction(unittest.TestCase):
+    raw_data = 'issgame/tests/data/test_games.sgf'
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.converted_data = os.path.join(self.directory, 'converted.tsv')
+        self.expected_data = os.path.join(self.directory, 'expected.tsv')
+        issgame.extract_svg_hands([self.raw_data], self.expected_data)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_writes_manifest_next_to_output(self):
+        issgame.extract_svg_hands([self.raw_data], self.converted_data,
+                                  resume=True)
+        self.assertTrue(os.path.isfile(self.converted_data + '.manifest.json'))
+        self.assertEqual(len(list(open(self.converted_data + '.ids'))), 8)
+
+    def test_writes_no_manifest_without_resume(self):
+        self.assertListEqual(os.listdir(self.directory), ['expected.tsv'])
+
+    def test_interrupted_extraction_resumes_at_checkpoint(self):
+        parse_shard = issgame.shards.parse_shard
+        calls = []
+
+        def failing_parse_shard(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 3:
+                raise KeyboardInterrupt
+            return parse_shard(*args, **kwargs)
+
+        with mock.patch.object(issgame.shards, 'parse_shard',
+                               failing_parse_shard):
+            with self.assertRaises(KeyboardInterrupt):
+                issgame.extract_svg_hands([self.raw_data],
+                                          self.converted_data, shardsize=1000,
+                                          resume=True)
+        # a partly written shard after the last checkpoint
+        with open(self.converted_data, 'a') as converted_file:
+            converted_file.write('partial\tline')
+
+        issgame.extract_svg_hands([self.raw_data], self.converted_data,
+                                  shardsize=1000, resume=True)
+        self.assertListEqual(list(open(self.converted_data)),
+                             list(open(self.expected_data)))
+
+    def test_rerun_with_resume_does_not_repeat_games(self):
+        copied_data = os.path.join(self.directory, 'copied.sgf')
+        shutil.copy(self.raw_data, copied_data)
+        issgame.extract_svg_hands([self.raw_data], self.converted_data,
+                                  resume=True)
+        issgame.extract_svg_hands([self.raw_data, copied_data],
+                                  self.converted_data, resume=True)
+        self.assertListEqual(list(open(self.converted_data)),
+                             list(open(self.expected_data)))
+
+    def test_resume_columnar_output_raises_value_error(self):
+        self.assertRaises(ValueError, issgame.extract_svg_hands,
+                          [self.raw_data], self.directory,
+                          output_format='npy', resume=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+
+import numpy
+
+import issgame
+
+
+class TestOnlineStats(unittest.TestCase):
+    raw_data = ['issgame/tests/data/test_games.sgf']
+
+    def test_sessions_match_session_store(self):
+        stats = issgame.OnlineStats()
+        with tempfile.TemporaryDirectory() as directory:
+            converted_file = os.path.join(directory, 'games.tsv')
+            issgame.extract_svg_hands(self.raw_data, converted_file,
+                                      chunksize=7, stats=stats)
+            issgame.extract_all_sessions(converted_file)
+            store = issgame.load_session_store(
+                os.path.join(directory, 'games_sessions.csv'))
+            all_hands = numpy.concatenate(
+                [issgame.load_hand_scores(converted_file, position)
+                 for position in (1, 2, 3)])
+
+        sessions = stats.session_frame()
+        self.assertEqual(len(sessions), len(store.lengths()))
+        expected = {(store.players[player], store.sessions[session]):
+                    (length, mean, var)
+                    for player, session, length, mean, var in zip(
+                        store.player_ids, store.session_ids, store.lengths(),
+                        store.means(), store.variances())}
+        for __i, row in sessions.iterrows():
+            length, mean, var = expected[(row['player'], row['session'])]
+            self.assertEqual(row['n'], length)
+            self.assertAlmostEqual(row['mean'], mean, places=4)
+            if length > 1:
+                self.assertAlmostEqual(row['var'], var, places=3)
+
+        self.assertEqual(stats.hands, len(all_hands))
+        self.assertEqual(stats.histogram()['count'].sum(), len(all_hands))
+        self.assertAlmostEqual(
+            numpy.average(stats.position_frame()['mean'],
+                          weights=stats.position_frame()['n']),
+            all_hands.mean())
+
+    def test_summarise_matches_merged_halves(self):
+        stats = issgame.summarise(self.raw_data, jobs=2, shardsize=2000)
+        lines = open(self.raw_data[0]).read().splitlines()
+        first, second = issgame.OnlineStats(), issgame.OnlineStats()
+        half = len(lines)//2
+        first.add_batch(issgame.GameLine.parse_many(lines[:half]))
+        second.add_batch(issgame.GameLine.parse_many(lines[half:]))
+        self.assertGreater(first.hands, 0)
+        self.assertGreater(second.hands, 0)
+        first.merge(second)
+
+        self.assertEqual(first.hands, stats.hands)
+        for merged, summarised in [(first.player_frame(),
+                                    stats.player_frame()),
+                                   (first.position_frame(),
+                                    stats.position_frame())]:
+            merged = merged.sort_values(list(merged.columns[:1]),
+                                        ignore_index=True)
+            summarised = summarised.sort_values(list(summarised.columns[:1]),
+                                                ignore_index=True)
+            numpy.testing.assert_array_equal(merged['n'], summarised['n'])
+            numpy.testing.assert_allclose(merged['mean'], summarised['mean'])
+            numpy.testing.assert_allclose(merged['var'], summarised['var'])
+        self.assertTrue(first.histogram().equals(stats.histogram()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+
+import numpy
+import pandas
+
+import issgame
+from issgame.pipeline import Pipeline, Stage
+from issgame.shards import file_shards, read_blocks, shard_chunks, \
+    split_block
+
+
+class TestPipeline(unittest.TestCase):
+    def test_runs_stages_in_order(self):
+        results = []
+        pipeline = Pipeline(queue_size=1)
+        pipeline.run(range(5), [Stage('double', lambda item: 2*item),
+                                Stage('repeat', lambda item: [item]*2,
+                                      expand=True),
+                                Stage('collect', results.append)])
+        self.assertListEqual(results, [0, 0, 2, 2, 4, 4, 6, 6, 8, 8])
+        report = pipeline.report()
+        self.assertListEqual(report['stage'].tolist(),
+                             ['double', 'repeat', 'collect'])
+        self.assertListEqual(report['items'].tolist(), [5, 5, 10])
+        self.assertTrue((report['utilisation'] <= 1).all())
+
+    def test_raises_error_of_any_stage(self):
+        def fail(item):
+            if item == 50:
+                raise KeyError(item)
+            return item
+
+        for stages in [[Stage('fail', fail), Stage('sink', lambda item: None)],
+                       [Stage('pass', lambda item: item), Stage('fail', fail)]]:
+            with self.assertRaises(KeyError):
+                Pipeline(queue_size=2).run(range(1000), stages)
+
+
+class TestExtractPipelined(unittest.TestCase):
+    raw_data = ['issgame/tests/data/test_games.sgf']
+
+    def test_output_matches_sequential_extraction(self):
+        with tempfile.TemporaryDirectory() as directory:
+            expected_file = os.path.join(directory, 'expected.tsv')
+            converted_file = os.path.join(directory, 'pipelined.tsv')
+            issgame.extract_svg_hands(self.raw_data, expected_file)
+            stats = issgame.OnlineStats()
+            pipeline = issgame.Pipeline()
+            issgame.extract_svg_hands(self.raw_data, converted_file,
+                                      chunksize=3, shardsize=1000,
+                                      stats=stats, pipeline=pipeline,
+                                      index=True)
+            self.assertListEqual(list(open(converted_file)),
+                                 list(open(expected_file)))
+            hands = issgame.query_hands(converted_file, 'zoot')
+            expected_hands = pandas.read_csv(expected_file, sep='\t')
+            expected = issgame.load_hand_scores(expected_file, 1)
+
+        self.assertListEqual(
+            hands['hand'].tolist(),
+            expected_hands.loc[expected_hands['player'] == 'zoot',
+                               'hand'].tolist())
+        self.assertEqual(stats.hands, 3*len(expected))
+        self.assertListEqual(pipeline.report()['stage'].tolist(),
+                             ['decompress', 'split', 'parse', 'score',
+                              'write'])
+        position = stats.position_frame().iloc[0]
+        self.assertAlmostEqual(position['mean'], numpy.mean(expected))
+
+    def test_blocks_split_into_the_lines_of_each_shard(self):
+        for shard in file_shards(self.raw_data, 1000):
+            expected = [lines for __shard, lines, __last
+                        in shard_chunks(shard, chunksize=3)]
+            chunks = [chunk for block in read_blocks(shard, blocksize=500)
+                      for chunk in split_block(block, chunksize=3)]
+            self.assertListEqual(
+                [line for __shard, lines, __last in chunks for line in lines],
+                [line for lines in expected for line in lines])
+            self.assertTrue(all(len(lines) <= 3
+                                for __shard, lines, __last in chunks))
+            self.assertListEqual([last for __shard, __lines, last in chunks],
+                                 [False]*(len(chunks) - 1) + [True])
+
+    def test_pipeline_cannot_use_processes(self):
+        with self.assertRaises(ValueError):
+            issgame.extract_svg_hands(self.raw_data, 'unused.tsv', jobs=2,
+                                      pipeline=issgame.Pipeline())
+
+
+if __name__ == '__main__':
+    unittest.main()
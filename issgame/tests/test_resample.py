@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+
+import numpy
+
+import issgame
+from issgame.resample import NullDistributions
+
+
+class TestNullDistributions(unittest.TestCase):
+    input_filename = 'issgame/tests/data/test_converted_games_known.tsv'
+
+    def setUp(self):
+        self.all_hands = issgame.load_hand_scores(self.input_filename, 1)
+
+    def test_bootstrap_is_reproducible_for_a_seed(self):
+        first = NullDistributions(self.all_hands, 2500, seed=1).get(5)
+        second = NullDistributions(self.all_hands, 2500, seed=1).get(5)
+        self.assertEqual(len(first), 2500)
+        numpy.testing.assert_array_equal(first, second)
+        self.assertAlmostEqual(first.mean(), self.all_hands.mean(), places=1)
+
+    def test_processes_draw_the_same_replicates(self):
+        serial = NullDistributions(self.all_hands, 2500, seed=3)
+        parallel = NullDistributions(self.all_hands, 2500, seed=3, jobs=2)
+        parallel.draw([4, 6])
+        for length in [4, 6]:
+            numpy.testing.assert_array_equal(serial.get(length),
+                                             parallel.get(length))
+
+    def test_permutation_samples_without_replacement(self):
+        population = numpy.arange(10, dtype=numpy.float64)
+        nulls = NullDistributions(population, 200, statistic='var',
+                                  method='permutation', seed=0)
+        # a sample of all ten scores is always the population itself
+        numpy.testing.assert_allclose(nulls.get(10),
+                                      numpy.var(population, ddof=1))
+        with self.assertRaises(ValueError):
+            nulls.get(11)
+
+    def test_permutation_draws_long_sessions(self):
+        population = numpy.arange(2000, dtype=numpy.float64)
+        for length in [1000, 1500]:
+            nulls = NullDistributions(population, 500, statistic=numpy.sort,
+                                      method='permutation', seed=0)
+            samples = nulls.get(length)
+            self.assertEqual(samples.shape, (500, length))
+            self.assertTrue((numpy.diff(samples, axis=1) > 0).all())
+            # every score is drawn about equally often
+            counts = numpy.bincount(samples.astype(int).ravel(),
+                                    minlength=len(population))
+            self.assertLess(numpy.abs(counts/(500*length/2000) - 1).max(),
+                            0.5)
+
+    def test_bootstrap_from_distribution(self):
+        distribution = issgame.load_hand_score_distribution()
+        nulls = NullDistributions(distribution, 2000, seed=0)
+        self.assertAlmostEqual(nulls.get(30).mean(), distribution.mean(),
+                               places=0)
+        with self.assertRaises(ValueError):
+            NullDistributions(distribution, method='permutation').get(3)
+
+    def test_pvalues(self):
+        nulls = NullDistributions(self.all_hands, 1000, seed=0)
+        center = nulls.get(8).mean()
+        pvalues = nulls.pvalues([8, 8, 3], [center, center + 100, center])
+        self.assertGreater(pvalues[0], 0.5)
+        self.assertAlmostEqual(pvalues[1], 1/1001)
+        self.assertGreater(pvalues[2], 0.5)
+
+        greater = nulls.pvalues([8, 8], [center + 100, center - 100],
+                                alternative='greater')
+        less = nulls.pvalues([8, 8], [center + 100, center - 100],
+                             alternative='less')
+        self.assertListEqual(greater.tolist(), [1/1001, 1.0])
+        self.assertListEqual(less.tolist(), [1.0, 1/1001])
+        with self.assertRaises(ValueError):
+            nulls.pvalues([8], [center], alternative='both')
+
+    def test_cache_round_trip(self):
+        nulls = NullDistributions(self.all_hands, 300, seed=0)
+        nulls.draw([2, 7])
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'nulls.npz')
+            nulls.save(filename)
+            loaded = NullDistributions(self.all_hands, 300)
+            loaded.load(filename)
+        numpy.testing.assert_array_equal(loaded.get(7), nulls.get(7))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+
+import issgame
+
+
+class TestScoreCache(unittest.TestCase):
+    def test_score_matches_hand_score(self):
+        cache = issgame.ScoreCache()
+        hand = 'HQ_HA_H7_CT_ST_SK_SA_HJ_CJ_CK'
+        self.assertEqual(cache.score(hand), issgame.hand_score(hand))
+
+    def test_reordered_hand_is_a_hit(self):
+        cache = issgame.ScoreCache()
+        cache.score('HQ_HA_H7_CT_ST_SK_SA_HJ_CJ_CK')
+        cache.score('CK_CJ_HJ_SA_SK_ST_CT_H7_HA_HQ')
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+
+    def test_least_recently_used_hand_is_evicted(self):
+        cache = issgame.ScoreCache(maxsize=2)
+        first = 'HQ_HA_H7_CT_ST_SK_SA_HJ_CJ_CK'
+        second = 'C8_DQ_S9_SQ_D9_C7_HK_DT_HT_CA'
+        third = 'CQ_D7_DK_H9_SJ_DJ_H8_S7_D8_S8'
+        cache.score(first)
+        cache.score(second)
+        cache.score(first)
+        cache.score(third)
+        self.assertEqual(cache.evictions, 1)
+        self.assertIn(first, cache)
+        self.assertNotIn(second, cache)
+
+    def test_score_many_matches_hand_score(self):
+        cache = issgame.ScoreCache()
+        hands = ['HQ_HA_H7_CT_ST_SK_SA_HJ_CJ_CK',
+                 'C8_DQ_S9_SQ_D9_C7_HK_DT_HT_CA',
+                 'HQ_HA_H7_CT_ST_SK_SA_HJ_CJ_CK']
+        scores = cache.score_many(hands)
+        self.assertListEqual(scores.tolist(),
+                             [issgame.hand_score(hand) for hand in hands])
+        self.assertEqual(cache.stats()['size'], 2)
+
+    def test_score_many_evicts_least_recently_used_hands(self):
+        cache = issgame.ScoreCache(maxsize=2)
+        first = 'HQ_HA_H7_CT_ST_SK_SA_HJ_CJ_CK'
+        second = 'C8_DQ_S9_SQ_D9_C7_HK_DT_HT_CA'
+        third = 'CQ_D7_DK_H9_SJ_DJ_H8_S7_D8_S8'
+        cache.score_many([first, second])
+        cache.score_many([second])
+        scores = cache.score_many([third, second])
+        self.assertListEqual(scores.tolist(), [issgame.hand_score(third),
+                                               issgame.hand_score(second)])
+        self.assertEqual(cache.stats(), {'hits': 2, 'misses': 3,
+                                         'evictions': 1, 'size': 2})
+        self.assertNotIn(first, cache)
+        self.assertIn(third, cache)
+
+    def test_saved_cache_is_loaded(self):
+        hand = 'HQ_HA_H7_CT_ST_SK_SA_HJ_CJ_CK'
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'scores.npz')
+            cache = issgame.ScoreCache(filename=filename)
+            cache.score(hand)
+            cache.save()
+            loaded = issgame.ScoreCache(filename=filename)
+        self.assertEqual(loaded.score(hand), issgame.hand_score(hand))
+        self.assertEqual(loaded.hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import itertools
+import os
+import tempfile
+import unittest
+
+import numpy
+import pandas
+
+import issgame
+from issgame.scorers import null_scores, skat_scores
+
+
+class TestScorers(unittest.TestCase):
+    raw_data = 'issgame/tests/data/test_games.sgf'
+
+    def setUp(self):
+        self.games = [issgame.GameLine(line) for line in open(self.raw_data)]
+        self.hands = [game.get_hand(player) for game in self.games
+                      for player in (1, 2, 3)]
+
+    def test_suit_scores_make_up_hand_score(self):
+        scores = issgame.suit_score_array(issgame.encode_hands(self.hands))
+        self.assertEqual(scores.shape, (len(self.hands), 5))
+        self.assertListEqual(scores.max(axis=1).tolist(),
+                             [issgame.hand_score(hand) for hand in self.hands])
+
+    def test_null_scores(self):
+        hands = ['D7_D9_DJ_H7_H9_S7_S9_C7_C9_CJ',
+                 'CQ_D7_DK_H9_SJ_DJ_H8_S7_D8_S8',
+                 'CA_CK_CQ_CJ_CT_C9_C8_C7_SA_HA']
+        self.assertListEqual(
+            null_scores(issgame.encode_hands(hands)).tolist(), [0, 2, 2])
+
+    def test_skat_scores_discard_best_cards(self):
+        for game in self.games[:5]:
+            cards = (game.get_hand1() + '_' + game.get_skat()).split('_')
+            expected = max(issgame.hand_score('_'.join(kept))
+                           for kept in itertools.combinations(cards, 10))
+            score = skat_scores(issgame.encode_hands([game.get_hand1()]),
+                                issgame.encode_hands([game.get_skat()]))
+            self.assertEqual(score[0], expected)
+
+    def test_score_batch(self):
+        batch = issgame.GameLine.parse_many(self.games, keep_games=True)
+        scores = issgame.score_batch(batch, ['stegen', 'stegen_skat'])
+        self.assertListEqual(list(scores), ['stegen', 'stegen_skat'])
+        self.assertListEqual(scores['stegen'].tolist(),
+                             issgame.hand_scores(self.hands).tolist())
+        declarers = ~numpy.isnan(scores['stegen_skat'].reshape(-1, 3))
+        self.assertListEqual(
+            declarers.argmax(axis=1)[declarers.any(axis=1)].tolist(),
+            [game.get_declarer() - 1 for game in self.games
+             if game.get_declarer() is not None])
+        with self.assertRaises(ValueError):
+            issgame.score_batch(issgame.GameLine.parse_many(self.games),
+                                ['stegen'])
+        with self.assertRaises(ValueError):
+            issgame.score_batch(batch, ['unknown'])
+
+    def test_registered_scorer(self):
+        issgame.register_scorer('cards', ['cards'],
+                                lambda scoring_input: issgame.cards.popcount(
+                                    scoring_input.hands | scoring_input.skats))
+        try:
+            batch = issgame.GameLine.parse_many(self.games, keep_games=True)
+            scores = issgame.score_batch(batch, ['cards'])
+        finally:
+            del issgame.SCORERS['cards']
+        self.assertTrue((scores['cards'] == 12).all())
+
+
+class TestExtractScores(unittest.TestCase):
+    raw_data = ['issgame/tests/data/test_games.sgf']
+
+    def test_scores_are_extra_columns(self):
+        with tempfile.TemporaryDirectory() as directory:
+            plain_file = os.path.join(directory, 'plain.tsv')
+            scored_file = os.path.join(directory, 'scored.tsv')
+            columnar = os.path.join(directory, 'scored')
+            issgame.extract_svg_hands(self.raw_data, plain_file)
+            issgame.extract_svg_hands(self.raw_data, scored_file,
+                                      scorers=['stegen', 'null', 'suits'],
+                                      jobs=2, shardsize=3000)
+            issgame.extract_svg_hands(self.raw_data, columnar,
+                                      scorers=['stegen', 'null', 'suits'],
+                                      output_format='npy')
+            plain = pandas.read_csv(plain_file, sep='\t')
+            scored = pandas.read_csv(scored_file, sep='\t')
+            columns = issgame.load_columnar(columnar).to_frame()
+
+        self.assertEqual(len(plain.columns), 5)
+        self.assertListEqual(
+            scored.columns.tolist(), plain.columns.tolist()
+            + ['stegen', 'null', 'stegen_D', 'stegen_H', 'stegen_S',
+               'stegen_C', 'stegen_G'])
+        pandas.testing.assert_frame_equal(scored[plain.columns], plain)
+        self.assertListEqual(scored['stegen'].tolist(),
+                             issgame.hand_scores(plain['hand']).tolist())
+        pandas.testing.assert_frame_equal(
+            columns.drop(columns='hand'), scored.drop(columns='hand'))
+
+    def test_unknown_scorer(self):
+        with self.assertRaises(ValueError):
+            issgame.extract_svg_hands(self.raw_data, 'unused.tsv',
+                                      scorers=['unknown'])
+
+
+if __name__ == '__main__':
+    unittest.main()
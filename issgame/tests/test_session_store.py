@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+import issgame
+
+
+class TestSessionStore(unittest.TestCase):
+    input_filename = 'issgame/tests/data/test_converted_games_known.tsv'
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        converted_file = os.path.join(self.directory, 'games.tsv')
+        shutil.copy(self.input_filename, converted_file)
+        self.sessions_file = os.path.join(self.directory, 'games_sessions.csv')
+        issgame.extract_all_sessions(converted_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_dict_access_matches_load_sessions(self):
+        store = issgame.load_session_store(self.sessions_file)
+        expected = issgame.load_sessions(self.sessions_file, None)
+        self.assertDictEqual(store.to_dict(), expected)
+        self.assertListEqual(
+            store['@9WScnU3']['2017-02-27-@9WScnU3-theCount-zoot'], [13.333])
+
+    def test_arrays_are_contiguous(self):
+        store = issgame.load_session_store(self.sessions_file)
+        self.assertEqual(store.scores.dtype.name, 'float32')
+        self.assertEqual(store.offsets[-1], len(store.scores))
+        self.assertEqual(len(store.session_ids), len(store.offsets) - 1)
+
+    def test_saved_store_is_memory_mapped(self):
+        store = issgame.load_session_store(self.sessions_file)
+        with tempfile.TemporaryDirectory() as directory:
+            store.save(directory)
+            loaded = issgame.load_session_store(directory)
+            self.assertIsInstance(loaded.scores, numpy.memmap)
+            self.assertDictEqual(loaded.to_dict(), store.to_dict())
+            del loaded
+
+    def test_segment_statistics_match_per_session_statistics(self):
+        store = issgame.load_session_store(self.sessions_file)
+        means = store.means()
+        variances = store.variances()
+        for segment in range(len(store.offsets) - 1):
+            scores = numpy.array(store.segment_scores(segment))
+            self.assertAlmostEqual(means[segment], scores.mean(), places=5)
+            if len(scores) > 1:
+                self.assertAlmostEqual(variances[segment],
+                                       scores.var(ddof=1), places=5)
+            else:
+                self.assertTrue(numpy.isnan(variances[segment]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+import pandas
+
+import issgame
+from issgame.sessionize import game_times
+
+
+def _rows(game_id, time, players):
+    key = time[:10] + '-' + '-'.join(sorted(players))
+    return [{'id': '{:d}_{}/UTC'.format(game_id, time), 'session': key,
+             'player': player, 'position': position}
+            for position, player in enumerate(players, 1)]
+
+
+class TestSessionize(unittest.TestCase):
+    def setUp(self):
+        trio = ['zoot', 'blkkjk', 'theCount']
+        others = ['xskat', 'xskat:2', 'zoot']
+        games = [(1, '2021-04-30/10:00:00', trio),
+                 (2, '2021-04-30/10:03:00', others),
+                 (3, '2021-04-30/10:05:00', trio[1:] + trio[:1]),
+                 # a second sitting of the same group on the same day
+                 (4, '2021-04-30/14:00:00', trio),
+                 # a sitting over midnight
+                 (5, '2021-04-30/23:55:00', trio),
+                 (6, '2021-05-01/00:05:00', trio)]
+        self.games = pandas.DataFrame([row for game in games
+                                       for row in _rows(*game)])
+
+    def test_game_times(self):
+        times = game_times(['6997010_2021-04-30/01:07:29/UTC'])
+        self.assertEqual(times[0], numpy.datetime64('2021-04-30T01:07:29'))
+
+    def test_splits_sessions_at_idle_gaps(self):
+        session_ids, mapping = issgame.sessionize(self.games, gap=3600)
+        self.assertEqual(session_ids.dtype, numpy.int32)
+        game_sessions = session_ids[::3].tolist()
+        self.assertTrue((session_ids.reshape(-1, 3)
+                         == session_ids[::3, numpy.newaxis]).all())
+        self.assertEqual(game_sessions[0], game_sessions[2])
+        self.assertEqual(game_sessions[4], game_sessions[5])
+        self.assertEqual(len(set(game_sessions)), 4)
+        self.assertListEqual(sorted(set(session_ids.tolist())),
+                             list(range(4)))
+
+        merged = mapping[mapping['session_id'] == game_sessions[4]]
+        self.assertListEqual(merged['key'].tolist(),
+                             ['2021-04-30-blkkjk-theCount-zoot',
+                              '2021-05-01-blkkjk-theCount-zoot'])
+        self.assertListEqual(merged['games'].tolist(), [1, 1])
+        first = mapping[mapping['session_id'] == game_sessions[0]].iloc[0]
+        self.assertEqual(first['players'], 'blkkjk-theCount-zoot')
+        self.assertEqual(first['games'], 2)
+        self.assertEqual(first['end'] - first['start'],
+                         pandas.Timedelta(minutes=5))
+
+        # a gap of a day joins the sittings of each group
+        session_ids, __mapping = issgame.sessionize(self.games, gap=86400)
+        self.assertEqual(len(set(session_ids.tolist())), 2)
+
+    def test_extract_all_sessions_with_gap(self):
+        input_filename = 'issgame/tests/data/test_converted_games_known.tsv'
+        with tempfile.TemporaryDirectory() as directory:
+            converted_file = os.path.join(directory, 'games.tsv')
+            shutil.copy(input_filename, converted_file)
+            issgame.extract_all_sessions(converted_file)
+            by_date = issgame.load_sessions(
+                os.path.join(directory, 'games_sessions.csv'), None)
+            issgame.extract_all_sessions(converted_file, gap=3600)
+            by_gap = issgame.load_sessions(
+                os.path.join(directory, 'games_sessions.csv'), None)
+            mapping = pandas.read_csv(
+                os.path.join(directory, 'games_session_keys.csv'))
+
+        keys = dict(zip(mapping['session_id'].astype(str), mapping['key']))
+        for player, sessions in by_gap.items():
+            for session, scores in sessions.items():
+                self.assertListEqual(scores,
+                                     by_date[player][keys[session]])
+
+
+if __name__ == '__main__':
+    unittest.main()
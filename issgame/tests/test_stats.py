@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+import scipy.stats
+
+import issgame
+import issgame.stats
+
+
+class TestStats(unittest.TestCase):
+    input_filename = 'issgame/tests/data/test_converted_games_known.tsv'
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        converted_file = os.path.join(self.directory, 'games.tsv')
+        shutil.copy(self.input_filename, converted_file)
+        self.sessions_file = os.path.join(self.directory, 'games_sessions.csv')
+        issgame.extract_all_sessions(converted_file)
+        self.store = issgame.load_session_store(self.sessions_file)
+        self.all_hands = numpy.array(issgame.load_hands(self.input_filename, 1))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_welch_matches_scipy_for_every_session(self):
+        population = issgame.population_moments(self.all_hands)
+        tested = issgame.session_tests(self.store, population, min_length=3)
+        sessions = self.store.to_dict()
+        self.assertEqual(len(tested), 3)
+        for __i, row in tested.iterrows():
+            expected = scipy.stats.ttest_ind(
+                sessions[row['player']][row['session']], self.all_hands,
+                equal_var=False)
+            self.assertAlmostEqual(row['t'], expected.statistic)
+            self.assertAlmostEqual(row['p'], expected.pvalue)
+
+    def test_transform_is_applied_to_sessions(self):
+        population = issgame.population_moments(self.all_hands, numpy.sqrt)
+        tested = issgame.session_tests(self.store, population, min_length=10,
+                                       transform=numpy.sqrt)
+        session = self.store['zoot']['2021-04-30-blkkjk-theCount-zoot']
+        expected = scipy.stats.ttest_ind(numpy.sqrt(session),
+                                         numpy.sqrt(self.all_hands),
+                                         equal_var=False)
+        row = tested[tested['player'] == 'zoot'].iloc[0]
+        self.assertAlmostEqual(row['p'], expected.pvalue)
+
+    def test_distribution_moments(self):
+        distribution = issgame.load_hand_score_distribution()
+        moments = issgame.distribution_moments(distribution)
+        self.assertEqual(moments.n, distribution.total)
+        self.assertAlmostEqual(moments.mean, distribution.mean())
+        self.assertAlmostEqual(moments.var, distribution.variance(), places=5)
+
+    def test_holm(self):
+        pvalues = [0.01, 0.04, 0.03, 0.005]
+        self.assertListEqual(
+            numpy.round(issgame.stats.holm(pvalues), 6).tolist(),
+            [0.03, 0.06, 0.06, 0.02])
+
+    def test_benjamini_hochberg_matches_scipy(self):
+        pvalues = numpy.random.default_rng(1).random(50)**3
+        numpy.testing.assert_allclose(
+            issgame.stats.benjamini_hochberg(pvalues),
+            scipy.stats.false_discovery_control(pvalues))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import itertools
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+import issgame
+from issgame.streaks import segment_autocorrelation, segment_longest, \
+    segment_runs
+
+
+def _longest(flags):
+    return max([len(list(run)) for flag, run in itertools.groupby(flags)
+                if flag], default=0)
+
+
+class TestSegments(unittest.TestCase):
+    def setUp(self):
+        generator = numpy.random.default_rng(0)
+        lengths = [5, 0, 1, 12, 3, 30]
+        self.offsets = numpy.concatenate([[0], numpy.cumsum(lengths)])
+        self.scores = generator.integers(0, 6, self.offsets[-1])\
+            .astype(numpy.float64)
+        self.segments = [self.scores[start:end] for start, end in
+                         zip(self.offsets[:-1], self.offsets[1:])]
+
+    def test_runs_and_longest_match_loops(self):
+        good = self.scores > 2
+        self.assertListEqual(
+            segment_runs(good, self.offsets).tolist(),
+            [len(list(itertools.groupby(segment > 2)))
+             for segment in self.segments])
+        self.assertListEqual(
+            segment_longest(good, self.offsets).tolist(),
+            [_longest(segment > 2) for segment in self.segments])
+        self.assertListEqual(
+            segment_longest(~good, self.offsets).tolist(),
+            [_longest(segment <= 2) for segment in self.segments])
+
+    def test_autocorrelation_matches_loop(self):
+        for lag in [1, 2]:
+            correlations = segment_autocorrelation(self.scores, self.offsets,
+                                                   lag)
+            for segment, correlation in zip(self.segments, correlations):
+                if len(segment) <= lag:
+                    self.assertTrue(numpy.isnan(correlation))
+                    continue
+                deviations = segment - segment.mean()
+                expected = numpy.dot(deviations[:-lag], deviations[lag:])\
+                    / numpy.dot(deviations, deviations)
+                self.assertAlmostEqual(correlation, expected)
+
+
+class TestStreaks(unittest.TestCase):
+    input_filename = 'issgame/tests/data/test_converted_games_known.tsv'
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        converted_file = os.path.join(self.directory, 'games.tsv')
+        shutil.copy(self.input_filename, converted_file)
+        self.sessions_file = os.path.join(self.directory, 'games_sessions.csv')
+        issgame.extract_all_sessions(converted_file)
+        self.store = issgame.load_session_store(self.sessions_file)
+        self.all_hands = issgame.load_hand_scores(self.input_filename, 1)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_statistics_of_a_session(self):
+        threshold = float(numpy.median(self.all_hands))
+        statistics = issgame.streak_statistics(self.store, threshold, (1, 3))
+        row = statistics[statistics['player'] == 'zoot'].iloc[0]
+        scores = numpy.array(self.store['zoot'][row['session']])
+        good = scores > threshold
+        good_hands, bad_hands = good.sum(), (~good).sum()
+        expected = 2*good_hands*bad_hands/len(scores) + 1
+        self.assertEqual(row['n'], len(scores))
+        self.assertEqual(row['good'], good_hands)
+        self.assertEqual(row['runs'], len(list(itertools.groupby(good))))
+        self.assertAlmostEqual(row['runs_expected'], expected)
+        self.assertEqual(row['longest_good'], _longest(good))
+        self.assertEqual(row['longest_bad'], _longest(~good))
+        self.assertIn('acf_3', statistics.columns)
+
+    def test_simulated_pvalues(self):
+        tested = issgame.streak_tests(self.store, self.all_hands,
+                                      replicates=1500, seed=2)
+        parallel = issgame.streak_tests(self.store, self.all_hands,
+                                        replicates=1500, seed=2, jobs=2)
+        self.assertTrue((tested['n'] >= 10).all())
+        for column in ['p_runs', 'p_acf_1', 'p_longest_good',
+                       'p_longest_bad']:
+            self.assertTrue(((tested[column] > 0)
+                             & (tested[column] <= 1)).all())
+            numpy.testing.assert_array_equal(tested[column], parallel[column])
+
+
+if __name__ == '__main__':
+    unittest.main()
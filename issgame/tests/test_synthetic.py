@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+
+import pandas
+
+import issgame
+from issgame.synthetic import synthetic_lines, write_synthetic_games
+
+
+class TestSynthetic(unittest.TestCase):
+    def test_lines_parse_as_games(self):
+        lines = synthetic_lines(200, seed=1, players=5)
+        self.assertListEqual(lines, synthetic_lines(200, seed=1, players=5))
+        games = [issgame.GameLine(line) for line in lines]
+        players = set()
+        for game in games:
+            hands = [game.get_hand(player) for player in (1, 2, 3, 4)]
+            self.assertEqual(sum(issgame.encode_hand(hand) for hand in hands),
+                             0xFFFFFFFF)
+            players.update(game.get_player(player) for player in (1, 2, 3))
+        self.assertEqual(len(players), 5)
+        self.assertLess(len(set(game.get_session() for game in games)), 200)
+
+    def test_corrupt_lines_are_skipped(self):
+        with tempfile.TemporaryDirectory() as directory:
+            raw_file = os.path.join(directory, 'games.sgf')
+            converted_file = os.path.join(directory, 'games.tsv')
+            write_synthetic_games(raw_file, 500, seed=2, corrupt=0.1)
+            issgame.extract_svg_hands([raw_file], converted_file)
+            hands = pandas.read_csv(converted_file, sep='\t')
+        valid = sum(issgame.validate_line(line) is None
+                    for line in synthetic_lines(500, seed=2, corrupt=0.1))
+        self.assertLess(valid, 475)
+        self.assertEqual(hands['id'].nunique(), valid)
+
+
+if __name__ == '__main__':
+    unittest.main()